@@ -2,6 +2,7 @@ import sys
 sys.path.insert(0, '.')
 
 from src.sdk.helper import Helper, S_DATA
+from src.core.replay import replay_candles, trade_list
 import pendulum as pdlm
 import csv
 import re
@@ -30,24 +31,9 @@ token = api.instrument_symbol(exchange, instrument)
 
 # Stop time
 if "NATURALGAS" in instrument:
-    stop_hour, stop_min = 17, 59
+    low_candle_time = {"hour": 17, "minute": 59, "second": 59}
 else:
-    stop_hour, stop_min = 9, 14
-
-stop_time = pdlm.now().replace(hour=stop_hour, minute=stop_min, second=59)
-stop_data = api.historical(exchange, token, 
-    stop_time.subtract(hours=1).timestamp(),
-    stop_time.timestamp())
-
-if stop_data:
-    stop = float(stop_data[0]['intl'])
-else:
-    first = api.historical(exchange, token, 
-        pdlm.now().replace(hour=9, minute=15).timestamp(),
-        pdlm.now().replace(hour=9, minute=20).timestamp())
-    stop = float(first[0]['intl'])
-
-target = stop * 1.5
+    low_candle_time = {"hour": 9, "minute": 14, "second": 59}
 
 # Time range
 if "NATURALGAS" in instrument:
@@ -55,14 +41,32 @@ if "NATURALGAS" in instrument:
     to_time = pdlm.now().replace(hour=23, minute=20).timestamp()
     start_time = "18:00"
     end_time = "23:20"
+    stop_time = {"hour": 23, "minute": 20}
 else:
     from_time = pdlm.now().replace(hour=9, minute=15).timestamp()
     to_time = pdlm.now().replace(hour=15, minute=30).timestamp()
     start_time = "9:15"
     end_time = "15:30"
+    stop_time = {"hour": 15, "minute": 30}
 
 candles = api.historical(exchange, token, from_time, to_time)
 
+# the real Ram strategy, driven by the candles on a simulated clock
+fills, replay = replay_candles(
+    dict(
+        tradingsymbol=instrument,
+        strategy="ram",
+        stop_time=stop_time,
+        option_exchange=exchange,
+        option_token=token,
+        quantity=1,
+        low_candle_time=low_candle_time,
+    ),
+    candles,
+)
+ram = replay.strategies[0]
+stop, target = ram._stop, ram._target
+
 # Get bot session times from log
 with open("data/log.txt") as f:
     log = f.read()
@@ -114,37 +118,10 @@ def was_running(check_time):
     return False
 
 # Backtest signals
-bt_signals = []
-prev_trade = stop
-last_entry_idx = 0
-
-for i, c in enumerate(candles):
-    t = c['time'][-8:]
-    close = float(c['intc'])
-    low = float(c['intl'])
-    
-    if low <= stop and close > stop and close < target:
-        action = "SKIP (<3)" if last_entry_idx > 0 and i - last_entry_idx < 3 else "ENTRY"
-        bt_signals.append((t[:5], close, "BREAKOUT", action))
-        if action == "ENTRY":
-            prev_trade = close
-            last_entry_idx = i + 1
-        continue
-    
-    if i >= 2:
-        c1 = candles[i-1]
-        c2 = candles[i-2]
-        
-        c2_red = float(c2['intc']) < float(c2['into'])
-        c1_green = float(c1['intc']) > float(c1['into'])
-        
-        if c2_red and c1_green and close < target and close > prev_trade:
-            action = "SKIP (<3)" if last_entry_idx > 0 and i - last_entry_idx < 3 else "ENTRY"
-            bt_signals.append((t[:5], close, "2-CANDLE", action))
-            if action == "ENTRY":
-                prev_trade = close
-                last_entry_idx = i + 1
-            continue
+bt_signals = [
+    (t[:5], price, side, "ENTRY" if side == "BUY" else "EXIT")
+    for t, _, side, _, price in trade_list(fills)
+]
 
 # Get actual bot trades
 actual = set()
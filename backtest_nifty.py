@@ -2,6 +2,7 @@ import sys
 sys.path.insert(0, '.')
 
 from src.sdk.helper import Helper, S_DATA
+from src.core.replay import replay_candles, trade_list
 import pendulum as pdlm
 import csv
 import re
@@ -22,63 +23,33 @@ else:
     sym = "NIFTY12MAY26P24200"
     stop_hour, stop_min = 9, 14
 
-# Try to get stop, fallback to first candle
-stop_time = pdlm.now().replace(hour=stop_hour, minute=stop_min, second=59)
-stop_data = api.historical('NFO', token, 
-    stop_time.subtract(hours=1).timestamp(),
-    stop_time.timestamp())
-
-if stop_data:
-    stop = float(stop_data[0]['intl'])
-else:
-    # Use first available candle
-    first_candle = api.historical('NFO', token, 
-        pdlm.now().replace(hour=9, minute=15).timestamp(),
-        pdlm.now().replace(hour=9, minute=20).timestamp())
-    stop = float(first_candle[0]['intl'])
-
-target = stop * 1.5  # Default 50% for NIFTY
-
 # Get candles from 9:15 to 15:30
 from_time = pdlm.now().replace(hour=9, minute=15).timestamp()
 to_time = pdlm.now().replace(hour=15, minute=30).timestamp()
 candles = api.historical('NFO', token, from_time, to_time)
 
+# the real Ram strategy, driven by the candles on a simulated clock
+fills, replay = replay_candles(
+    dict(
+        tradingsymbol=sym,
+        strategy="ram",
+        stop_time={"hour": 15, "minute": 30},
+        option_exchange="NFO",
+        option_token=token,
+        quantity=1,
+        low_candle_time={"hour": stop_hour, "minute": stop_min, "second": 59},
+    ),
+    candles,
+)
+stop, target = replay.strategies[0]._stop, replay.strategies[0]._target
+
 print(f"Stop: {stop}, Target: {target}, Candles: {len(candles)}")
 
 # Generate backtest signals
-bt_signals = []
-prev_trade = stop
-last_entry_idx = 0
-
-for i, c in enumerate(candles):
-    t = c['time'][-8:]
-    close = float(c['intc'])
-    low = float(c['intl'])
-    high = float(c['inth'])
-    
-    if low <= stop and close > stop and close < target:
-        action = "SKIP (<3)" if last_entry_idx > 0 and i - last_entry_idx < 3 else "ENTRY"
-        bt_signals.append((t[:5], close, "BREAKOUT", action))
-        if action == "ENTRY":
-            prev_trade = close
-            last_entry_idx = i + 1
-        continue
-    
-    if i >= 2:
-        c1 = candles[i-1]
-        c2 = candles[i-2]
-        
-        c2_red = float(c2['intc']) < float(c2['into'])
-        c1_green = float(c1['intc']) > float(c1['into'])
-        
-        if c2_red and c1_green and close < target and close > prev_trade:
-            action = "SKIP (<3)" if last_entry_idx > 0 and i - last_entry_idx < 3 else "ENTRY"
-            bt_signals.append((t[:5], close, "2-CANDLE", action))
-            if action == "ENTRY":
-                prev_trade = close
-                last_entry_idx = i + 1
-            continue
+bt_signals = [
+    (t[:5], price, side, "ENTRY" if side == "BUY" else "EXIT")
+    for t, _, side, _, price in trade_list(fills)
+]
 
 # Get actual bot trades
 with open("data/log.txt") as f:
@@ -0,0 +1,80 @@
+"""
+Parameter sweep of the ram strategy over many instruments and days.
+Candles are read from the local store and replayed on a process pool,
+the broker is only asked for sessions not stored yet.
+
+Usage:
+  python backtest_sweep.py NFO:NIFTY12MAY26C24000[:token] ... \
+      --fm 2026-04-01 --to 2026-04-30 --targets 30% 50% --rest 1 3 \
+      --low 9:14:59 --workers 8
+"""
+import sys
+sys.path.insert(0, '.')
+
+import argparse
+
+from tabulate import tabulate
+
+from src.constants import S_DATA
+from src.core.sweep import cache_candles, make_jobs, summarize, sweep, trading_dates
+from src.sdk.ohlc_store import OhlcStore
+
+
+def hms(text):
+    return dict(zip(("hour", "minute", "second"), map(int, text.split(":"))))
+
+
+parser = argparse.ArgumentParser(description="ram parameter sweep")
+parser.add_argument("instruments", nargs="+", help="EXCHANGE:SYMBOL[:TOKEN]")
+parser.add_argument("--fm", required=True, help="first date, 2026-04-01")
+parser.add_argument("--to", required=True, help="last date, 2026-04-30")
+parser.add_argument("--targets", nargs="+", default=["50%"])
+parser.add_argument("--low", nargs="+", default=["9:14:59"], help="low candle times")
+parser.add_argument("--rest", nargs="+", type=int, default=[1], help="candle minutes")
+parser.add_argument("--workers", type=int, default=4)
+args = parser.parse_args()
+
+api = None
+instruments = []
+for spec in args.instruments:
+    exchange, symbol, *token = spec.split(":")
+    if not token:
+        if api is None:
+            from src.sdk.helper import Helper
+
+            api = Helper.api()
+        token = [api.instrument_symbol(exchange, symbol)]
+    instruments.append((exchange, symbol, token[0]))
+
+dates = trading_dates(args.fm, args.to)
+store = OhlcStore()
+missing = any(
+    set(dates) - set(store.dates(exchange, token)) for exchange, _, token in instruments
+)
+if missing:
+    if api is None:
+        from src.sdk.helper import Helper
+
+        api = Helper.api()
+    cache_candles(api, instruments, dates, store)
+
+jobs = make_jobs(
+    instruments,
+    dates,
+    targets=args.targets,
+    low_candle_times=[hms(t) for t in args.low],
+    rest_times=[{"minutes": m} for m in args.rest],
+)
+print(f"{len(jobs)} runs on {args.workers} workers")
+
+results = sweep(jobs, root=store.root, workers=args.workers)
+results.to_csv(f"{S_DATA}sweep_runs.csv", index=False)
+
+table = summarize(results)
+table.to_csv(f"{S_DATA}sweep_summary.csv", index=False)
+print(tabulate(table, headers="keys", tablefmt="github", showindex=False))
+if "error" in results:
+    errors = results[results["error"].notna()]
+    if len(errors):
+        print(f"{len(errors)} runs failed, see {S_DATA}sweep_runs.csv")
+        print(tabulate(errors[["tradingsymbol", "date", "error"]].head(), headers="keys"))
@@ -0,0 +1,70 @@
+"""
+Microbenchmark: NumPy compress_candles against the earlier pandas
+resample implementation, on 5 days of minute candles per symbol.
+Run with: uv run python scripts/bench_compress_candles.py [symbols]
+"""
+import sys
+from json import dumps, loads
+from timeit import timeit
+
+import pandas as pd
+
+from src.sdk.helper import compress_candles, compress_many
+
+
+def pandas_compress_candles(data_now, tz="Asia/Kolkata"):
+    """the resample based implementation compress_candles replaced"""
+    df = pd.DataFrame(data_now)
+    s = pd.to_datetime(df["time"], dayfirst=True, errors="raise")
+    df.index = s.dt.tz_localize(tz)
+    for col in ["into", "inth", "intl", "intc", "v", "oi"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    agg = {"into": "first", "inth": "max", "intl": "min", "intc": "last", "v": "sum"}
+    daily = df.resample("1D").agg(agg).dropna(subset=["intc"]).tail(1)
+    out = daily.reset_index()
+    out["date"] = out["time"].dt.strftime("%Y-%m-%d")
+    out = out.drop(columns=["time"])
+    return loads(dumps(out.to_dict(orient="records"), default=str))[0]
+
+
+def five_days(seed):
+    rows = []
+    for day in pd.date_range("2025-09-15", periods=5):
+        start = day + pd.Timedelta(hours=9, minutes=15)
+        for i in range(375):
+            price = 100 + seed + (i % 50)
+            rows.append(
+                {
+                    "time": (start + pd.Timedelta(minutes=i)).strftime("%d-%m-%Y %H:%M:%S"),
+                    "into": str(price),
+                    "inth": str(price + 2),
+                    "intl": str(price - 1),
+                    "intc": str(price + 1),
+                    "v": "10",
+                }
+            )
+    return rows[::-1]
+
+
+if __name__ == "__main__":
+    n_symbols = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    data = {f"SYM{i}": five_days(i) for i in range(n_symbols)}
+    one = data["SYM0"]
+    runs = 20
+
+    old = timeit(lambda: pandas_compress_candles(one), number=runs) / runs
+    new = timeit(
+        lambda: compress_candles(one, exclude_today=False), number=runs
+    ) / runs
+    print(f"one symbol, {len(one)} candles")
+    print(f"  pandas resample : {old * 1e3:8.2f} ms")
+    print(f"  numpy aggregate : {new * 1e3:8.2f} ms  ({old / new:.1f}x)")
+
+    loop = timeit(
+        lambda: [pandas_compress_candles(rows) for rows in data.values()], number=3
+    ) / 3
+    many = timeit(lambda: compress_many(data), number=3) / 3
+    print(f"{n_symbols} symbols, daily bars")
+    print(f"  pandas per symbol: {loop * 1e3:8.2f} ms")
+    print(f"  compress_many    : {many * 1e3:8.2f} ms  ({loop / many:.1f}x)")
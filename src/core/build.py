@@ -2,14 +2,19 @@ from __future__ import annotations
 from src.constants import logging_func
 
 from traceback import print_exc
-from toolkit.kokoo import is_time_past
+from src.providers.clock import Clock
 
 from typing import Any, Literal
 from src.sdk.symbol import OptionSymbol, OptionData
 from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
 
 logging = logging_func(__name__)
 
+# upper bound on concurrent broker calls while building
+BUILD_WORKERS = 8
+
 
 class Builder:
     def __init__(self, trade_settings: dict, user_settings: dict, quote, rest, rm):
@@ -83,7 +88,7 @@ class Builder:
             print_exc()
 
     def can_build(self):
-        if is_time_past(self._meta["start_time"]):
+        if Clock.is_past(self._meta["start_time"]):
             return True
         return False
 
@@ -210,16 +215,15 @@ def find_tradingsymbols_by_premium(
         # find the tradingsymbol which is closest to the premium
         tokens_for_all_trading_symbols = param["fno_tokens"]
 
-        # subscribe to symbols
-        for key, symbol in tokens_for_all_trading_symbols.items():
-            token = key.split("|")[1]
-            _ = quote.symbol_info(param["option_exchange"], symbol, token)
+        # subscribe to all strikes in one frame
+        quote.subscribe_many(tokens_for_all_trading_symbols)
 
         logging.info(
             f"premium {param['premium']} to be check against quotes for closeness ]"
         )
         symbol_with_closest_premium = sym.find_closest_premium(
-            quotes=quote.get_quotes(),
+            # a private copy, other jobs keep subscribing while we scan
+            quotes=quote.get_quotes(copy=True),
             premium=param["premium"],
             contains=ce_or_pe,
         )
@@ -237,22 +241,65 @@ def find_tradingsymbols_by_premium(
         return {}
 
 
-def stuff_atm(data, meta):
+def _atm_for(user_settings, rest):
+    ltp_for_underlying = rest.ltp(user_settings["exchange"], user_settings["token"])
+    user_settings["atm"] = find_atm_fm_ltp(user_settings, ltp_for_underlying)
+
+
+def stuff_atm(data, meta, workers=BUILD_WORKERS):
+    """fetches underlying ltp and atm for every symbol in parallel"""
     try:
-        for user_settings in data.values():
-            ltp_for_underlying = meta["rest"].ltp(
-                user_settings["exchange"], user_settings["token"]
-            )
-            user_settings["atm"] = find_atm_fm_ltp(user_settings, ltp_for_underlying)
+        begin = monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_atm_for, user_settings, meta["rest"])
+                for user_settings in data.values()
+            ]
+            for future in futures:
+                future.result()
+        logging.info(
+            f"stuff atm: {len(futures)} underlyings in {monotonic() - begin:.2f}s"
+        )
         return data
     except Exception as e:
         logging.error(f"{e} in find atm")
         print_exc()
 
 
-def stuff_tradingsymbols(data, meta):
+def _option_info_for(user_settings, option_type, quote, method_keys):
+    begin = monotonic()
+    if "moneyness" in method_keys:
+        option_info = find_tradingsymbols_by_moneyness(
+            ce_or_pe=option_type, param=user_settings, quote=quote
+        )
+
+    elif "premium" in method_keys:
+        user_settings["fno_tokens"] = find_tokens_from_atm(
+            user_settings, user_settings["atm"]
+        )
+        option_info = find_tradingsymbols_by_premium(
+            ce_or_pe=option_type, param=user_settings, quote=quote
+        )
+
+    # held till the strategy trading it is removed
+    quote.acquire(option_info["symbol"])
+    user_settings["tradingsymbol"] = option_info["symbol"]
+    user_settings["ltp"] = option_info["ltp"]
+    user_settings["option_token"] = option_info["token"]
+    logging.info(
+        f"built {user_settings['tradingsymbol']} in {monotonic() - begin:.2f}s"
+    )
+    return user_settings
+
+
+def stuff_tradingsymbols(data, meta, workers=BUILD_WORKERS):
+    """
+    resolves the CE and PE tradingsymbol of every underlying in parallel,
+    the order of the returned list is the same as the sequential one
+    """
     try:
-        lst = []
+        begin = monotonic()
+        jobs = []
 
         for copied in data.values():
             moneyness_or_premium = copied.pop("method")
@@ -264,25 +311,23 @@ def stuff_tradingsymbols(data, meta):
                 user_settings = deepcopy(copied)
                 user_settings.update(**meta)
                 user_settings["option_type"] = option_type
+                jobs.append((user_settings, option_type, set(keys_of_user_settings)))
 
-                if "moneyness" in keys_of_user_settings:
-                    option_info = find_tradingsymbols_by_moneyness(
-                        ce_or_pe=option_type, param=user_settings, quote=meta["quote"]
-                    )
-
-                elif "premium" in keys_of_user_settings:
-                    user_settings["fno_tokens"] = find_tokens_from_atm(
-                        user_settings, user_settings["atm"]
-                    )
-                    option_info = find_tradingsymbols_by_premium(
-                        ce_or_pe=option_type, param=user_settings, quote=meta["quote"]
-                    )
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _option_info_for, user_settings, option_type, meta["quote"], keys
+                )
+                for user_settings, option_type, keys in jobs
+            ]
+            lst = [future.result() for future in futures]
 
-                user_settings["tradingsymbol"] = option_info["symbol"]
-                user_settings["ltp"] = option_info["ltp"]
-                user_settings["option_token"] = option_info["token"]
-                lst.append(user_settings)
+        # scan is over, drop the strikes no strategy is going to trade
+        meta["quote"].prune()
 
+        logging.info(
+            f"stuff tradingsymbols: {len(lst)} options in {monotonic() - begin:.2f}s"
+        )
         return lst
     except Exception as e:
         logging.error(f"{e} find fno token")
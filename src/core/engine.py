@@ -1,49 +1,194 @@
 from src.constants import logging_func
 from traceback import print_exc
-from toolkit.kokoo import is_time_past, blink
+from toolkit.kokoo import blink
 from src.providers.ui import generate_table
+from src.core.snapshot import MarketSnapshot
+from src.providers.latency import Latency
+from src.providers.clock import Clock
 from rich.columns import Columns
 
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from time import monotonic
+
 logging = logging_func(__name__)
 
 
+@dataclass
+class RunStats:
+    """Per strategy accounting of threaded runs against its tick deadline."""
+
+    runs: int = 0
+    overruns: int = 0
+    skipped: int = 0
+    errors: int = 0
+    last_secs: float = 0.0
+    max_secs: float = 0.0
+
+
+def _name(strgy):
+    return getattr(strgy, "_tradingsymbol", strgy)
+
+
 class Engine:
-    def __init__(self, start, stop):
+    def __init__(self, start, stop, workers=0, deadline=1.0, refresh=0):
+        """
+        workers: 0 runs strategies one after another on the main thread,
+                 anything above runs them on a bounded thread pool
+        deadline: seconds a tick waits for a strategy before counting
+                  it as an overrun, strategies can carry their own
+        refresh: minimum seconds between two position book downloads
+        """
         self.strategies = []
         self.stop = stop
         self.start = start
+        self.snapshot = None
+        self._snapshot_at = 0.0
+        self.refresh = refresh
+        self.deadline = deadline
+        self.stats = {}
+        self._pending = {}
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strategy")
+            if workers > 0
+            else None
+        )
 
     def wait_until_start(self):
         logging.info(f"WAITING: till Super-Ai starts at {self.start}")
-        while not is_time_past(self.start):
+        while not Clock.is_past(self.start):
             blink()
 
     def add_strategy(self, new_strats):
         if new_strats:
             self.strategies.extend(new_strats)
 
-    def tick(self, rest, quote, live):
+    def _deadline_for(self, strgy):
+        deadline = getattr(strgy, "deadline", None)
+        if isinstance(deadline, (int, float)) and deadline > 0:
+            return deadline
+        return self.deadline
+
+    def _timed_run(self, strgy, positions, quotes):
+        begin = monotonic()
+        try:
+            strgy.run(positions, quotes)
+        finally:
+            elapsed = monotonic() - begin
+            stats = self.stats[strgy]
+            stats.runs += 1
+            stats.last_secs = elapsed
+            stats.max_secs = max(stats.max_secs, elapsed)
+
+    def _take_snapshot(self, rest, quote):
+        """
+        reuses the previous position book if it is younger than refresh
+        seconds, so a burst of websocket ticks does not hit the broker
+        """
+        now = monotonic()
+        if self.snapshot and now - self._snapshot_at < self.refresh:
+            return MarketSnapshot(rest, quote, positions=self.snapshot.positions)
+        self._snapshot_at = now
+        return MarketSnapshot(rest, quote)
+
+    def _run_concurrently(self, strategies, positions, quotes):
+        """
+        submits every idle strategy to the pool and waits for each of them
+        only till its own deadline. a strategy still busy from an earlier
+        tick is skipped instead of queued behind itself.
+        """
+        tick_start = monotonic()
+        submitted = []
+        for strgy in strategies:
+            if strgy._removable:
+                continue
+            stats = self.stats.setdefault(strgy, RunStats())
+            busy = self._pending.get(strgy)
+            if busy is not None and not busy.done():
+                stats.skipped += 1
+                logging.warning(f"{_name(strgy)} still running from previous tick, skipped")
+                continue
+            future = self._executor.submit(self._timed_run, strgy, positions, quotes)
+            self._pending[strgy] = future
+            submitted.append((self._deadline_for(strgy), strgy, future))
+
+        for deadline, strgy, future in sorted(submitted, key=lambda x: x[0]):
+            remaining = max(0.0, tick_start + deadline - monotonic())
+            done, _ = wait([future], timeout=remaining)
+            if not done:
+                self.stats[strgy].overruns += 1
+                logging.warning(f"{_name(strgy)} overran its deadline of {deadline}s")
+            elif future.exception() is not None:
+                self.stats[strgy].errors += 1
+                logging.error(f"{future.exception()} while running {_name(strgy)}")
+
+    def _release(self, quote, removed):
+        """gives back the subscriptions of removed strategies"""
+        for strgy in removed:
+            quote.release(strgy._tradingsymbol)
+        quote.prune()
+
+    def tick(self, rest, quote, live, changed=None):
+        """
+        changed: symbols updated by the websocket since the last tick,
+                 None runs every strategy as in polling mode
+        """
+        # one now() for the whole tick, shared by every strategy
+        Clock.freeze()
         try:
             if not self.strategies:
                 return
-            """
-            # Get the run arguments dynamically
-            trades = rest.trades()
 
-            needs_position = any(
-                s.strategy == "openingbalance" for s in self.strategies
+            strategies = (
+                self.strategies
+                if changed is None
+                else [s for s in self.strategies if s._tradingsymbol in changed]
             )
-            positions = rest.positions() if needs_position else None
-            """
+            # nothing moved: skip the runs but still refresh and clean up
+            if strategies:
+                Latency.ticked()
+                # one broker round-trip per tick, shared by all strategies
+                self.snapshot = self._take_snapshot(rest, quote)
+
+                if self._executor:
+                    self._run_concurrently(
+                        strategies, self.snapshot.positions, self.snapshot.quotes
+                    )
+                else:
+                    for strgy in strategies:
+                        strgy.run(self.snapshot.positions, self.snapshot.quotes)
 
-            tbl_rich = []
-            for strgy in self.strategies:
-                strgy.run(rest.positions(), quote.get_quotes())
-                tbl_rich.append(generate_table(strgy))
+                logging.debug(
+                    f"tick: {len(strategies)} strategies with "
+                    f"{self.snapshot.broker_calls} broker calls"
+                )
 
+            tbl_rich = [generate_table(strgy) for strgy in self.strategies]
             live.update(Columns(tbl_rich))
 
-            self.strategies = [s for s in self.strategies if not s._removable]
+            # a strategy that is still running is kept till its run returns
+            kept = [
+                s
+                for s in self.strategies
+                if not s._removable
+                or (s in self._pending and not self._pending[s].done())
+            ]
+            if len(kept) < len(self.strategies):
+                self._release(quote, [s for s in self.strategies if s not in kept])
+            self.strategies = kept
+            self._pending = {
+                s: f for s, f in self._pending.items() if s in self.strategies
+            }
         except Exception as e:
             print_exc()
             logging.error(f"{e} Engine: run while tick")
+        finally:
+            Clock.thaw()
+
+    def shutdown(self, latency_file=None):
+        """latency_file: where to write the latency summary, if anywhere"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            for strgy, stats in self.stats.items():
+                logging.info(f"{_name(strgy)} {stats}")
+        Latency.dump(latency_file)
@@ -0,0 +1,240 @@
+from src.constants import logging_func
+
+import threading
+
+import numpy as np
+import pendulum as pdlm
+
+from src.core.engine import Engine
+from src.core.strategy import create_strategies_from_params
+from src.providers.clock import Clock, SimClock
+from src.providers.risk_manager import RiskManager
+from src.sdk.helper import RestApi
+from src.sdk.intraday import IntradayHistory, normalize
+
+logging = logging_func(__name__)
+
+
+class ReplayError(Exception):
+    """the replay cannot go on, such as a strategy that never got built"""
+
+
+class SimBroker:
+    """
+    broker stand in for replays. serves the minute candles it was given
+    up to the replay clock and fills every order at its limit price the
+    moment it is placed, fills are kept in the order they happened.
+    """
+
+    def __init__(self):
+        self._candles = {}
+        self._positions = {}
+        self.fills = []
+        self._lock = threading.Lock()
+
+    def add_candles(self, exchange, token, data):
+        """data: broker candles of one token, in any order"""
+        self._candles[(exchange, str(token))] = normalize(data)
+
+    def last_close(self):
+        """epoch at which the newest bar of any token closes, None if empty"""
+        ends = [int(epochs[-1]) + 60 for epochs, _ in self._candles.values() if len(epochs)]
+        return max(ends, default=None)
+
+    def historical(self, exchange, token, fm, to):
+        """completed bars starting in [fm, to], newest first like the broker"""
+        epochs, rows = self._candles.get((exchange, str(token)), ((), []))
+        if not len(rows):
+            return None
+        closed = min(to, Clock.time()) - 60
+        lo = int(np.searchsorted(epochs, fm, side="left"))
+        hi = int(np.searchsorted(epochs, closed, side="right"))
+        return rows[lo:hi][::-1] or None
+
+    @property
+    def positions(self):
+        with self._lock:
+            return [dict(p) for p in self._positions.values()]
+
+    @property
+    def orders(self):
+        return list(self.fills)
+
+    @property
+    def trades(self):
+        return list(self.fills)
+
+    def order_place(self, symbol, exchange, quantity, side, price, tag=None, **kwargs):
+        with self._lock:
+            fill = {
+                "order_id": str(len(self.fills) + 1),
+                "time": Clock.time(),
+                "symbol": symbol,
+                "exchange": exchange,
+                "side": side,
+                "quantity": quantity,
+                "price": price,
+                "tag": tag,
+            }
+            self.fills.append(fill)
+            pos = self._positions.setdefault(
+                symbol, {"symbol": symbol, "exchange": exchange, "quantity": 0}
+            )
+            pos["quantity"] += quantity if side == "BUY" else -quantity
+            return fill["order_id"]
+
+
+class SimQuote:
+    """QuoteApi stand in, prices and tick times are pushed by the replay"""
+
+    def __init__(self):
+        self._ltp = {}
+        self._times = {}
+
+    def update(self, symbol, ltp, ts):
+        self._ltp[symbol] = ltp
+        self._times[symbol] = ts
+
+    def get_quotes(self, copy=False):
+        return dict(self._ltp) if copy else self._ltp
+
+    def tick_time(self, symbol):
+        return self._times.get(symbol)
+
+    def release(self, symbol):
+        pass
+
+    def prune(self):
+        pass
+
+
+class _NoLive:
+    def update(self, renderable):
+        pass
+
+
+def candle_ticks(symbol, data):
+    """
+    replays broker minute candles as four ticks each, open first and
+    close last, the low before the high on a green bar and after it on
+    a red one. yields (ts, symbol, ltp) oldest first.
+    """
+    epochs, rows = normalize(data)
+    for ts, row in zip(epochs.tolist(), rows):
+        o, h, low, c = (float(row[k]) for k in ("into", "inth", "intl", "intc"))
+        path = (o, low, h, c) if c >= o else (o, h, low, c)
+        for offset, price in zip((0, 20, 40, 59), path):
+            yield ts + offset, symbol, price
+
+
+class Replay:
+    """
+    drives the real Engine and strategies through recorded or historical
+    ticks on a simulated clock, as fast as the code runs. the same input
+    gives the same fills every time.
+    """
+
+    def __init__(self, broker=None):
+        self.broker = broker or SimBroker()
+        self.quote = SimQuote()
+        self.rest = RestApi(self.broker)
+        # a cache of its own, the shared one holds live candles
+        self.rest._intraday = IntradayHistory(ttl=0)
+        self.engine = None
+        self.strategies = []
+
+    def run(self, params, ticks, start, stop=None):
+        """
+        params: strategy parameters as the builder makes them, rm, rest
+                and quote are filled in with the simulated ones
+        ticks: (ts, symbol, ltp) in time order
+        start: epoch at which strategies are created, earlier ticks only
+               move prices
+        stop: epoch after which ticks are ignored
+        returns the broker fills, raises ReplayError when the strategies
+        are still waiting to be built at stop or the last candle close
+        """
+        clock = SimClock(start, limit=self._limit(ticks, start, stop))
+        Clock.use(clock)
+        try:
+            strategies = None
+            built_at = None
+            for ts, symbol, ltp in ticks:
+                if stop is not None and ts > stop:
+                    break
+                if strategies is None and ts >= start:
+                    clock.set(start)
+                    strategies = self._create(params)
+                    if clock.exhausted:
+                        raise ReplayError(
+                            f"strategies still waiting at {clock.limit}, "
+                            "no candle for what they asked"
+                        )
+                    # building blocks live too, ticks it waited through
+                    # are never seen by the strategies
+                    built_at = clock()
+                self.quote.update(symbol, ltp, ts)
+                if strategies is None or ts < built_at:
+                    continue
+                clock.set(ts)
+                self.engine.tick(self.rest, self.quote, _NoLive(), {symbol})
+            return self.broker.fills
+        finally:
+            Clock.use()
+
+    def _limit(self, ticks, start, stop):
+        """how far the clock may run while strategies wait for data"""
+        if stop is not None:
+            return stop
+        ends = [self.broker.last_close()]
+        if isinstance(ticks, (list, tuple)) and ticks:
+            ends.append(ticks[-1][0])
+        ends = [e for e in ends if e is not None]
+        # a day at most when nothing tells us where the data ends
+        return max(ends) if ends else start + 86400
+
+    def _create(self, params):
+        quotes = self.quote.get_quotes()
+        lst = []
+        for args in map(dict, params):
+            args.update(rm=RiskManager(self.broker), rest=self.rest, quote=self.quote)
+            if args["tradingsymbol"] in quotes:
+                args.setdefault("ltp", quotes[args["tradingsymbol"]])
+            lst.append(args)
+        strategies = self.strategies = create_strategies_from_params(lst) or []
+        now = Clock.now()
+        self.engine = Engine(now, now)
+        self.engine.add_strategy(strategies)
+        logging.info(f"replay: {len(strategies)} strategies from {now}")
+        return strategies
+
+
+def trade_list(fills, tz="Asia/Kolkata"):
+    """fills as (HH:MM:SS, symbol, side, quantity, price) rows"""
+    return [
+        (
+            pdlm.from_timestamp(f["time"], tz=tz).format("HH:mm:ss"),
+            f["symbol"],
+            f["side"],
+            f["quantity"],
+            f["price"],
+        )
+        for f in fills
+    ]
+
+
+def replay_candles(params, candles, start=None, stop=None):
+    """
+    replays one strategy over the broker minute candles of its option
+    params: strategy parameters, see Replay.run
+    start: defaults to the close of the first bar, so the low candle
+           the strategy asks for at creation is complete
+    returns (fills, replay)
+    """
+    replay = Replay()
+    replay.broker.add_candles(params["option_exchange"], params["option_token"], candles)
+    ticks = list(candle_ticks(params["tradingsymbol"], candles))
+    if not ticks:
+        return [], replay
+    start = ticks[0][0] + 60 if start is None else start
+    return replay.run([params], ticks, start, stop), replay
@@ -0,0 +1,43 @@
+from src.constants import logging_func
+
+from traceback import print_exc
+
+logging = logging_func(__name__)
+
+
+class MarketSnapshot:
+    """
+    Broker state captured once at the start of Engine.tick and shared
+    by every strategy for that tick.
+
+    positions and quotes are read eagerly unless a recent position book
+    is handed in, orders only when somebody asks for them. every broker
+    round-trip is counted in broker_calls so the cost of a tick stays
+    O(1) no matter how many strategies run.
+    """
+
+    def __init__(self, rest, quote, positions=None):
+        self._rest = rest
+        self.broker_calls = 0
+        self._orders = None
+        self.positions = (
+            self._fetch(rest.positions, default=[]) if positions is None else positions
+        )
+        # quotes come from the websocket cache, not a broker round-trip
+        self.quotes = quote.get_quotes()
+
+    def _fetch(self, func, default):
+        try:
+            self.broker_calls += 1
+            resp = func()
+            return default if resp is None else resp
+        except Exception as e:
+            logging.error(f"{e} while taking market snapshot")
+            print_exc()
+            return default
+
+    @property
+    def orders(self):
+        if self._orders is None:
+            self._orders = self._fetch(self._rest.orders, default=[{}])
+        return self._orders
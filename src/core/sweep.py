@@ -0,0 +1,175 @@
+from src.constants import logging_func, S_DATA
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from traceback import print_exc
+
+import pandas as pd
+import pendulum as pdlm
+
+from src.core.replay import replay_candles
+from src.sdk.intraday import normalize
+from src.sdk.ohlc_store import OhlcStore
+
+logging = logging_func(__name__)
+
+# strategies are stopped at these times unless a job says otherwise
+STOP_TIMES = {"MCX": {"hour": 23, "minute": 20}}
+DEFAULT_STOP = {"hour": 15, "minute": 20}
+
+PARAMS = ("target", "low_candle_time", "rest_time")
+
+
+def make_jobs(
+    instruments,
+    dates,
+    targets=("50%",),
+    low_candle_times=({"hour": 9, "minute": 14, "second": 59},),
+    rest_times=({"minutes": 1},),
+    strategy="ram",
+    quantity=1,
+):
+    """
+    one job per instrument, date and parameter combination
+    instruments: (exchange, tradingsymbol, token) tuples
+    dates: iso session dates such as 2025-09-18
+    """
+    return [
+        dict(
+            exchange=exchange,
+            tradingsymbol=symbol,
+            token=str(token),
+            date=date,
+            strategy=strategy,
+            quantity=quantity,
+            target=target,
+            low_candle_time=low_candle_time,
+            rest_time=rest_time,
+        )
+        for (exchange, symbol, token), date, target, low_candle_time, rest_time in product(
+            instruments, dates, targets, low_candle_times, rest_times
+        )
+    ]
+
+
+def _pnl(fills, last_price):
+    """realised plus open quantity marked at the last price"""
+    cash, qty = 0.0, 0
+    for f in fills:
+        sign = 1 if f["side"] == "BUY" else -1
+        cash -= sign * f["quantity"] * f["price"]
+        qty += sign * f["quantity"]
+    return cash + qty * last_price, qty
+
+
+def _has_bar_from(candles, date, at):
+    """True if a bar of the session starts at or after the time of day at"""
+    epochs, _ = normalize(candles)
+    since = pdlm.parse(date, tz="Asia/Kolkata").replace(**at).timestamp()
+    return bool(len(epochs)) and epochs[-1] >= since
+
+
+def run_job(job, root=S_DATA + "ohlc/"):
+    """replays one job from the candle store, returns its result row"""
+    row = {k: job[k] for k in ("exchange", "tradingsymbol", "date")}
+    row.update({k: str(job[k]) for k in PARAMS})
+    try:
+        session = OhlcStore(root).get(job["exchange"], job["token"], job["date"])
+        if session is None:
+            row["error"] = "no candles"
+            return row
+
+        candles = session["intraday"]
+        # the strategy would wait for this bar forever
+        if not _has_bar_from(candles, job["date"], job["low_candle_time"]):
+            row["error"] = f"no bar from {job['low_candle_time']}"
+            return row
+
+        params = dict(
+            tradingsymbol=job["tradingsymbol"],
+            strategy=job["strategy"],
+            stop_time=job.get("stop_time", STOP_TIMES.get(job["exchange"], DEFAULT_STOP)),
+            option_exchange=job["exchange"],
+            option_token=job["token"],
+            quantity=job["quantity"],
+            target=job["target"],
+            low_candle_time=job["low_candle_time"],
+            rest_time=job["rest_time"],
+        )
+        fills, _ = replay_candles(params, candles)
+        pnl, open_qty = _pnl(fills, float(session["daily"]["intc"]))
+        row.update(
+            entries=sum(1 for f in fills if f["side"] == "BUY"),
+            exits=sum(1 for f in fills if f["side"] == "SELL"),
+            open_qty=open_qty,
+            pnl=round(pnl, 2),
+        )
+    except Exception as e:
+        logging.error(f"{e} while replaying {row}")
+        print_exc()
+        row["error"] = str(e)
+    return row
+
+
+def sweep(jobs, root=S_DATA + "ohlc/", workers=4):
+    """
+    runs every job on a process pool, workers 0 runs them one after
+    another in this process. returns one row per job.
+    """
+    if workers <= 0:
+        return pd.DataFrame([run_job(job, root) for job in jobs])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = list(pool.map(run_job, jobs, [root] * len(jobs), chunksize=4))
+    return pd.DataFrame(rows)
+
+
+def summarize(results):
+    """totals per parameter combination, best pnl first"""
+    ok = results[results["pnl"].notna()] if "pnl" in results else results.iloc[0:0]
+    if ok.empty:
+        return pd.DataFrame()
+    return (
+        ok.groupby(list(PARAMS))
+        .agg(
+            days=("date", "nunique"),
+            runs=("pnl", "size"),
+            entries=("entries", "sum"),
+            exits=("exits", "sum"),
+            pnl=("pnl", "sum"),
+            worst=("pnl", "min"),
+        )
+        .sort_values("pnl", ascending=False)
+        .reset_index()
+    )
+
+
+def trading_dates(fm, to):
+    """weekdays from fm to to, both iso dates and inclusive"""
+    day, last = pdlm.parse(fm), pdlm.parse(to)
+    dates = []
+    while day <= last:
+        if day.day_of_week not in (pdlm.SATURDAY, pdlm.SUNDAY):
+            dates.append(day.to_date_string())
+        day = day.add(days=1)
+    return dates
+
+
+def cache_candles(api, instruments, dates, store=None):
+    """
+    downloads the minute candles of every (instrument, date) missing
+    from the store, so the workers never talk to the broker
+    """
+    store = store or OhlcStore()
+    for exchange, _, token in instruments:
+        have = set(store.dates(exchange, token))
+        for date in dates:
+            if date in have:
+                continue
+            day = pdlm.parse(date, tz="Asia/Kolkata")
+            data = api.historical(
+                exchange, str(token), day.timestamp(), day.end_of("day").timestamp()
+            )
+            if isinstance(data, list):
+                store.put_intraday(exchange, token, data)
+            else:
+                logging.warning(f"no candles for {exchange} {token} on {date}")
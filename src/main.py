@@ -2,6 +2,7 @@
 from src.constants import (
     logging_func,
     S_SETG,
+    S_DATA,
     TradeSet,
     yml_to_obj,
     get_symbol_fm_factory,
@@ -14,8 +15,11 @@ from src.core.strategy import create_strategies_from_params
 from src.core.engine import Engine
 from src.providers.risk_manager import RiskManager
 
-from toolkit.kokoo import is_time_past, blink, kill_tmux
+from src.providers.clock import Clock
+
+from toolkit.kokoo import blink, kill_tmux
 from traceback import print_exc
+from time import monotonic
 
 from rich.console import Console
 from rich.live import Live
@@ -58,7 +62,14 @@ def main():
         # read common start time and stop time
         O_SETG = yml_to_obj(S_SETG)
 
-        engine = Engine(O_SETG["start"], O_SETG["stop"])
+        engine = Engine(
+            O_SETG["start"],
+            O_SETG["stop"],
+            workers=O_SETG.get("workers", 0),
+            deadline=O_SETG.get("deadline", 1.0),
+            refresh=O_SETG.get("refresh", 0),
+        )
+        dispatch = O_SETG.get("dispatch", 0)
         engine.wait_until_start()
 
         builders = read_builders()
@@ -76,20 +87,33 @@ def main():
         with Live(
             Table(title="Initializing..."), console=console, refresh_per_second=4
         ) as live:
-            while not is_time_past(engine.stop):
+            while not Clock.is_past(engine.stop):
                 for builder in list(builders):
                     if builder.can_build():
+                        begin = monotonic()
                         data = stuff_atm(builder._data, builder._meta)
                         lst_of_params = stuff_tradingsymbols(data, builder._meta)
+                        logging.info(
+                            f"builder {builder._meta.get('strategy')} took "
+                            f"{monotonic() - begin:.2f}s"
+                        )
 
                         strategies = create_strategies_from_params(lst_of_params)
                         engine.add_strategy(strategies)
 
                         builders.remove(builder)
 
-                engine.tick(rest, quote, live)
-                blink()
+                if dispatch:
+                    # wake only when the websocket delivers a new price
+                    changed = quote.wait_for_updates(timeout=1.0)
+                    engine.tick(rest, quote, live, changed)
+                else:
+                    engine.tick(rest, quote, live)
+                    blink()
             else:
+                engine.shutdown(latency_file=S_DATA + "latency.json")
+                if Helper._recorder:
+                    Helper._recorder.close()
                 logging.info(
                     f"main: killing tmux because we started after stop time {engine.stop}"
                 )
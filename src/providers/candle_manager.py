@@ -1,62 +1,146 @@
+import threading
+
+import numpy as np
 import pandas as pd
-import pendulum as pdlm
+
+from src.providers.clock import Clock
+
+# columns of a bar row
+START, OPEN, HIGH, LOW, CLOSE = range(5)
+FIELDS = ("start", "open", "high", "low", "close")
+
+
+class CandleRing:
+    """
+    fixed capacity ring of (start, open, high, low, close) bars for one
+    timeframe. the newest row is the bar still forming, every tick only
+    writes into preallocated floats.
+
+    every bar is written twice, at slot and slot + capacity, so the
+    newest n bars are always one contiguous block and last(n) is a
+    slice of the buffer instead of a copy. views are live, a later tick
+    shows through them.
+    """
+
+    def __init__(self, seconds, capacity=11):
+        self.seconds = seconds
+        self.capacity = capacity
+        self._buf = np.zeros((2 * capacity, len(FIELDS)), dtype=np.float64)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total(self):
+        """bars opened since start, keeps counting after old bars drop out"""
+        return self._count
+
+    def _write(self, slot, start, price):
+        for i in (slot, slot + self.capacity):
+            row = self._buf[i]
+            if start is not None:
+                row[START] = start
+                row[OPEN] = row[HIGH] = row[LOW] = row[CLOSE] = price
+                continue
+            row[CLOSE] = price
+            if price > row[HIGH]:
+                row[HIGH] = price
+            if price < row[LOW]:
+                row[LOW] = price
+
+    def update(self, ts, price):
+        """folds a tick into its bar, returns True when a new bar opened"""
+        start = ts - ts % self.seconds
+        if self._count:
+            slot = (self._count - 1) % self.capacity
+            # late ticks of an older bar still move the forming bar
+            if start <= self._buf[slot, START]:
+                self._write(slot, None, price)
+                return False
+        self._write(self._count % self.capacity, start, price)
+        self._count += 1
+        return True
+
+    def last(self, n):
+        """view of the newest n bars, oldest first, without copying"""
+        n = min(n, len(self))
+        end = (self._count - 1) % self.capacity + self.capacity + 1
+        return self._buf[end - n : end]
+
+    def rows(self):
+        """bars oldest first, the last one still forming"""
+        return self.last(self.capacity)
+
+    def __getitem__(self, i):
+        """one bar as a row view, negative indexes count from the newest"""
+        size = len(self)
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError("candle index out of range")
+        return self._buf[(self._count - size + i) % self.capacity + self.capacity]
+
+    def __iter__(self):
+        return iter(self.rows())
 
 
 class CandleManager:
-    def __init__(self, timeframe_minutes=1):
+    def __init__(self, timeframe_minutes=1, timeframes=(), capacity=11, clock=Clock.time):
+        """
+        timeframe_minutes: bars returned by get_candles and transform
+        timeframes: more bar sizes in minutes built from the same ticks
+        clock: epoch seconds used when a tick carries no exchange time
+        """
         self.tf = timeframe_minutes
-        self._completed = []  # Completed candles
-        self._current = None
-        self._tick_counter = 0
-        
-    def add_tick(self, price):
-        """Incrementally track candles - O(1) operation."""
-        self._tick_counter += 1
-        now = pdlm.now("Asia/Kolkata").add(microseconds=self._tick_counter)
-        current_min = now.start_of("minute")
-        
-        if self._current is None:
-            self._current = {"open": price, "high": price, "low": price, "close": price, "minute": current_min}
-            return
-        
-        if current_min != self._current["minute"]:
-            self._completed.append(self._current)
-            if len(self._completed) > 10:  # Store more for safety
-                self._completed.pop(0)
-            self._current = {"open": price, "high": price, "low": price, "close": price, "minute": current_min}
-            return
-        
-        self._current["close"] = price
-        self._current["high"] = max(self._current["high"], price)
-        self._current["low"] = min(self._current["low"], price)
-    
-    def transform(self):
+        self._clock = clock
+        self._rings = {
+            minutes: CandleRing(minutes * 60, capacity)
+            for minutes in dict.fromkeys((timeframe_minutes, *timeframes))
+        }
+        self._lock = threading.Lock()
+
+    def add_tick(self, price, ts=None):
+        """
+        folds one tick into every timeframe, O(1) per timeframe
+        ts: exchange timestamp in epoch seconds, defaults to the clock
+        """
+        ts = self._clock() if ts is None else ts
+        with self._lock:
+            for ring in self._rings.values():
+                ring.update(ts, price)
+
+    def ring(self, minutes=None):
+        return self._rings[self.tf if minutes is None else minutes]
+
+    def last(self, n, minutes=None):
+        """live view of the newest n bars, see CandleRing.last"""
+        return self.ring(minutes).last(n)
+
+    def transform(self, minutes=None):
         """Returns candles as DataFrame (for compatibility)."""
-        candles = self._completed.copy()
-        if self._current:
-            candles.append(self._current)
-        
-        if not candles:
+        with self._lock:
+            rows = self.ring(minutes).rows().copy()
+        if not len(rows):
             return pd.DataFrame()
-        
-        n = len(candles)
-        base = pdlm.now("Asia/Kolkata").start_of("minute")
-        dts = [base.subtract(minutes=n-1-i) for i in range(n)]
-        
-        df = pd.DataFrame(candles)
-        df["dt"] = dts
-        return df[["dt", "open", "high", "low", "close"]]
-    
-    def get_candles(self):
-        """Returns list of candles as dicts - direct access without DataFrame."""
-        candles = self._completed.copy()
-        if self._current:
-            candles.append(self._current)
-        return candles
-    
+
+        df = pd.DataFrame(rows[:, OPEN:], columns=FIELDS[OPEN:])
+        df.insert(
+            0,
+            "dt",
+            pd.to_datetime(rows[:, START], unit="s", utc=True).tz_convert("Asia/Kolkata"),
+        )
+        return df
+
+    def get_candles(self, minutes=None):
+        """Returns list of candles as dicts, oldest first."""
+        with self._lock:
+            rows = self.ring(minutes).rows().tolist()
+        return [
+            {"open": o, "high": h, "low": low, "close": c, "minute": int(s)}
+            for s, o, h, low, c in rows
+        ]
+
     def __len__(self):
         """Returns count of available candles."""
-        count = len(self._completed)
-        if self._current:
-            count += 1
-        return count
\ No newline at end of file
+        return len(self.ring())
@@ -0,0 +1,106 @@
+import threading
+import time as _time
+
+import pendulum as pdlm
+
+TZ = "Asia/Kolkata"
+
+
+class SimClock:
+    """
+    simulated time source for replays, starts at an epoch and only
+    moves when told to. sleep() advances it instead of blocking and
+    raises TimeoutError once it passes limit, so a wait for something
+    that never comes cannot spin forever.
+    """
+
+    def __init__(self, start=0.0, limit=None):
+        self._now = float(start)
+        self.limit = limit
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self._now
+
+    def set(self, ts):
+        with self._lock:
+            self._now = float(ts)
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += seconds
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+        if self.limit is not None and self._now > self.limit:
+            self.exhausted = True
+            raise TimeoutError(f"simulated time passed {self.limit}")
+
+
+class Clock:
+    """
+    the one place that asks what time it is. Engine.tick freezes it so
+    every strategy in a tick shares one timestamp and one tz aware now,
+    use() swaps the wall clock for a SimClock to replay a session.
+    """
+
+    _source = _time.time
+    _frozen = None
+    _now = None
+
+    @classmethod
+    def use(cls, source=None):
+        """epoch seconds source, None goes back to the wall clock"""
+        cls._source = source or _time.time
+        cls._frozen = cls._now = None
+
+    @classmethod
+    def freeze(cls):
+        """pins time() and now() till thaw, returns the pinned epoch"""
+        cls._now = None
+        cls._frozen = cls._source()
+        return cls._frozen
+
+    @classmethod
+    def thaw(cls):
+        cls._frozen = cls._now = None
+
+    @classmethod
+    def live(cls):
+        """epoch seconds from the source, ignoring any freeze"""
+        return cls._source()
+
+    @classmethod
+    def time(cls):
+        frozen = cls._frozen
+        return cls._source() if frozen is None else frozen
+
+    @classmethod
+    def now(cls):
+        """tz aware now, built once per frozen tick"""
+        frozen = cls._frozen
+        if frozen is None:
+            return pdlm.from_timestamp(cls._source(), tz=TZ)
+        now = cls._now
+        if now is None or now.timestamp() != frozen:
+            now = cls._now = pdlm.from_timestamp(frozen, tz=TZ)
+        return now
+
+    @classmethod
+    def sleep(cls, seconds):
+        sleep = getattr(cls._source, "sleep", _time.sleep)
+        sleep(seconds)
+
+    @classmethod
+    def is_past(cls, at):
+        """
+        at: "HH:MM[:SS]" or a dict of hour, minute, second of today,
+            or a datetime
+        """
+        now = cls.now()
+        if isinstance(at, str):
+            at = dict(zip(("hour", "minute", "second"), map(int, at.split(":"))))
+        if isinstance(at, dict):
+            at = now.replace(**{"second": 0, "microsecond": 0, **at})
+        return now >= at
@@ -76,9 +76,12 @@ class Grid:
         log.info(f"Grid running: for {exchange} {tradingsymbol}")
         try:
             if cls.grid.get(tradingsymbol, None) is None:
-                symbol_constant = rst.daily(
-                    exchange=exchange, tradingsymbol=tradingsymbol
-                )
+                # already on disk from an earlier run today
+                symbol_constant = rst.stored_ohlc(exchange=exchange, token=token)
+                if symbol_constant is None:
+                    symbol_constant = rst.daily(
+                        exchange=exchange, tradingsymbol=tradingsymbol, token=token
+                    )
                 if symbol_constant is None:
                     symbol_constant = rst.yesterday(exchange=exchange, token=token)
                 log.info(f"OHLC: {symbol_constant}")
@@ -0,0 +1,161 @@
+from src.constants import logging_func
+
+import threading
+from json import dump
+from math import log2
+from time import perf_counter_ns
+
+logging = logging_func(__name__)
+
+# 4 buckets per doubling, enough to tell 1ms from 1.2ms
+SUB_BUCKETS = 4
+N_BUCKETS = 64 * SUB_BUCKETS
+
+
+class Histogram:
+    """
+    log bucketed histogram of nanosecond durations
+
+    record() takes no lock, counters are plain ints bumped under the GIL.
+    each (label, stage) is normally written from a single thread, so a
+    lost increment is rare and harmless for monitoring purposes.
+    """
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.max = 0
+
+    def record(self, ns):
+        idx = int(log2(ns) * SUB_BUCKETS) if ns > 1 else 0
+        self.counts[min(idx, N_BUCKETS - 1)] += 1
+        self.count += 1
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, pct):
+        """upper bound of the bucket holding the pct-th value, in ns"""
+        if not self.count:
+            return 0
+        rank = self.count * pct / 100
+        seen = 0
+        for idx, cnt in enumerate(self.counts):
+            seen += cnt
+            if cnt and seen >= rank:
+                return min(2 ** ((idx + 1) / SUB_BUCKETS), self.max)
+        return self.max
+
+    def summary(self):
+        """p50, p99 and max in milliseconds"""
+        return {
+            "count": self.count,
+            "p50": round(self.percentile(50) / 1e6, 3),
+            "p99": round(self.percentile(99) / 1e6, 3),
+            "max": round(self.max / 1e6, 3),
+        }
+
+
+class Latency:
+    """
+    tick to decision latency, measured from the websocket callback
+
+    Wserver stamps when a quote for a key arrives, a strategy calls begin()
+    when it starts evaluating that key and later stages call mark(). every
+    stage is recorded twice, once under the strategy and once under the
+    symbol, so both "is ram slow" and "is this strike slow" can be asked.
+    """
+
+    _received = {}
+    _last_received = 0
+    # (strategy, key) -> arrival stamp of the quote last traced
+    _evaluated = {}
+    _by_strategy = {}
+    _by_symbol = {}
+    _ctx = threading.local()
+
+    @classmethod
+    def received(cls, key):
+        now = perf_counter_ns()
+        cls._received[key] = now
+        cls._last_received = now
+
+    @classmethod
+    def ticked(cls):
+        """records how long the engine took to pick up the newest quote"""
+        if cls._last_received:
+            hist = cls._by_strategy.get(("engine", "tick"))
+            if hist is None:
+                hist = cls._by_strategy.setdefault(("engine", "tick"), Histogram())
+            hist.record(perf_counter_ns() - cls._last_received)
+
+    @classmethod
+    def _record(cls, strategy, symbol, stage, ns):
+        for book, label in ((cls._by_strategy, strategy), (cls._by_symbol, symbol)):
+            hist = book.get((label, stage))
+            if hist is None:
+                hist = book.setdefault((label, stage), Histogram())
+            hist.record(ns)
+
+    @classmethod
+    def begin(cls, strategy, symbol, key):
+        """
+        opens a trace on the current thread for this strategy run and
+        records how long the quote waited to be evaluated. a run against
+        a quote this strategy already evaluated, as happens when polling,
+        is not traced.
+        """
+        now = perf_counter_ns()
+        origin = cls._received.get(key)
+        if origin is None or cls._evaluated.get((strategy, key)) == origin:
+            cls._ctx.trace = None
+            return
+        cls._evaluated[(strategy, key)] = origin
+        cls._ctx.trace = (strategy, symbol, origin)
+        cls._record(strategy, symbol, "run", now - origin)
+
+    @classmethod
+    def mark(cls, stage):
+        """records the time from quote arrival to this stage, if traced"""
+        trace = getattr(cls._ctx, "trace", None)
+        if trace is None:
+            return
+        strategy, symbol, origin = trace
+        cls._record(strategy, symbol, stage, perf_counter_ns() - origin)
+
+    @classmethod
+    def end(cls):
+        """records the total time for this run and closes the trace"""
+        cls.mark("done")
+        cls._ctx.trace = None
+
+    @classmethod
+    def summary(cls):
+        def nest(book):
+            out = {}
+            for (label, stage), hist in list(book.items()):
+                out.setdefault(label, {})[stage] = hist.summary()
+            return out
+
+        return {
+            "strategy": nest(cls._by_strategy),
+            "symbol": nest(cls._by_symbol),
+        }
+
+    @classmethod
+    def dump(cls, filepath=None):
+        summary = cls.summary()
+        for kind, labels in summary.items():
+            for label, stages in labels.items():
+                for stage, stats in stages.items():
+                    logging.info(f"LATENCY {kind} {label} {stage}: {stats}")
+        if filepath:
+            with open(filepath, "w") as f:
+                dump(summary, f, indent=2)
+
+    @classmethod
+    def reset(cls):
+        cls._received.clear()
+        cls._evaluated.clear()
+        cls._last_received = 0
+        cls._by_strategy.clear()
+        cls._by_symbol.clear()
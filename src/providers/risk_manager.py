@@ -3,6 +3,7 @@ import threading
 from traceback import print_exc
 from typing import Optional
 from src.config.interface import Position
+from src.providers.latency import Latency
 
 
 class RiskManager:
@@ -20,7 +21,8 @@ class RiskManager:
     @positions.setter
     def positions(self, position_book):
         """Convert dict-based position book to Position objects."""
-        self._positions = []
+        # build aside and swap in one go, strategies may read from other threads
+        positions = []
         for p in position_book:
             if isinstance(p, dict):
                 # Convert dict to Position object
@@ -36,10 +38,11 @@ class RiskManager:
                     pos.id = p["id"]
                 else:
                     pos.id = p.get("symbol", "")
-                self._positions.append(pos)
+                positions.append(pos)
             else:
                 # Already a Position object
-                self._positions.append(p)
+                positions.append(p)
+        self._positions = positions
 
     def _get_pos_from_api(self, symbol: str):
         """Fetches real-time net quantity from the broker."""
@@ -82,6 +85,7 @@ class RiskManager:
         tag="no_tag",
     ) -> Optional[int]:
         """Executes entry and creates/updates tracking."""
+        Latency.mark("decision")
         with self._lock:
             try:
                 self.tag = tag
@@ -100,6 +104,7 @@ class RiskManager:
                     tag=self.tag,
                     product="NRML" if exchange == "MCX" else "MIS",
                 )
+                Latency.mark("order")
                 logging.info(f"RM: Buy Order #{order_no} for {symbol} @{entry_price}")
 
                 # 2. Get actual total quantity from Broker
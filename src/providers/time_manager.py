@@ -1,35 +1,88 @@
+import threading
+
 import pendulum as pdlm
 
+from src.providers.clock import Clock
+
+
+class CandleCalendar:
+    """
+    candle close times of one session as epoch seconds. calendars are
+    shared per (date, open, close, interval), strategies on the same
+    session and interval reuse one list instead of building their own.
+    """
+
+    _shared = {}
+    _lock = threading.Lock()
+
+    def __init__(self, open_ts, close_ts, step):
+        self.open = open_ts
+        self.close = close_ts
+        self.step = step
+        closes = list(range(open_ts + step, close_ts + 1, step))
+        # an interval crossing market close ends at market close
+        if open_ts < close_ts and (not closes or closes[-1] < close_ts):
+            closes.append(close_ts)
+        self.closes = closes
+
+    @classmethod
+    def get(cls, day, rest_time, open_at=(9, 0), close_at=(23, 55)):
+        """calendar of the session on day (a pendulum date) in IST"""
+        step = int(pdlm.duration(**rest_time).total_seconds())
+        key = (day.isoformat(), open_at, close_at, step)
+        with cls._lock:
+            calendar = cls._shared.get(key)
+            if calendar is None:
+                start = pdlm.datetime(day.year, day.month, day.day, tz="Asia/Kolkata")
+                calendar = cls._shared[key] = cls(
+                    start.at(*open_at).int_timestamp,
+                    start.at(*close_at).int_timestamp,
+                    step,
+                )
+        return calendar
+
+    def __len__(self):
+        return len(self.closes)
+
+    def index(self, ts):
+        """index of the last candle closed at ts, -1 before the first close"""
+        if not self.closes or ts < self.closes[0]:
+            return -1
+        if ts >= self.closes[-1]:
+            return len(self.closes) - 1
+        return int((ts - self.open) // self.step) - 1
+
+    def close_of(self, ts):
+        """close time of the candle ts falls in, None outside the session"""
+        if ts < self.open or not self.closes or ts > self.closes[-1]:
+            return None
+        if ts == self.closes[-1]:
+            return ts
+        return self.closes[self.index(ts) + 1]
+
+
+def _epoch(value):
+    return value.timestamp() if hasattr(value, "timestamp") else value
 
-class TimeManager:
-    def __init__(self, rest_time: dict):
-        self.last_trade_time = None
-        self.market_open = pdlm.today("Asia/Kolkata").at(9, 0, 0)
-        self.market_close = pdlm.today("Asia/Kolkata").at(23, 55, 0)
-        self.candle_times = self._generate_candle_times(rest_time)
 
-    def _generate_candle_times(self, rest_time):
+class TimeManager:
+    def __init__(self, rest_time: dict, clock=Clock.time):
         """
-        Generate a list of 1-minute candle close times from market open to close.
-        e.g., if rest_min=1, market_open=9:00, market_close=9:05
-        times = [9:01, 9:02, 9:03, 9:04, 9:05]
+        rest_time: candle interval as pendulum duration keywords
+        clock: epoch seconds, swap it to replay a session
         """
-        times = []
-        current_time = self.market_open
-        while current_time < self.market_close:
-            next_close_time = current_time.add(**rest_time)
-            # Ensure we don't go past market close if the last interval overlaps
-            if next_close_time <= self.market_close:
-                times.append(next_close_time)
-            else:
-                # If the next interval would cross market_close, include market_close itself as the last point
-                if (
-                    current_time < self.market_close
-                ):  # Only if there's still time left in the market
-                    times.append(self.market_close)
-                break  # Stop generating beyond market close
-            current_time = next_close_time
-        return times
+        self.last_trade_time = None
+        self._clock = clock
+        today = pdlm.from_timestamp(clock(), tz="Asia/Kolkata").date()
+        self.calendar = CandleCalendar.get(today, rest_time)
+        self.market_open = pdlm.from_timestamp(self.calendar.open, tz="Asia/Kolkata")
+        self.market_close = pdlm.from_timestamp(self.calendar.close, tz="Asia/Kolkata")
+
+    @property
+    def candle_times(self):
+        return [
+            pdlm.from_timestamp(ts, tz="Asia/Kolkata") for ts in self.calendar.closes
+        ]
 
     def set_last_trade_time(self, trade_time):
         self.last_trade_time = trade_time
@@ -43,48 +96,13 @@ class TimeManager:
         if self.last_trade_time is None:
             return True  # No previous trade, so a trade can be made
 
-        # Find the candle close time corresponding to the last_trade_time
-        target_candle_close = None
-
-        # Check if last_trade_time is within the first interval [market_open, self.candle_times[0])
-        if (
-            self.last_trade_time >= self.market_open
-            and self.last_trade_time < self.candle_times[0]
-        ):
-            target_candle_close = self.candle_times[0]
-        else:
-            # Iterate through the candle_times to find which interval last_trade_time falls into
-            # For subsequent intervals [self.candle_times[i-1], self.candle_times[i])
-            for i in range(1, len(self.candle_times)):
-                if (
-                    self.candle_times[i - 1]
-                    <= self.last_trade_time
-                    < self.candle_times[i]
-                ):
-                    target_candle_close = self.candle_times[i]
-                    break
-            # Handle the case where last_trade_time is exactly the last candle close (e.g., market close itself)
-            if (
-                target_candle_close is None
-                and len(self.candle_times) > 0
-                and self.last_trade_time == self.candle_times[-1]
-            ):
-                target_candle_close = self.candle_times[-1]
-
-        now = pdlm.now("Asia/Kolkata")
-
+        # close of the candle the last trade was taken in, no trade is
+        # allowed when it was outside the session
+        target_candle_close = self.calendar.close_of(_epoch(self.last_trade_time))
         if target_candle_close is None:
-            # This means last_trade_time was outside any defined valid interval,
-            # either before market_open or after the market_close.
-            # In such cases, no trade should be allowed based on this last_trade_time,
-            # or it indicates the trading day is over relative to that last trade.
-            return False
-        elif now > target_candle_close:
-            # The "rest_min" period for that trade has elapsed
-            return True
-        else:
-            # The "rest_min" period has not yet elapsed
             return False
+        # The "rest_min" period for that trade has elapsed
+        return self._clock() > target_candle_close
 
     @property
     def current_index(self):
@@ -92,15 +110,7 @@ class TimeManager:
         Returns the index of the last completed candle.
         Returns -1 if the market hasn't reached the first candle close.
         """
-        now = pdlm.now("Asia/Kolkata")
-        # Find the highest index where candle_time <= now
-        idx = -1
-        for i, candle_time in enumerate(self.candle_times):
-            if now >= candle_time:
-                idx = i
-            else:
-                break
-        return idx
+        return self.calendar.index(self._clock())
 
 
 class Gate:
@@ -108,10 +118,10 @@ class Gate:
 
     def __init__(self, interval: dict):
         self.interval = interval
-        self._next_time = pdlm.now("Asia/Kolkata")
+        self._next_time = Clock.now()
 
     def allow(self) -> bool:
-        now = pdlm.now()
+        now = Clock.now()
         if now >= self._next_time:
             self._next_time = now.add(**self.interval)
             return True
@@ -129,14 +139,14 @@ class Bucket:
         self.reset()
 
     def reset(self):
-        now = pdlm.now("Asia/Kolkata")
+        now = Clock.now()
         # Ensure the bucket_end calculation handles the 'period' dict correctly
         self.bucket_end = now.add(**self.period)
         self.count = 0
 
     def can_allow(self) -> bool:
         """Checks if a trade can occur WITHOUT consuming a count."""
-        now = pdlm.now("Asia/Kolkata")
+        now = Clock.now()
 
         # Check for expiry first and reset if necessary
         if now >= self.bucket_end:
@@ -165,11 +175,11 @@ class SimpleBucket:
         """
         set next time of trade
         """
-        now = pdlm.now("Asia/Kolkata")
+        now = Clock.now()
         self._next_bucket = now.add(**self._bucket_time)
 
     def is_bucket(self):
-        if self._next_bucket and pdlm.now("Asia/Kolkata") > self._next_bucket:
+        if self._next_bucket and Clock.now() > self._next_bucket:
             return True
         return False
 
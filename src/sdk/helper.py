@@ -1,14 +1,26 @@
 from src.constants import logging_func, S_SETG, S_DATA, yml_to_obj
 from src.sdk.wserver import Wserver
+from src.sdk.ticks import TS
+from src.sdk.intraday import (
+    OHLCV,
+    IntradayHistory,
+    aggregate,
+    columns,
+    normalize,
+)
+from src.sdk.ohlc_store import OhlcStore
+from src.providers.clock import Clock
+from src.sdk.recorder import TickRecorder
 
 import pendulum as pdlm
-from toolkit.kokoo import blink, timer
 import pandas as pd
+import numpy as np
 from importlib import import_module
+import threading
+from concurrent.futures import wait
 from traceback import print_exc
 
-from json import dumps, loads
-from pprint import pprint
+from json import loads
 
 logging = logging_func(__name__)
 
@@ -17,74 +29,98 @@ def df_to_csv(df, csv_file, is_index=False):
     df.to_csv(S_DATA + csv_file, index=is_index)
 
 
+def _bar_records(buckets, cols, timeframe, tz):
+    """plain python dicts, one per bar, in the column order of OHLCV"""
+    local = pd.to_datetime(buckets, unit="s", utc=True).tz_convert(tz)
+    dates = local.strftime("%Y-%m-%d")
+    times = local.strftime("%d-%m-%Y %H:%M:%S")
+    names = [name for name in OHLCV if name in cols]
+    lists = [cols[name].tolist() for name in names]
+    records = []
+    for i in range(len(buckets)):
+        record = {name: values[i] for name, values in zip(names, lists)}
+        record["date"] = dates[i]
+        if timeframe != "1D":
+            record["time"] = times[i]
+        records.append(record)
+    return records
+
+
 def compress_candles(
-    data_now, tz="Asia/Kolkata", return_last_only=True, exclude_today=True
+    data_now,
+    tz="Asia/Kolkata",
+    return_last_only=True,
+    exclude_today=True,
+    timeframe="1D",
 ):
     """
-    Compress intraday data (list of dicts) into daily OHLC (+ optional volume and oi).
+    Compress intraday data (list of dicts) into OHLC bars of timeframe
+    (+ optional volume and oi), daily by default.
     Requires a 'time' column. If it's missing, function will fail.
+    returns the last bar, or every bar when return_last_only is False
     """
     if not data_now:
         return None
 
-    df = pd.DataFrame(data_now)
-
-    # --- require time column ---
-    if "time" not in df.columns:
+    if "time" not in data_now[0]:
         raise ValueError("No 'time' column found in data")
 
-    # parse 'time' as tz-aware datetime
-    s = pd.to_datetime(df["time"], dayfirst=True, errors="raise")
-    s = s.dt.tz_localize(tz, nonexistent="raise", ambiguous="raise")
-    df.index = s
-    df.index.name = "time"
-
-    # --- numeric conversion ---
-    numeric_cols = ["into", "inth", "intl", "intc", "v", "oi"]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    epochs, rows = normalize(data_now, tz)
+    if not rows:
+        return None
+    cols = columns(rows)
 
     # exclude today’s partial data if requested
     if exclude_today:
-        today_local = pd.Timestamp.now(tz=tz).date()
-        df = df[df.index.date != today_local]
-        if df.empty:
-            return None
+        today = pd.Timestamp.now(tz=tz).normalize()
+        keep = epochs < int(today.timestamp())
+        epochs = epochs[keep]
+        cols = {name: values[keep] for name, values in cols.items()}
 
-    # aggregate to daily OHLC (+ optional v, oi)
-    agg = {}
-    if "into" in df.columns:
-        agg["into"] = "first"  # open
-    if "inth" in df.columns:
-        agg["inth"] = "max"  # high
-    if "intl" in df.columns:
-        agg["intl"] = "min"  # low
-    if "intc" in df.columns:
-        agg["intc"] = "last"  # close
-    if "v" in df.columns:
-        agg["v"] = "sum"  # volume
-    if "oi" in df.columns:
-        agg["oi"] = "last"  # open interest
-
-    daily = df.resample("1D").agg(agg)
+    _, buckets, bars = aggregate(epochs, cols, timeframe, tz)
 
     # drop incomplete rows (no close)
-    if "intc" in daily.columns:
-        daily = daily.dropna(subset=["intc"])
+    if "intc" in bars:
+        complete = ~np.isnan(bars["intc"])
+        buckets = buckets[complete]
+        bars = {name: values[complete] for name, values in bars.items()}
 
-    if daily.empty:
+    if not len(buckets):
         return None
 
-    if return_last_only:
-        daily = daily.tail(1)
+    records = _bar_records(buckets, bars, timeframe, tz)
+    return records[-1] if return_last_only else records
 
-    out = daily.reset_index()
-    out["date"] = out["time"].dt.strftime("%Y-%m-%d")
-    out = out.drop(columns=["time"])
 
-    # ensure plain python types
-    return loads(dumps(out.to_dict(orient="records"), default=str))[0]
+def compress_many(data_by_symbol, timeframe="1D", tz="Asia/Kolkata"):
+    """
+    {symbol: broker candles} to {symbol: [bars]} in a single aggregation
+    pass over all symbols, bars as returned by compress_candles
+    """
+    symbols, epochs, parts = [], [], []
+    for code, (symbol, data) in enumerate(data_by_symbol.items()):
+        sym_epochs, rows = normalize(data or [], tz)
+        symbols.append(symbol)
+        if rows:
+            epochs.append(sym_epochs)
+            parts.append((code, columns(rows)))
+
+    result = {symbol: [] for symbol in symbols}
+    if not parts:
+        return result
+
+    names = [n for n in OHLCV if all(n in cols for _, cols in parts)]
+    groups = np.concatenate(
+        [np.full(len(e), code, dtype=np.int64) for e, (code, _) in zip(epochs, parts)]
+    )
+    cols = {n: np.concatenate([c[n] for _, c in parts]) for n in names}
+    groups, buckets, bars = aggregate(np.concatenate(epochs), cols, timeframe, tz, groups)
+
+    bounds = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1], True])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        sliced = {n: values[lo:hi] for n, values in bars.items()}
+        result[symbols[groups[lo]]] = _bar_records(buckets[lo:hi], sliced, timeframe, tz)
+    return result
 
 
 def get_broker(cnfg):
@@ -140,9 +176,11 @@ def login():
 def is_not_rate_limited(func):
     # Decorator to enforce a 1-second delay between calls
     def wrapper(*args, **kwargs):
-        while pdlm.now() < Helper.wait_till:
-            blink()
-        Helper.wait_till = pdlm.now().add(seconds=1)
+        # live time, a tick frozen clock would never move past wait_till
+        wait = Helper.wait_till - Clock.live()
+        if wait > 0:
+            Clock.sleep(wait)
+        Helper.wait_till = Clock.live() + 1
         return func(*args, **kwargs)
 
     return wrapper
@@ -150,23 +188,68 @@ def is_not_rate_limited(func):
 
 class QuoteApi:
     subscribed = {}
+    # reverse lookup of subscribed, ws key -> symbol
+    _symbols_by_key = {}
+    # symbol -> number of strategies holding it, absent or 0 means idle
+    _refs = {}
+    # guards the subscription maps and the quotes built from them, the
+    # builder subscribes and reads quotes from several threads at once
+    _lock = threading.RLock()
 
     def __init__(self, ws):
         self._ws = ws
+        # {symbol: ltp} patched in place from the versioned quote store
+        self._quotes = {}
+        self._version = 0
+
+    def wait_for_updates(self, timeout=1.0):
+        """
+        blocks till the websocket reports a new quote or timeout expires
+        returns the set of subscribed symbols whose price changed
+        """
+        keys = self._ws.dispatch.wait(timeout)
+        return {
+            self._symbols_by_key[key] for key in keys if key in self._symbols_by_key
+        }
 
-    def get_quotes(self):
+    def get_quotes(self, copy=False):
+        """
+        returns {symbol: ltp} for every subscribed symbol. only the keys
+        the websocket updated since the previous call are touched, the
+        dict is shared between calls and must be treated as read only.
+        stale symbols are left out of the returned dict. pass copy=True
+        to iterate it while other threads may subscribe.
+        """
         try:
-            quote = {}
-            ltps = self._ws.ltp
-            quote = {
-                symbol: ltps.get(values["key"])
-                for symbol, values in self.subscribed.items()
-            }
+            with self._lock:
+                self._version, changed = self._ws.quotes.changes_since(self._version)
+                for key, ltp in changed.items():
+                    symbol = self._symbols_by_key.get(key)
+                    if symbol is not None:
+                        self._quotes[symbol] = ltp
+                # frozen prices are hidden so strategies do not trade on them
+                if not self._ws.socket_opened:
+                    return {}
+                stale = self._ws.stale_keys()
+                if stale:
+                    hidden = {self._symbols_by_key.get(key) for key in stale}
+                    return {
+                        symbol: ltp
+                        for symbol, ltp in self._quotes.items()
+                        if symbol not in hidden
+                    }
+                return dict(self._quotes) if copy else self._quotes
         except Exception as e:
             logging.error(f"{e} while getting quote")
             print_exc()
-        finally:
-            return quote
+        return self._quotes
+
+    def tick_time(self, symbol):
+        """exchange time in epoch seconds of the symbol's latest tick"""
+        info = self.subscribed.get(symbol)
+        ring = self._ws.ticks.get(info["key"]) if info else None
+        row = ring.latest() if ring is not None else None
+        return None if row is None else row[TS]
 
     def _subscribe_till_ltp(self, ws_key, max_retries=5):
         try:
@@ -175,10 +258,10 @@ class QuoteApi:
 
             while ltp is None and attempts < max_retries:
                 attempts += 1
-                self._ws.subscribe([ws_key])
-                # Small blink to wait for socket buffer
-                timer(0.2)
-                ltp = self._ws.ltp.get(ws_key)
+                future = self._ws.subscribe_many([ws_key])[ws_key]
+                # wakes as soon as the first quote lands
+                done, _ = wait([future], timeout=0.2)
+                ltp = future.result() if done else self._ws.ltp.get(ws_key)
                 print(f"Attempt {attempts}: quote for {ws_key} -> {ltp}")
 
             # Final check: if still None after 5 tries, return 0.0
@@ -187,6 +270,17 @@ class QuoteApi:
             logging.error(f"LTP fetch error: {e}")
             return 0.0
 
+    def _add_subscription(self, symbol, key, token, ltp_val):
+        with self._lock:
+            self.subscribed[symbol] = {
+                "symbol": symbol,
+                "key": key,
+                "token": token,
+                "ltp": ltp_val,
+            }
+            self._symbols_by_key[key] = symbol
+            self._quotes[symbol] = self._ws.ltp.get(key)
+
     def symbol_info(self, exchange, symbol, token=None):
         try:
             # 1. Exit if no token and API fails to provide one
@@ -209,12 +303,7 @@ class QuoteApi:
                         f"Helper: Could not get WS quote for {key}. Skipping."
                     )
 
-                self.subscribed[symbol] = {
-                    "symbol": symbol,
-                    "key": key,
-                    "token": token,
-                    "ltp": ltp_val,
-                }
+                self._add_subscription(symbol, key, token, ltp_val)
 
             return self.subscribed[symbol]
 
@@ -222,16 +311,98 @@ class QuoteApi:
             logging.error(f"Error in symbol_info for {symbol}: {e}")
             return None
 
+    def subscribe_many(self, symbols_by_key, timeout=1.0):
+        """
+        symbols_by_key: {"NFO|12345": "NIFTY...CE"} as in fno_tokens
+        subscribes every new key in one frame and waits at most timeout
+        for all of their first quotes together. returns {symbol: info}
+        """
+        try:
+            pending = {
+                key: symbol
+                for key, symbol in symbols_by_key.items()
+                if symbol not in self.subscribed
+            }
+            if pending:
+                futures = self._ws.subscribe_many(list(pending))
+                wait(futures.values(), timeout=timeout)
+                for key, symbol in pending.items():
+                    future = futures[key]
+                    ltp_val = float(future.result()) if future.done() else 0.0
+                    if not ltp_val:
+                        logging.warning(f"Helper: Could not get WS quote for {key}.")
+                    self._add_subscription(symbol, key, key.split("|")[1], ltp_val)
+            return {
+                symbol: self.subscribed[symbol] for symbol in symbols_by_key.values()
+            }
+        except Exception as e:
+            logging.error(f"{e} while subscribing many")
+            print_exc()
+            return {}
+
+    def acquire(self, symbol):
+        """marks a subscribed symbol as used by one more strategy"""
+        with self._lock:
+            self._refs[symbol] = self._refs.get(symbol, 0) + 1
+
+    def release(self, symbol):
+        """drops one strategy's hold, the symbol turns idle at zero"""
+        with self._lock:
+            if self._refs.get(symbol, 0) > 0:
+                self._refs[symbol] -= 1
+
+    def subscription_counts(self):
+        with self._lock:
+            live = sum(1 for symbol in self.subscribed if self._refs.get(symbol, 0) > 0)
+        return {"live": live, "idle": len(self.subscribed) - live}
+
+    def prune(self):
+        """
+        unsubscribes every idle symbol in one frame and forgets its quote
+        returns the pruned symbols
+        """
+        try:
+            with self._lock:
+                idle = [
+                    symbol
+                    for symbol in self.subscribed
+                    if self._refs.get(symbol, 0) <= 0
+                ]
+                keys = []
+                for symbol in idle:
+                    key = self.subscribed.pop(symbol)["key"]
+                    self._symbols_by_key.pop(key, None)
+                    self._quotes.pop(symbol, None)
+                    self._refs.pop(symbol, None)
+                    keys.append(key)
+            if keys:
+                self._ws.unsubscribe(keys)
+                for key in keys:
+                    self._ws.quotes.discard(key)
+                logging.info(
+                    f"unsubscribed {len(keys)} idle symbols, {self.subscription_counts()}"
+                )
+            return idle
+        except Exception as e:
+            logging.error(f"{e} while pruning subscriptions")
+            print_exc()
+            return []
+
 
 class RestApi:
     completed_trades = [{}]
     _positions = [{}]
     _positions_last_updated = pdlm.now().subtract(seconds=1)
+    # today's minute candles shared by every strategy asking for history
+    _intraday = IntradayHistory()
+    # completed sessions per (exchange, token, date) on disk
+    _ohlc = OhlcStore()
 
     def __init__(self, session):
         self._api = session
 
-    def daily(self, exchange, tradingsymbol):
+    def daily(self, exchange, tradingsymbol, token=None):
+        """broker daily bar, kept in the ohlc store when token is given"""
         try:
             start = pdlm.now().subtract(days=5).timestamp()
             now = pdlm.now().timestamp()
@@ -242,7 +413,10 @@ class RestApi:
                 enddate=now,
             )
             if ret is not None and any(ret):
-                return loads(ret[0])
+                bar = loads(ret[0])
+                if token is not None:
+                    self._ohlc.put_daily(exchange, token, bar)
+                return bar
             else:
                 return None
         except Exception as e:
@@ -250,79 +424,41 @@ class RestApi:
             print_exc()
 
     def yesterday(self, exchange, token):
+        """
+        previous session's daily bar, built from minute candles that are
+        downloaded once a day and kept on disk by the ohlc store
+        """
         try:
             token = str(token)
-            fm = (
-                pdlm.now()
-                .subtract(days=5)
-                .replace(hour=0, minute=0, second=0, microsecond=0)
-                .timestamp()
-            )
-            to = pdlm.now().subtract(days=0).timestamp()
 
-            data_now = self._api.historical(exchange, token, fm, to)
+            def fetch(fm, to):
+                return self._api.historical(exchange, token, fm, to)
 
-            if not isinstance(data_now, list):
-                return None
-            else:
-                pprint(data_now)
-                return compress_candles(data_now)
+            return self._ohlc.sync(exchange, token, fetch)
         except Exception as e:
             logging.error(f"{e} while compressing candle")
             print_exc()
 
+    def stored_ohlc(self, exchange, token):
+        """previous session's daily bar if already synced today, no network"""
+        try:
+            return self._ohlc.cached(exchange, token)
+        except Exception as e:
+            logging.error(f"{e} while reading ohlc store")
+            print_exc()
+
     def history(self, exchange, token, loc, key):
         try:
             token = str(token)
-            fm = (
-                pdlm.now()
-                .subtract(days=0)
-                .replace(hour=0, minute=0, second=0, microsecond=0)
-                .timestamp()
-            )
-            to = pdlm.now().subtract(days=0).timestamp()
 
-            data_now = self._api.historical(exchange, token, fm, to)
+            def fetch(fm, to):
+                return self._api.historical(exchange, token, fm, to)
 
-            if not isinstance(data_now, list):
-                logging.debug(
-                    f"history: {data_now} is not a list for params{exchange} {token} {loc}{key}"
-                )
+            candle = self._intraday.get(exchange, token, loc, fetch)
+            if candle is None:
+                logging.debug(f"history: no candle for {exchange} {token} {loc} {key}")
                 return None
-
-            if isinstance(loc, int):
-                # we have some data but it is not full
-                if len(data_now) < abs(loc):
-                    logging.warning(f"TODO: found partial data {data_now}")
-                    return None
-
-                if len(data_now) >= abs(loc):
-                    logging.debug(f"DATA NOW: {data_now[loc]}")
-                    low = float(data_now[loc][key])
-                    return low
-
-            else:
-                # "time": "18-08-2025 09:30:00"
-                copied = []
-                for d in data_now:
-                    if isinstance(d, dict) and d.get("time", None):
-                        str_time = d["time"]
-                        t = pdlm.from_format(
-                            str_time, "DD-MM-YYYY HH:mm:ss", tz="Asia/Kolkata"
-                        )
-                        if t >= loc:
-                            logging.debug(f"CANDLE {str_time}: {d}")
-                            copied.append(d)
-                        else:
-                            logging.debug(f"skipping after {str_time} {d} candles")
-                            break
-
-                if copied and len(copied) > 0:
-                    last_item = copied[-1]
-                    logging.debug(f"returning {last_item}")
-                    return float(last_item[key])
-
-            return None
+            return float(candle[key])
 
         except Exception as e:
             logging.error(f" {str(e)} in history")
@@ -476,15 +612,25 @@ class RestApi:
 
 class Helper:
     _api = None
+    _recorder = None
 
     @classmethod
     def api(cls):
         if cls._api is None:
             cls._api = login()
             cls._rest = RestApi(cls._api)
-            ws = Wserver(cls._api, ["NSE:24"])
+            O_SETG = yml_to_obj(S_SETG)
+            if O_SETG.get("record_ticks", 0):
+                cls._recorder = TickRecorder()
+            ws = Wserver(
+                cls._api,
+                ["NSE:24"],
+                stale_after=O_SETG.get("stale_after", 0),
+                max_backoff=O_SETG.get("max_backoff", 30),
+                recorder=cls._recorder,
+            )
             cls._quote = QuoteApi(ws)
-        cls.wait_till = pdlm.now().add(seconds=1)
+        cls.wait_till = Clock.live() + 1
         return cls._api
 
 
@@ -0,0 +1,212 @@
+from src.constants import logging_func
+
+import threading
+from time import monotonic
+
+import numpy as np
+import pandas as pd
+import pendulum as pdlm
+
+from src.providers.clock import Clock
+
+logging = logging_func(__name__)
+
+def parse_times(times, tz="Asia/Kolkata"):
+    """
+    broker candle times to int64 epoch seconds, parsed in one pass.
+    the fixed width fields are reordered to iso and handed to numpy,
+    which is several times faster than a format guided pandas parse.
+    """
+    iso = [f"{t[6:10]}-{t[3:5]}-{t[:2]}T{t[11:19]}" for t in times]
+    return np.array(iso, dtype="datetime64[s]").astype(np.int64) - utc_offset(tz)
+
+
+def normalize(data, tz="Asia/Kolkata"):
+    """
+    returns (epochs, rows) oldest first for the broker candles carrying
+    a time, whatever order the broker sent them in
+    """
+    rows = [d for d in data if isinstance(d, dict) and d.get("time", None)]
+    if not rows:
+        return np.empty(0, dtype=np.int64), []
+    epochs = parse_times([d["time"] for d in rows], tz)
+    order = np.argsort(epochs, kind="stable")
+    return epochs[order], [rows[i] for i in order]
+
+
+# candle columns in the order compress_candles returns them
+OHLCV = ("into", "inth", "intl", "intc", "v", "oi")
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "D": 86400}
+
+
+def timeframe_seconds(timeframe):
+    """timeframe such as 1D, 15m, 5m or 1h to seconds"""
+    return int(timeframe[:-1] or 1) * _UNITS[timeframe[-1]]
+
+
+def utc_offset(tz="Asia/Kolkata"):
+    """offset in seconds of a fixed offset zone such as IST"""
+    return int(pdlm.now(tz).utcoffset().total_seconds())
+
+
+def columns(rows, names=OHLCV):
+    """float arrays for every column present in rows, blanks become NaN"""
+    out = {}
+    for name in names:
+        if name in rows[0]:
+            values = [r.get(name) for r in rows]
+            try:
+                out[name] = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                out[name] = pd.to_numeric(
+                    pd.Series(values, dtype=object), errors="coerce"
+                ).to_numpy(dtype=np.float64)
+    return out
+
+
+def aggregate(epochs, cols, timeframe="1D", tz="Asia/Kolkata", groups=None):
+    """
+    buckets candles into timeframe bars aligned to local time
+    epochs: int64 candle start times, cols: {"into": array, ...}
+    groups: optional int array of symbol codes, to aggregate many
+            symbols in the same pass
+    returns (group, bucket start epoch, {column: array}) per bar,
+    sorted by group then time. open is first, high max, low min,
+    close last, volume summed and open interest last, blanks skipped.
+    """
+    period = timeframe_seconds(timeframe)
+    offset = utc_offset(tz)
+    buckets = (epochs + offset) // period * period - offset
+    groups = np.zeros(len(epochs), dtype=np.int64) if groups is None else groups
+
+    order = np.lexsort((epochs, groups))
+    buckets, groups = buckets[order], groups[order]
+    if not len(order):
+        return groups, buckets, {name: values[:0] for name, values in cols.items()}
+
+    starts = np.flatnonzero(
+        np.r_[True, (buckets[1:] != buckets[:-1]) | (groups[1:] != groups[:-1])]
+    )
+    ends = np.r_[starts[1:], len(order)] - 1
+
+    out = {}
+    for name, values in cols.items():
+        values = values[order]
+        if name == "into":
+            out[name] = _first_valid(values, starts)
+        elif name == "inth":
+            out[name] = np.fmax.reduceat(values, starts)
+        elif name == "intl":
+            out[name] = np.fmin.reduceat(values, starts)
+        elif name == "v":
+            out[name] = np.add.reduceat(np.nan_to_num(values), starts)
+        else:
+            out[name] = _last_valid(values, starts)
+    return groups[starts], buckets[starts], out
+
+
+def _first_valid(values, starts):
+    """first non NaN value of each bucket, NaN if it has none, like pandas first"""
+    n = len(values)
+    idx = np.minimum.reduceat(np.where(np.isnan(values), n, np.arange(n)), starts)
+    return np.where(idx < n, values[np.minimum(idx, n - 1)], np.nan)
+
+
+def _last_valid(values, starts):
+    """last non NaN value of each bucket, NaN if it has none, like pandas last"""
+    n = len(values)
+    idx = np.maximum.reduceat(np.where(np.isnan(values), -1, np.arange(n)), starts)
+    return np.where(idx >= 0, values[idx], np.nan)
+
+
+class _Candles:
+    """today's candles of one token, oldest first with their epochs"""
+
+    def __init__(self, day):
+        self.day = day
+        self.rows = []
+        self.epochs = np.empty(0, dtype=np.int64)
+        self.fetched_at = None
+        self.lock = threading.Lock()
+
+    def merge(self, data):
+        """
+        the bar we already had last may have been partial, so it and
+        anything newer is replaced by the downloaded bars
+        """
+        epochs, rows = normalize(data)
+        if not rows:
+            return
+        keep = int(np.searchsorted(self.epochs, epochs[0], side="left"))
+        self.epochs = np.concatenate((self.epochs[:keep], epochs))
+        self.rows = self.rows[:keep] + rows
+
+    def at(self, loc):
+        """broker indexing, newest first: 0 is the latest bar, -1 the first"""
+        if not self.rows or len(self.rows) < abs(loc):
+            return None
+        return self.rows[-1 - loc]
+
+    def since(self, epoch):
+        """index of the first bar starting at or after epoch, None if none"""
+        idx = int(np.searchsorted(self.epochs, epoch, side="left"))
+        return idx if idx < len(self.rows) else None
+
+
+class IntradayHistory:
+    """
+    1 minute candles of the current day per (exchange, token), kept in
+    memory and topped up with only the bars newer than the last cached
+    one. callers for the same token queue on its lock, so a burst of
+    strategies starting together costs one download per ttl seconds.
+    """
+
+    def __init__(self, ttl=1.0):
+        self.ttl = ttl
+        self._by_token = {}
+        self._lock = threading.Lock()
+
+    def _candles(self, exchange, token):
+        today = Clock.now().start_of("day")
+        with self._lock:
+            candles = self._by_token.get((exchange, token))
+            if candles is None or candles.day != today:
+                candles = self._by_token[(exchange, token)] = _Candles(today)
+            return candles
+
+    def _refresh(self, candles, fetch):
+        if candles.fetched_at is not None and monotonic() - candles.fetched_at < self.ttl:
+            return
+        fm = int(candles.epochs[-1]) if len(candles.epochs) else candles.day.timestamp()
+        data = fetch(fm, Clock.time())
+        candles.fetched_at = monotonic()
+        if isinstance(data, list):
+            candles.merge(data)
+        else:
+            logging.debug(f"history: {data} is not a list")
+
+    def get(self, exchange, token, loc, fetch):
+        """
+        loc: int as an index into the broker's newest first list, or a
+             datetime for the first bar starting at or after it
+        fetch: fetch(fm, to) returning broker candles between two epochs
+        returns the candle dict or None
+        """
+        candles = self._candles(exchange, token)
+        with candles.lock:
+            if isinstance(loc, int):
+                self._refresh(candles, fetch)
+                return candles.at(loc)
+
+            epoch = loc.timestamp()
+            idx = candles.since(epoch)
+            # a bar with a newer one after it is final, no need to ask
+            if idx is None or idx == len(candles.rows) - 1:
+                self._refresh(candles, fetch)
+                idx = candles.since(epoch)
+            return None if idx is None else candles.rows[idx]
+
+    def clear(self):
+        with self._lock:
+            self._by_token.clear()
@@ -0,0 +1,181 @@
+from src.constants import logging_func, S_DATA
+
+import json
+import os
+import threading
+
+import pendulum as pdlm
+
+from src.providers.clock import Clock
+from src.sdk.intraday import normalize
+
+logging = logging_func(__name__)
+
+
+def _today():
+    return Clock.now().to_date_string()
+
+
+def _session_date(str_time):
+    """broker time 18-09-2025 09:15:00 to the iso date 2025-09-18"""
+    day, month, year = str_time[:10].split("-")
+    return f"{year}-{month}-{day}"
+
+
+class OhlcStore:
+    """
+    completed sessions on disk, one json file per (exchange, token, date)
+    holding the minute candles of that day and its daily bar. a token is
+    marked synced once per day, after that every read is served from
+    memory or disk without touching the broker. a daily bar the broker
+    hands us directly is kept for the day as well.
+    """
+
+    def __init__(self, root=S_DATA + "ohlc/"):
+        self.root = root
+        self._daily = {}
+        self._synced = {}
+        self._broker_daily = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, exchange, token):
+        return os.path.join(self.root, f"{exchange}_{token}")
+
+    def path(self, exchange, token, date):
+        return os.path.join(self._dir(exchange, token), f"{date}.json")
+
+    def dates(self, exchange, token):
+        """stored session dates, oldest first"""
+        folder = self._dir(exchange, token)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f[:-5] for f in os.listdir(folder) if f.endswith(".json"))
+
+    def get(self, exchange, token, date):
+        """{"daily": bar, "intraday": [candles]} or None"""
+        try:
+            with open(self.path(exchange, token, date)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def daily(self, exchange, token, date):
+        key = (exchange, str(token), date)
+        bar = self._daily.get(key)
+        if bar is None:
+            session = self.get(exchange, token, date)
+            if session is not None:
+                bar = self._daily[key] = session["daily"]
+        return bar
+
+    def latest_daily(self, exchange, token, before=None):
+        """daily bar of the newest stored session before the given date"""
+        before = before or _today()
+        dates = [d for d in self.dates(exchange, token) if d < before]
+        return self.daily(exchange, token, dates[-1]) if dates else None
+
+    def put_intraday(self, exchange, token, candles, today=None):
+        """
+        splits broker minute candles by session and stores every session
+        before today, today is still trading and is never written
+        returns the stored dates
+        """
+        today = today or _today()
+        _, rows = normalize(candles)
+        sessions = {}
+        for row in rows:
+            sessions.setdefault(_session_date(row["time"]), []).append(row)
+
+        stored = []
+        os.makedirs(self._dir(exchange, token), exist_ok=True)
+        for date, day_rows in sessions.items():
+            if date >= today:
+                continue
+            bar = {
+                "into": float(day_rows[0]["into"]),
+                "inth": max(float(r["inth"]) for r in day_rows),
+                "intl": min(float(r["intl"]) for r in day_rows),
+                "intc": float(day_rows[-1]["intc"]),
+                "date": date,
+            }
+            if "v" in day_rows[0]:
+                bar["v"] = sum(float(r.get("v", 0) or 0) for r in day_rows)
+            if "oi" in day_rows[-1]:
+                bar["oi"] = float(day_rows[-1]["oi"])
+            with open(self.path(exchange, token, date), "w") as f:
+                json.dump({"daily": bar, "intraday": day_rows}, f)
+            self._daily[(exchange, str(token), date)] = bar
+            stored.append(date)
+        return stored
+
+    def synced(self, exchange, token):
+        """date on which this token was last brought up to date"""
+        key = (exchange, str(token))
+        if key not in self._synced:
+            try:
+                with open(os.path.join(self._dir(exchange, token), "synced")) as f:
+                    self._synced[key] = f.read().strip()
+            except FileNotFoundError:
+                return None
+        return self._synced[key]
+
+    def mark_synced(self, exchange, token, today=None):
+        today = today or _today()
+        os.makedirs(self._dir(exchange, token), exist_ok=True)
+        with open(os.path.join(self._dir(exchange, token), "synced"), "w") as f:
+            f.write(today)
+        self._synced[(exchange, str(token))] = today
+
+    def sync(self, exchange, token, fetch, days=5):
+        """
+        downloads only the sessions after the newest stored one, at most
+        days back, once per day. fetch(fm, to) returns broker candles.
+        returns the daily bar of the previous session
+        """
+        token = str(token)
+        today = Clock.now().start_of("day")
+        with self._lock:
+            if self.synced(exchange, token) != today.to_date_string():
+                dates = self.dates(exchange, token)
+                fm = today.subtract(days=days)
+                if dates:
+                    fm = max(fm, pdlm.parse(dates[-1], tz="Asia/Kolkata").add(days=1))
+                data = fetch(fm.timestamp(), Clock.time())
+                if not isinstance(data, list):
+                    return self.latest_daily(exchange, token)
+                self.put_intraday(exchange, token, data)
+                self.mark_synced(exchange, token)
+        return self.latest_daily(exchange, token)
+
+    def put_daily(self, exchange, token, bar, today=None):
+        """keeps a daily bar from the broker so cached() serves it today"""
+        today = today or _today()
+        os.makedirs(self._dir(exchange, token), exist_ok=True)
+        with open(os.path.join(self._dir(exchange, token), "daily"), "w") as f:
+            json.dump({"date": today, "bar": bar}, f)
+        self._broker_daily[(exchange, str(token))] = {"date": today, "bar": bar}
+
+    def broker_daily(self, exchange, token):
+        """daily bar saved by put_daily today, None on another day"""
+        key = (exchange, str(token))
+        if key not in self._broker_daily:
+            try:
+                with open(os.path.join(self._dir(exchange, token), "daily")) as f:
+                    self._broker_daily[key] = json.load(f)
+            except FileNotFoundError:
+                return None
+        saved = self._broker_daily[key]
+        return saved["bar"] if saved["date"] == _today() else None
+
+    def cached(self, exchange, token):
+        """
+        the broker daily bar or the previous session bar, whichever was
+        stored today, without any network call
+        """
+        token = str(token)
+        bar = self.broker_daily(exchange, token)
+        if bar is not None:
+            return bar
+        if self.synced(exchange, token) != _today():
+            return None
+        return self.latest_daily(exchange, token)
@@ -0,0 +1,207 @@
+from src.constants import logging_func, S_DATA
+
+import heapq
+import os
+import threading
+from time import monotonic, time
+from traceback import print_exc
+
+import numpy as np
+
+from src.sdk.intraday import utc_offset
+
+logging = logging_func(__name__)
+
+# columns of a segment, key is the ws key such as NFO|43210
+COLUMNS = ("key", "exchange_ts", "recv_ts", "ltp", "volume")
+
+# seconds between checks of the batch size
+_POLL = 1.0
+
+
+def _days(epochs, offset):
+    """local iso dates of epoch seconds"""
+    return ((epochs + offset) // 86400).astype("datetime64[D]").astype(str)
+
+
+class TickRecorder:
+    """
+    records every quote the websocket hands us. record() only appends a
+    tuple to a list, a background thread swaps the list out once it
+    holds max_rows ticks or every interval seconds and writes it as one
+    compressed columnar segment per day,
+    data/ticks/<date>/<seq>-<first exchange ts>.npz, sorted on exchange
+    time. segments are written to a temp name and renamed, so a reader
+    never sees half a file.
+    """
+
+    def __init__(
+        self, root=S_DATA + "ticks/", interval=300.0, max_rows=200_000, tz="Asia/Kolkata"
+    ):
+        self.root = root
+        self.interval = interval
+        self.max_rows = max_rows
+        self._offset = utc_offset(tz)
+        self._rows = []
+        self._lock = threading.Lock()
+        self._seq = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, name="tick-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def record(self, key, exchange_ts, ltp, volume):
+        row = (key, exchange_ts, time(), ltp, volume)
+        with self._lock:
+            self._rows.append(row)
+
+    def _loop(self):
+        last = monotonic()
+        while not self._stop.wait(min(self.interval, _POLL)):
+            if len(self._rows) >= self.max_rows or monotonic() - last >= self.interval:
+                self.flush()
+                last = monotonic()
+
+    def _next_path(self, day, first_ts):
+        folder = os.path.join(self.root, day)
+        seq = self._seq.get(day)
+        if seq is None:
+            os.makedirs(folder, exist_ok=True)
+            seq = max((_segment(f)[0] for f in _npz(folder)), default=0)
+        self._seq[day] = seq + 1
+        return os.path.join(folder, f"{seq + 1:06d}-{int(first_ts)}.npz")
+
+    def flush(self):
+        """writes what was recorded since the last flush, returns the row count"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            keys, exchange_ts, recv_ts, ltp, volume = zip(*rows)
+            cols = {
+                "key": np.array(keys),
+                "exchange_ts": np.array(exchange_ts, dtype=np.float64),
+                "recv_ts": np.array(recv_ts, dtype=np.float64),
+                "ltp": np.array(ltp, dtype=np.float64),
+                "volume": np.array(volume, dtype=np.float64),
+            }
+            days = _days(cols["recv_ts"], self._offset)
+            for day in dict.fromkeys(days.tolist()):
+                idx = np.flatnonzero(days == day)
+                idx = idx[np.argsort(cols["exchange_ts"][idx], kind="stable")]
+                seg = {k: v[idx] for k, v in cols.items()}
+                path = self._next_path(day, seg["exchange_ts"][0])
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    np.savez_compressed(f, **seg)
+                os.replace(tmp, path)
+        except Exception as e:
+            logging.error(f"{e} while writing {len(rows)} ticks")
+            print_exc()
+        return len(rows)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+def _npz(folder):
+    return [f for f in os.listdir(folder) if f.endswith(".npz")]
+
+
+def _segment(name):
+    """(seq, first exchange ts) from a segment file name"""
+    seq, first = name[:-4].split("-")
+    return int(seq), int(first)
+
+
+class TickReader:
+    """streams segments written by TickRecorder back for replay"""
+
+    def __init__(self, root=S_DATA + "ticks/"):
+        self.root = root
+
+    def days(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
+
+    def _paths(self, day):
+        """segment paths of the day, oldest first exchange time first"""
+        folder = os.path.join(self.root, day)
+        if not os.path.isdir(folder):
+            return []
+        names = sorted(_npz(folder), key=lambda f: _segment(f)[::-1])
+        return [(_segment(f)[1], os.path.join(folder, f)) for f in names]
+
+    def segments(self, day):
+        """columns of each segment of the day, in the order written"""
+        for _, path in sorted(self._paths(day), key=lambda p: p[1]):
+            yield _load(path)
+
+    def stream(self, day, keys=None):
+        """
+        (exchange_ts, key, ltp, volume) of a day in exchange time order.
+        a heap merges the sorted segments and a segment is only opened
+        once the merge reaches its first tick, so memory holds just the
+        segments that overlap in time, not the whole day.
+        """
+        keys = None if keys is None else list(keys)
+        paths = self._paths(day)
+        heap = []
+        nxt = 0
+        while True:
+            while nxt < len(paths) and (not heap or paths[nxt][0] <= heap[0][0]):
+                seg = _load(paths[nxt][1])
+                if keys is not None:
+                    mask = np.isin(seg["key"], keys)
+                    seg = {col: values[mask] for col, values in seg.items()}
+                rows = iter(
+                    zip(
+                        seg["exchange_ts"].tolist(),
+                        seg["key"].tolist(),
+                        seg["ltp"].tolist(),
+                        seg["volume"].tolist(),
+                    )
+                )
+                first = next(rows, None)
+                if first is not None:
+                    heapq.heappush(heap, (first[0], nxt, first, rows))
+                nxt += 1
+            if not heap:
+                return
+            _, idx, row, rows = heap[0]
+            yield row
+            following = next(rows, None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (following[0], idx, following, rows))
+
+    def read(self, day, keys=None):
+        """all ticks of a day as columns, sorted on exchange time, in memory"""
+        segs = list(self.segments(day))
+        if not segs:
+            return {col: np.empty(0) for col in COLUMNS}
+        cols = {col: np.concatenate([s[col] for s in segs]) for col in COLUMNS}
+        if keys is not None:
+            mask = np.isin(cols["key"], list(keys))
+            cols = {col: values[mask] for col, values in cols.items()}
+        order = np.argsort(cols["exchange_ts"], kind="stable")
+        return {col: values[order] for col, values in cols.items()}
+
+    def ticks(self, day, symbols_by_key):
+        """
+        (exchange_ts, symbol, ltp) in time order, the input Replay.run
+        takes. symbols_by_key maps ws keys to tradingsymbols.
+        """
+        for ts, key, ltp, _ in self.stream(day, symbols_by_key):
+            yield ts, symbols_by_key[key], ltp
+
+
+def _load(path):
+    with np.load(path) as seg:
+        return {col: seg[col] for col in COLUMNS}
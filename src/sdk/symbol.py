@@ -2,7 +2,10 @@ from src.constants import logging_func
 
 from src.config.interface import OptionData
 
+import numpy as np
 import pandas as pd
+from os import makedirs, path
+from threading import Lock
 from toolkit.fileutils import Fileutils
 from typing import Dict, Optional, Protocol
 from traceback import print_exc
@@ -16,6 +19,7 @@ def get_exchange_token_map_finvasia(csvfile, exchange):
         print(f"{url}")
         df = pd.read_csv(url)
         df.to_csv(csvfile, index=False)
+        save_columnar(df, csvfile)
 
 
 # The equivalent drop-in replacement for Flattrade using the working S3 endpoints
@@ -43,6 +47,7 @@ def get_exchange_token_map_flattrade(csvfile, exchange):
         )
         df.StrikePrice = df.StrikePrice.astype(int)
         df.to_csv(csvfile, index=False)
+        save_columnar(df, csvfile)
 
 
 # Usage example:
@@ -50,6 +55,336 @@ def get_exchange_token_map_flattrade(csvfile, exchange):
 # token = nfo_map.get('NIFTY26MAR2622500CE')
 
 
+"""
+    binary columnar copy of the scrip master
+"""
+
+# written last, its presence and mtime tell that the cache is complete
+COLUMNS_MARKER = "_columns.npy"
+
+
+def columnar_dir(csvfile):
+    return path.splitext(csvfile)[0] + "_npy"
+
+
+def save_columnar(df, csvfile):
+    """
+    writes one .npy per column next to the csv. text columns are stored
+    as categorical codes plus a fixed width array of categories, so every
+    file can be memory mapped without parsing.
+    """
+    try:
+        diry = columnar_dir(csvfile)
+        makedirs(diry, exist_ok=True)
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_numeric_dtype(series):
+                np.save(path.join(diry, f"{col}.npy"), series.to_numpy())
+            else:
+                cat = pd.Categorical(series.astype("string").astype(object))
+                np.save(
+                    path.join(diry, f"{col}.codes.npy"),
+                    cat.codes.astype(np.int32),
+                )
+                np.save(
+                    path.join(diry, f"{col}.cats.npy"),
+                    np.array(cat.categories, dtype=str),
+                )
+        np.save(path.join(diry, COLUMNS_MARKER), np.array(df.columns, dtype=str))
+    except Exception as e:
+        logging.error(f"{e} while saving columnar copy of {csvfile}")
+        print_exc()
+
+
+def load_columnar(csvfile):
+    """returns the memory mapped scrip master or None if the cache is stale"""
+    diry = columnar_dir(csvfile)
+    marker = path.join(diry, COLUMNS_MARKER)
+    if not path.exists(marker) or path.getmtime(marker) < path.getmtime(csvfile):
+        return None
+    try:
+        data = {}
+        for col in np.load(marker):
+            numeric = path.join(diry, f"{col}.npy")
+            if path.exists(numeric):
+                data[col] = np.load(numeric, mmap_mode="r")
+            else:
+                codes = np.load(path.join(diry, f"{col}.codes.npy"), mmap_mode="r")
+                cats = np.load(path.join(diry, f"{col}.cats.npy"))
+                data[col] = pd.Categorical.from_codes(codes, categories=cats)
+        return pd.DataFrame(data)
+    except Exception as e:
+        logging.error(f"{e} while loading columnar copy of {csvfile}")
+        print_exc()
+        return None
+
+
+def read_master(csvfile):
+    df = load_columnar(csvfile)
+    if df is None:
+        df = pd.read_csv(csvfile)
+        save_columnar(df, csvfile)
+    return df
+
+
+class SymbolMaster:
+    """
+    scrip master loaded once per process and indexed for O(1) lookups.
+    reloaded only when the daily download replaces the csv on disk.
+    expiries are answered straight from the columns, the row indexes
+    are built the first time a strike or tradingsymbol is looked up.
+    """
+
+    _masters: Dict[str, "SymbolMaster"] = {}
+    _lock = Lock()
+
+    @classmethod
+    def get(cls, csvfile: str) -> "SymbolMaster":
+        mtime = path.getmtime(csvfile)
+        master = cls._masters.get(csvfile)
+        if master is None or master.mtime != mtime:
+            with cls._lock:
+                master = cls._masters.get(csvfile)
+                if master is None or master.mtime != mtime:
+                    master = cls(read_master(csvfile), mtime)
+                    cls._masters[csvfile] = master
+                    logging.info(f"loaded symbol master {csvfile}")
+        return master
+
+    def __init__(self, df: pd.DataFrame, mtime: float = 0.0):
+        self.df = df
+        self.mtime = mtime
+        self._index_lock = Lock()
+        self._indexed = False
+        self._chains = {}
+
+        # Symbol -> set of Expiry
+        self.expiries = {}
+        pairs = df[["Symbol", "Expiry"]].drop_duplicates()
+        for symbol, expiry in zip(pairs["Symbol"], pairs["Expiry"]):
+            self.expiries.setdefault(symbol, set()).add(expiry)
+
+    def _build_indexes(self):
+        with self._index_lock:
+            if self._indexed:
+                return
+            # plain python columns, rows are assembled only when asked for
+            self._cols = {col: self.df[col].tolist() for col in self.df.columns}
+            strikes = [self._strike(v) for v in self._cols["StrikePrice"]]
+
+            # TradingSymbol -> position
+            by_tradingsymbol = {}
+            # (Symbol, Expiry, OptionType, StrikePrice) -> position
+            by_contract = {}
+
+            for pos, (symbol, expiry, option_type, strike, tsym) in enumerate(
+                zip(
+                    self._cols["Symbol"],
+                    self._cols["Expiry"],
+                    self._cols["OptionType"],
+                    strikes,
+                    self._cols["TradingSymbol"],
+                )
+            ):
+                by_tradingsymbol[tsym] = pos
+                by_contract[(symbol, expiry, option_type, strike)] = pos
+
+            self._by_tradingsymbol = by_tradingsymbol
+            self._by_contract = by_contract
+            self._indexed = True
+
+    def _ensure_indexed(self):
+        if not self._indexed:
+            self._build_indexes()
+
+    def _row(self, pos) -> dict:
+        return {col: values[pos] for col, values in self._cols.items()}
+
+    @staticmethod
+    def _strike(strike) -> Optional[float]:
+        try:
+            return float(strike)
+        except (TypeError, ValueError):
+            return None
+
+    def tradingsymbol(self, tradingsymbol) -> Optional[dict]:
+        self._ensure_indexed()
+        pos = self._by_tradingsymbol.get(tradingsymbol)
+        return None if pos is None else self._row(pos)
+
+    def contract(self, symbol, expiry, option_type, strike) -> Optional[dict]:
+        self._ensure_indexed()
+        pos = self._by_contract.get(
+            (symbol, expiry, option_type, self._strike(strike))
+        )
+        return None if pos is None else self._row(pos)
+
+    def chain(self, symbol, expiry) -> "OptionChain":
+        """option chain for (symbol, expiry), built once and reused"""
+        chain = self._chains.get((symbol, expiry))
+        if chain is None:
+            chain = self._chains.setdefault(
+                (symbol, expiry), OptionChain(self, symbol, expiry)
+            )
+        return chain
+
+
+class OptionChain:
+    """
+    strikes of one (symbol, expiry) sorted ascending, with CE and PE
+    columns aligned to them. a missing contract has position -1 and
+    an empty tradingsymbol.
+    """
+
+    OPTION_TYPES = ("CE", "PE")
+
+    def __init__(self, master: SymbolMaster, symbol, expiry):
+        self._master = master
+        self.symbol = symbol
+        self.expiry = expiry
+
+        df = master.df
+        matched = np.flatnonzero(
+            ((df["Symbol"] == symbol) & (df["Expiry"] == expiry)).to_numpy()
+        )
+        option_types = df["OptionType"].to_numpy()[matched]
+        strike_col = pd.to_numeric(df["StrikePrice"], errors="coerce").to_numpy()
+        all_strikes = strike_col[matched].astype(np.float64)
+
+        is_option = np.isin(option_types, self.OPTION_TYPES)
+        self.strikes = np.unique(all_strikes[is_option])
+
+        self.positions = {}
+        self.tradingsymbols = {}
+        self.tokens = {}
+        tsym_col = df["TradingSymbol"].to_numpy()
+        token_col = df["Token"].to_numpy()
+        for option_type in self.OPTION_TYPES:
+            pos = np.full(len(self.strikes), -1, dtype=np.int64)
+            picked = option_types == option_type
+            idx = np.searchsorted(self.strikes, all_strikes[picked])
+            pos[idx] = matched[picked]
+            self.positions[option_type] = pos
+            valid = pos >= 0
+            tsyms = np.full(len(self.strikes), "", dtype=object)
+            tsyms[valid] = tsym_col[pos[valid]]
+            tokens = np.full(len(self.strikes), "", dtype=object)
+            tokens[valid] = [str(t) for t in token_col[pos[valid]]]
+            self.tradingsymbols[option_type] = tsyms
+            self.tokens[option_type] = tokens
+
+        # live prices aligned to strikes, patched in place by update_quotes
+        self.ltp = {
+            option_type: np.full(len(self.strikes), np.nan)
+            for option_type in self.OPTION_TYPES
+        }
+        # tradingsymbol -> (option type, chain position)
+        self._slot = {
+            tsym: (option_type, idx)
+            for option_type in self.OPTION_TYPES
+            for idx, tsym in enumerate(self.tradingsymbols[option_type])
+            if tsym
+        }
+
+    def __len__(self):
+        return len(self.strikes)
+
+    def index_of(self, strike) -> int:
+        """position of an exact strike or -1"""
+        idx = int(np.searchsorted(self.strikes, float(strike)))
+        if idx < len(self.strikes) and self.strikes[idx] == float(strike):
+            return idx
+        return -1
+
+    def atm_index(self, ltp: float) -> int:
+        """position of the strike nearest to ltp"""
+        if not len(self.strikes):
+            return -1
+        idx = int(np.searchsorted(self.strikes, ltp))
+        if idx == 0:
+            return 0
+        if idx == len(self.strikes):
+            return idx - 1
+        lower, upper = self.strikes[idx - 1], self.strikes[idx]
+        return idx - 1 if ltp - lower <= upper - ltp else idx
+
+    def row(self, idx: int, option_type: str) -> Optional[dict]:
+        """full scrip master row of the contract at a chain position"""
+        if idx < 0 or idx >= len(self.strikes):
+            return None
+        pos = self.positions[option_type][idx]
+        if pos < 0:
+            return None
+        self._master._ensure_indexed()
+        return self._master._row(int(pos))
+
+    def at(self, strike, option_type: str) -> Optional[dict]:
+        return self.row(self.index_of(strike), option_type)
+
+    def by_distance(self, strike, distance: int, option_type: str) -> Optional[dict]:
+        """
+        contract `distance` strikes away from strike, out of the money
+        is up the chain for CE and down the chain for PE
+        """
+        idx = self.index_of(strike)
+        if idx < 0:
+            return None
+        step = distance if option_type == "CE" else -distance
+        return self.row(idx + step, option_type)
+
+    def window(self, lowest, highest) -> slice:
+        """chain positions of strikes between lowest and highest inclusive"""
+        begin = int(np.searchsorted(self.strikes, lowest, side="left"))
+        end = int(np.searchsorted(self.strikes, highest, side="right"))
+        return slice(begin, end)
+
+    def update_quotes(self, quotes: Dict[str, float]):
+        """
+        copies prices of this chain's contracts into the aligned arrays,
+        pass only the changed quotes to keep the cost O(changes)
+        """
+        for tsym, ltp in quotes.items():
+            slot = self._slot.get(tsym)
+            if slot is not None and ltp is not None:
+                option_type, idx = slot
+                self.ltp[option_type][idx] = float(ltp)
+
+    def prices(self, quotes: Dict[str, float], option_type: str) -> np.ndarray:
+        """
+        fresh price array for option_type holding only the given quotes,
+        NaN elsewhere. unlike update_quotes it leaves no state behind,
+        so concurrent or later scans never see each other's prices.
+        """
+        prices = np.full(len(self.strikes), np.nan)
+        for tsym, ltp in quotes.items():
+            slot = self._slot.get(tsym)
+            if slot is not None and slot[0] == option_type and ltp is not None:
+                prices[slot[1]] = float(ltp)
+        return prices
+
+    def closest_premium(
+        self, premium: float, option_type: str, quotes: Optional[Dict] = None
+    ) -> Optional[str]:
+        """
+        contract whose price is nearest to premium, in one argmin
+        priced from quotes when given, else from the update_quotes arrays
+        """
+        prices = self.ltp[option_type] if quotes is None else self.prices(quotes, option_type)
+        diffs = np.abs(prices - premium)
+        if np.isnan(diffs).all():
+            return None
+        return self.tradingsymbols[option_type][int(np.nanargmin(diffs))]
+
+    def premium_band(
+        self, lowest: float, highest: float, option_type: str, quotes: Optional[Dict] = None
+    ) -> list:
+        """contracts priced between lowest and highest inclusive, by strike"""
+        prices = self.ltp[option_type] if quotes is None else self.prices(quotes, option_type)
+        with np.errstate(invalid="ignore"):
+            inside = (prices >= lowest) & (prices <= highest)
+        return self.tradingsymbols[option_type][inside].tolist()
+
+
 class Symbol(Protocol):
     # (The protocol definition as above)
     def get_atm(self, ltp: float) -> int: ...
@@ -61,6 +396,9 @@ class Symbol(Protocol):
     def find_option_by_distance(
         self, atm: int, distance: int, c_or_p: str
     ) -> Optional[str]: ...
+    def find_premium_band(
+        self, quotes: Dict[str, float], lowest: float, highest: float, contains: str
+    ) -> list: ...
 
 
 class OptionSymbol(Symbol):
@@ -72,8 +410,13 @@ class OptionSymbol(Symbol):
         self._data = data
         self.csvfile = f"./data/{self._data.exchange}_symbols.csv"
         get_exchange_token_map_flattrade(self.csvfile, self._data.exchange)
+        self._master = SymbolMaster.get(self.csvfile)
         logging.info(f"init OptionSymbol {data}")
 
+    @property
+    def chain(self) -> OptionChain:
+        return self._master.chain(self._data.symbol, self._data.expiry)
+
     def get_atm(self, ltp: float) -> int:
         current_strike = ltp - (ltp % self._data.diff)
         return int(
@@ -84,90 +427,71 @@ class OptionSymbol(Symbol):
 
     def _find_expiry(self):
         """
-        find
+        find the nearest expiry that is today or later
         """
-        df = pd.read_csv(self.csvfile, usecols=["Symbol", "Expiry"])
-
-        df = df[df.Symbol == self._data.symbol]
-
-        df = df.drop_duplicates(subset=["Expiry"])
-
-        df["Sort_Key"] = pd.to_datetime(df["Expiry"], format="%d-%b-%Y")
-
+        expiries = self._master.expiries.get(self._data.symbol, set())
         today = pd.to_datetime("today").normalize()
-
-        df = df[df["Sort_Key"] >= today]
-
-        df = df.sort_values(by=["Sort_Key"])
-
-        if len(df.index) > 0:
-            first_row = df.iloc[0]["Expiry"]
-            return first_row
-        print(df.head())
-        raise f"cannot find no row found for this symbol {self._data.symbol}"
+        upcoming = sorted(
+            (pd.to_datetime(expiry, format="%d-%b-%Y"), expiry)
+            for expiry in expiries
+            if isinstance(expiry, str)
+        )
+        for sort_key, expiry in upcoming:
+            if sort_key >= today:
+                return expiry
+        raise ValueError(f"cannot find expiry for this symbol {self._data.symbol}")
 
     def get_tokens(self, strike: int) -> Dict[str, str]:
         try:
-            df = pd.read_csv(self.csvfile)
             lst = [strike]
             for v in range(1, self._data.depth):
                 lst.append(strike + v * self._data.diff)
                 lst.append(strike - v * self._data.diff)
-            filtered_df = df[
-                (df["StrikePrice"].isin(lst))
-                & (df["Symbol"] == self._data.symbol)
-                & (df["Expiry"] == self._data.expiry)
-            ]
-
-            if "Exchange" not in filtered_df.columns:
-                raise KeyError("CSV file is missing 'Exchange' column")
 
-            tokens_found = filtered_df.assign(
-                tknexc=lambda x: x["Exchange"] + "|" + x["Token"].astype(str)
-            )[["tknexc", "TradingSymbol"]].set_index("tknexc")
-
-            dct = tokens_found.to_dict()
-            return dct.get("TradingSymbol", {})
+            dct = {}
+            chain = self.chain
+            for price in lst:
+                for option_type in chain.OPTION_TYPES:
+                    row = chain.at(price, option_type)
+                    if row is None:
+                        continue
+                    if "Exchange" not in row:
+                        raise KeyError("CSV file is missing 'Exchange' column")
+                    dct[f"{row['Exchange']}|{row['Token']}"] = row["TradingSymbol"]
+            return dct
         except Exception as e:
             logging.error(f" {e} in Symbol while getting token")
             print_exc()
             return {}
 
     def find_option_type(self, tradingsymbol: str) -> Optional[str]:
-        df = pd.read_csv(self.csvfile)
-        row = df[df["TradingSymbol"] == tradingsymbol]
-        if not row.empty:
-            return row.iloc[0]["OptionType"]
+        row = self._master.tradingsymbol(tradingsymbol)
+        if row is not None:
+            return row["OptionType"]
         return None
 
     def find_closest_premium(
         self, quotes: Dict[str, float], premium: float, contains: str
     ) -> Optional[str]:
         try:
-            df = pd.read_csv(self.csvfile)
-            df = df[
-                (df["Symbol"] == self._data.symbol) & (df["OptionType"] == contains)
-            ]
-            lst_of_tradingsymbols = df["TradingSymbol"].to_list()
-            call_or_put_begins_with = {
-                k: v for k, v in quotes.items() if k in lst_of_tradingsymbols
-            }
-            symbol_differences: Dict[str, float] = {}
-
-            for symbol, ltp in call_or_put_begins_with.items():
-                logging.info(f"Symbol:{symbol} difference {ltp} - {premium}")
-                difference = abs(float(ltp) - premium)
-                symbol_differences[symbol] = difference
-
-            closest_symbol = min(
-                symbol_differences, key=symbol_differences.get, default=None
-            )
+            closest_symbol = self.chain.closest_premium(premium, contains, quotes)
+            logging.info(f"{closest_symbol} is closest to premium {premium}")
             return closest_symbol
         except Exception as e:
             logging.error(f"{e} Symbol: find closest premium")
             print_exc()
             return None
 
+    def find_premium_band(
+        self, quotes: Dict[str, float], lowest: float, highest: float, contains: str
+    ) -> list:
+        try:
+            return self.chain.premium_band(lowest, highest, contains, quotes)
+        except Exception as e:
+            logging.error(f"{e} Symbol: find premium band")
+            print_exc()
+            return []
+
     def find_option_by_distance(
         self, atm: int, distance: int, c_or_p: str
     ) -> Optional[str]:
@@ -177,48 +501,16 @@ class OptionSymbol(Symbol):
                 if c_or_p == "CE"
                 else atm - (distance * self._data.diff)
             )
-            df = pd.read_csv(self.csvfile)
-            # ... previous code ...
             logging.info(
                 f"Target: Symbol={self._data.symbol}, Type={c_or_p}, Strike={find_strike}, Expiry={self._data.expiry}"
             )
+            row = self.chain.at(find_strike, c_or_p)
+            if row is not None:
+                return row
 
-            # Step 1: Symbol
-            df_sym = df[df["Symbol"] == self._data.symbol]
-            print(f"1. After Symbol filter: {len(df_sym)} rows remaining")
-            if df_sym.empty:
-                print(f"ERROR: Symbol '{self._data.symbol}' not found.")
-
-            # Step 2: OptionType
-            df_opt = df_sym[df_sym["OptionType"] == c_or_p]
-            print(f"2. After OptionType filter: {len(df_opt)} rows remaining")
-            if df_opt.empty and not df_sym.empty:
-                print(f"ERROR: Available OptionTypes: {df_sym['OptionType'].unique()}")
-
-            # Step 3: Strike Price (Forcing float comparison to be safe)
-            df_strike = df_opt[
-                df_opt["StrikePrice"].astype(float) == float(find_strike)
-            ]
-            print(f"3. After StrikePrice filter: {len(df_strike)} rows remaining")
-            if df_strike.empty and not df_opt.empty:
-                print(
-                    f"ERROR: Looking for {float(find_strike)}. Available Strikes: {df_opt['StrikePrice'].head(10).unique()}..."
-                )
-
-            # Step 4: Expiry Date
-            df_final = df_strike[df_strike["Expiry"] == self._data.expiry]
-            print(f"4. After Expiry filter: {len(df_final)} rows remaining")
-            if df_final.empty and not df_strike.empty:
-                print(
-                    f"ERROR: Looking for Expiry '{self._data.expiry}'. Available Expiries: {df_strike['Expiry'].unique()}"
-                )
-
-            # Final Check
-            if not df_final.empty:
-                print("SUCCESS: Option found!")
-                return df_final.iloc[0]
-
-            raise Exception("Option not found during step-by-step filtering.")
+            raise Exception(
+                f"Option not found for {self._data.symbol} {c_or_p} {find_strike} {self._data.expiry}"
+            )
         except Exception as e:
             logging.error(f"{e} Symbol: while find_option_by_distance")
             print_exc()
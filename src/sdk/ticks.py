@@ -0,0 +1,91 @@
+import threading
+from time import time
+
+import numpy as np
+
+# columns of a tick row
+TS, LTP, VOLUME, BID, ASK = range(5)
+
+# snapquote fields in the same order as the columns above
+FIELDS = ("ft", "lp", "v", "bp1", "sp1")
+
+
+class TickRing:
+    """
+    fixed capacity ring of (exchange_ts, ltp, volume, bid, ask) rows
+    preallocated once, so recording a tick never allocates
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._rows = np.zeros((capacity, len(FIELDS)), dtype=np.float64)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def append(self, row):
+        with self._lock:
+            self._rows[self._count % self.capacity] = row
+            self._count += 1
+
+    def latest(self):
+        """returns the newest row or None if nothing is recorded yet"""
+        with self._lock:
+            if not self._count:
+                return None
+            return self._rows[(self._count - 1) % self.capacity].copy()
+
+    def last(self, n=None):
+        """returns up to n newest rows, oldest first"""
+        with self._lock:
+            size = min(self._count, self.capacity)
+            n = size if n is None else min(n, size)
+            idx = np.arange(self._count - n, self._count) % self.capacity
+            return self._rows[idx]
+
+    def since(self, exchange_ts):
+        """returns rows with exchange timestamp at or after exchange_ts"""
+        rows = self.last()
+        return rows[np.searchsorted(rows[:, TS], exchange_ts, side="left") :]
+
+
+class TickStore:
+    """
+    one TickRing per ws key. snapquote updates only carry the fields
+    that changed, so missing fields are carried forward from the
+    previous tick of the same key.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._rings = {}
+        self._prev = {}
+
+    def add(self, key, message):
+        prev = self._prev.get(key)
+        if prev is None:
+            prev = self._prev[key] = np.zeros(len(FIELDS), dtype=np.float64)
+
+        changed = False
+        for col, field in enumerate(FIELDS):
+            val = message.get(field)
+            if val is not None:
+                prev[col] = float(val)
+                changed = True
+        if not changed:
+            return None
+        # a tick without exchange time is stamped when it arrived, the
+        # previous tick's time would keep candles from rolling over
+        if message.get("ft") is None:
+            prev[TS] = time()
+
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = TickRing(self.capacity)
+        ring.append(prev)
+        return prev
+
+    def get(self, key):
+        return self._rings.get(key)
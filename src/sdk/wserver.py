@@ -1,18 +1,155 @@
 from src.constants import logging_func
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
 from stock_brokers.flattrade.NorenApi import FeedType
+from src.sdk.ticks import LTP, TS, VOLUME, TickStore
+from src.providers.latency import Latency
 
 logging = logging_func(__name__)
 
 
+class TickDispatch:
+    """
+    coalesces websocket quote updates into a set of changed keys
+    so the main loop sleeps till something actually moves
+    """
+
+    def __init__(self):
+        self._changed = set()
+        self._cond = threading.Condition()
+
+    def push(self, key):
+        with self._cond:
+            self._changed.add(key)
+            self._cond.notify()
+
+    def wait(self, timeout=None):
+        """returns the keys changed since the last call, empty on timeout"""
+        with self._cond:
+            if not self._changed:
+                self._cond.wait(timeout)
+            changed, self._changed = self._changed, set()
+        return changed
+
+
+class QuoteStore:
+    """
+    ltp per ws key with a global version counter. every update bumps the
+    version and moves the key to the end of an ordered log, so asking
+    for the changes since version N only walks the keys that changed.
+    """
+
+    def __init__(self, ltp):
+        # shared with Wserver.ltp so plain dict readers keep working
+        self.ltp = ltp
+        self.version = 0
+        self._seq = OrderedDict()
+        # monotonic time of the last quote per key
+        self._updated_at = {}
+        # keys not quoted again since the feed reconnected
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def update(self, key, val):
+        with self._lock:
+            self.version += 1
+            self.ltp[key] = val
+            self._seq[key] = self.version
+            self._seq.move_to_end(key)
+            self._updated_at[key] = time.monotonic()
+            self._stale.discard(key)
+
+    def updated_at(self, key):
+        """monotonic time of the last quote for key, 0 if never quoted"""
+        return self._updated_at.get(key, 0.0)
+
+    def discard(self, key):
+        """forgets an unsubscribed key so its last price is not served"""
+        with self._lock:
+            self.ltp.pop(key, None)
+            self._seq.pop(key, None)
+            self._updated_at.pop(key, None)
+            self._stale.discard(key)
+
+    def mark_stale(self):
+        """every quote held now is stale till its key ticks again"""
+        with self._lock:
+            self._stale = set(self._seq)
+
+    def stale(self, max_age=0):
+        """
+        returns keys marked stale plus, when max_age is set, keys older
+        than max_age seconds. the update log is oldest first, so only
+        the old keys at its front are walked.
+        """
+        with self._lock:
+            stale = set(self._stale)
+            if max_age:
+                cutoff = time.monotonic() - max_age
+                for key in self._seq:
+                    if self._updated_at[key] >= cutoff:
+                        break
+                    stale.add(key)
+            return stale
+
+    def changes_since(self, version):
+        """returns (current version, {key: ltp}) updated after version"""
+        with self._lock:
+            changed = {}
+            for key in reversed(self._seq):
+                if self._seq[key] <= version:
+                    break
+                changed[key] = self.ltp[key]
+            return self.version, changed
+
+
+@dataclass
+class GapStats:
+    """websocket outages seen by the reconnect supervisor"""
+
+    disconnects: int = 0
+    reconnects: int = 0
+    last_gap_secs: float = 0.0
+    max_gap_secs: float = 0.0
+    total_gap_secs: float = 0.0
+
+
 class Wserver:
     # flag to tell us if the websocket is open
     socket_opened = False
     ltp = {}
 
-    def __init__(self, session, tokens):
+    def __init__(self, session, tokens, stale_after=0, max_backoff=30, recorder=None):
+        """
+        stale_after: seconds without a quote before the key is stale,
+                     0 marks quotes stale only while the feed is down
+        max_backoff: upper bound in seconds between reconnect attempts
+        recorder: TickRecorder that keeps every tick on disk, if any
+        """
         self.api = session
         self.tokens = tokens
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
+        self.gaps = GapStats()
+        # every key subscribed so far, replayed after a reconnect
+        self._subscriptions = set(tokens)
+        self._opened = threading.Event()
+        self._closed_at = None
+        self._supervisor = None
+        self.dispatch = TickDispatch()
+        self.quotes = QuoteStore(self.ltp)
+        # last N snapquote ticks per key with exchange timestamps
+        self.ticks = TickStore()
+        self.recorder = recorder
+        # ws key -> Future resolved by the first quote for that key
+        self._waiting = {}
+        self._waiting_lock = threading.Lock()
+        self._start()
+
+    def _start(self):
         self.api.broker.start_websocket(
             order_update_callback=self.event_handler_order_update,
             subscribe_callback=self.event_handler_quote_update,
@@ -22,12 +159,68 @@ class Wserver:
         )
 
     def open_callback(self):
+        now = time.monotonic()
+        if self._closed_at is not None:
+            gap = now - self._closed_at
+            self.gaps.reconnects += 1
+            self.gaps.last_gap_secs = gap
+            self.gaps.max_gap_secs = max(self.gaps.max_gap_secs, gap)
+            self.gaps.total_gap_secs += gap
+            self._closed_at = None
+            logging.warning(f"ws reopened after {gap:.1f}s, {self.gaps}")
+        # quotes received before this point are from the previous session
+        self.quotes.mark_stale()
         self.socket_opened = True
-        self.api.broker.subscribe(self.tokens, feed_type=FeedType.SNAPQUOTE)
+        self._opened.set()
+        # replay everything subscribed before the socket dropped
+        keys = list(dict.fromkeys(list(self.tokens) + sorted(self._subscriptions)))
+        self.api.broker.subscribe(keys, feed_type=FeedType.SNAPQUOTE)
 
     def close_callback(self):
         logging.warning("ws closed")
         self.socket_opened = False
+        self._opened.clear()
+        if self._closed_at is None:
+            self._closed_at = time.monotonic()
+            self.gaps.disconnects += 1
+        if self._supervisor is None or not self._supervisor.is_alive():
+            self._supervisor = threading.Thread(
+                target=self._reconnect, name="ws-reconnect", daemon=True
+            )
+            self._supervisor.start()
+
+    def _reconnect(self, initial=1.0):
+        """
+        restarts the websocket with exponential backoff till it opens.
+        each attempt gets the whole delay to connect and is torn down
+        before the next one, so only one socket is ever left running.
+        """
+        delay = initial
+        while not self._opened.wait(delay):
+            logging.warning(f"ws still closed after {delay}s, reconnecting")
+            try:
+                self.api.broker.close_websocket()
+            except Exception as e:
+                logging.warning(f"{e} while closing previous websocket")
+            try:
+                self._start()
+            except Exception as e:
+                logging.error(f"{e} while reconnecting websocket")
+            delay = min(delay * 2, self.max_backoff)
+
+    def is_stale(self, key):
+        """
+        a quote is stale while the socket is down, till it ticks again
+        after a reconnect, or when it is older than stale_after seconds
+        """
+        if not self.socket_opened or key in self.quotes._stale:
+            return True
+        updated_at = self.quotes.updated_at(key)
+        return bool(self.stale_after) and time.monotonic() - updated_at > self.stale_after
+
+    def stale_keys(self):
+        """stale keys of an open socket, costs O(stale keys)"""
+        return self.quotes.stale(self.stale_after)
 
     def error_callback(self, error):
         print(f"ws error: {error}")
@@ -36,16 +229,55 @@ class Wserver:
         logging.info(f"order: {message}")
 
     def event_handler_quote_update(self, message):
+        key = message["e"] + "|" + message["tk"]
+        # a quote in flight when its key was unsubscribed is dropped
+        if key not in self._subscriptions:
+            return
+        row = self.ticks.add(key, message)
+        if row is not None and self.recorder is not None:
+            self.recorder.record(key, row[TS], row[LTP], row[VOLUME])
         val = message.get("lp", False)
         if val:
-            self.ltp[message["e"] + "|" + message["tk"]] = val
+            Latency.received(key)
+            self.quotes.update(key, val)
+            self.dispatch.push(key)
+            with self._waiting_lock:
+                future = self._waiting.pop(key, None)
+            if future is not None:
+                future.set_result(val)
 
     def unsubscribe(self, tokens):
+        self._subscriptions.difference_update(tokens)
         self.api.broker.unsubscribe(tokens, feed_type=FeedType.SNAPQUOTE)
 
     def subscribe(self, tokens):
+        self._subscriptions.update(tokens)
         self.api.broker.subscribe(tokens, feed_type=FeedType.SNAPQUOTE)
 
+    def subscribe_many(self, keys):
+        """
+        subscribes all keys in a single frame and returns {key: Future}
+        each future resolves with the ltp of the first quote for its key,
+        keys that are subscribed and quoted already resolve immediately
+        """
+        futures = {}
+        missing = []
+        with self._waiting_lock:
+            for key in keys:
+                val = self.ltp.get(key) if key in self._subscriptions else None
+                if val is not None:
+                    future = Future()
+                    future.set_result(val)
+                else:
+                    future = self._waiting.get(key)
+                    if future is None:
+                        future = self._waiting[key] = Future()
+                    missing.append(key)
+                futures[key] = future
+        if missing:
+            self.subscribe(missing)
+        return futures
+
 
 if __name__ == "__main__":
     from src.sdk.helper import Helper
@@ -1,13 +1,12 @@
 from traceback import print_exc
 
-import pendulum as pdlm
-from toolkit.kokoo import is_time_past, timer
-
 from src.constants import logging_func
-from src.providers.candle_manager import CandleManager
+from src.providers.candle_manager import CandleManager, CLOSE, LOW, OPEN
+from src.providers.clock import Clock
 from src.sdk.utils import calc_highest_target
 
 from src.providers.risk_manager import RiskManager
+from src.providers.latency import Latency
 
 logging = logging_func(__name__)
 
@@ -24,19 +23,25 @@ class Ram:
         self.stop_time = kwargs["stop_time"]
         self.rm: RiskManager = kwargs["rm"]
         self._option_exchange = kwargs["option_exchange"]
+        # source of exchange tick times, candles fall back to the clock
+        self._quote = kwargs.get("quote", None)
+        self._ws_key = f"{self._option_exchange}|{kwargs['option_token']}"
         self._quantity = kwargs["quantity"]
+        # seconds the engine waits for this strategy when running threaded
+        self.deadline = kwargs.get("deadline", None)
 
         default_time = {"hour": 9, "minute": 14, "second": 59}
         low_candle_time = kwargs.get("low_candle_time", default_time)
         self._stop = None
         while self._stop is None:
-            timer(0.5)
             self._stop = kwargs["rest"].history(
                 token=kwargs["option_token"],
                 exchange=kwargs["option_exchange"],
-                loc=pdlm.now("Asia/Kolkata").replace(**low_candle_time),
+                loc=Clock.now().replace(**low_candle_time),
                 key="intl",
             )
+            if self._stop is None:
+                Clock.sleep(0.5)
 
         self.prev_trade_at = self._stop
 
@@ -67,19 +72,24 @@ class Ram:
 
     def wait_for_breakout(self):
         try:
-            candles = self._candle.get_candles()
-            curr_idx = len(candles)
-            
+            ring = self._candle.ring()
+            # bars opened so far, unlike len() it keeps growing once the
+            # ring is full so armed_idx still tells bars apart
+            curr_idx = ring.total
+
             # Need at least 1 candle
             if curr_idx < 1:
                 return
-            
+
+            # newest three bars as a view into the ring, nothing is copied
+            bars = ring.last(3)
+
             # Current candle
-            curr = candles[-1]
-            
+            curr_low, curr_close = bars[-1, LOW], bars[-1, CLOSE]
+
             if (
-                curr["low"] <= self._stop
-                and curr["close"] > self._stop
+                curr_low <= self._stop
+                and curr_close > self._stop
                 and self._armed_idx != curr_idx
             ):
                 self._on_signal(curr_idx)
@@ -89,22 +99,18 @@ class Ram:
             # Need at least 3 completed candles for 2-candle pattern
             if curr_idx < 4 or (curr_idx - self._armed_idx) < 3:
                 return
-            
-            # Need at least 3 candles back (-1 is current, -2 and -3 are previous)
-            if curr_idx < 3:
-                return
-            
-            c2 = candles[-3]  # 3rd candle from end
-            c1 = candles[-2]  # 2nd candle from end
-            
+
+            c2 = bars[-3]  # 3rd candle from end
+            c1 = bars[-2]  # 2nd candle from end
+
             if (
-                c2["close"] < c2["open"]
-                and c1["close"] > c1["open"]
-                and curr["close"] < self._target
-                and curr["close"] > self.prev_trade_at
+                c2[CLOSE] < c2[OPEN]
+                and c1[CLOSE] > c1[OPEN]
+                and curr_close < self._target
+                and curr_close > self.prev_trade_at
             ):
                 self._on_signal(curr_idx)
-                self.prev_trade_at = curr["close"]
+                self.prev_trade_at = float(curr_close)
 
         except Exception as e:
             logging.error(f"Wait for breakout: {e}")
@@ -117,7 +123,7 @@ class Ram:
                 pos_id=self.pos_id,
                 last_price=self._last_price,
             )
-            if is_time_past(self.stop_time) and status <= 0:
+            if Clock.is_past(self.stop_time) and status <= 0:
                 self._removable = True
                 self.pos_id = None
 
@@ -132,17 +138,21 @@ class Ram:
             ltp = quotes.get(self._tradingsymbol)
             if ltp is None:
                 return
+            Latency.begin(self.strategy, self._tradingsymbol, self._ws_key)
             self._last_price = float(ltp)
-            self._candle.add_tick(self._last_price)
+            ts = self._quote.tick_time(self._tradingsymbol) if self._quote else None
+            self._candle.add_tick(self._last_price, ts)
 
             # no need to wait for breakout if time is up
-            if not is_time_past(self.stop_time) and not self._removable:
+            if not Clock.is_past(self.stop_time) and not self._removable:
                 self.wait_for_breakout()
 
             # if there are no positions then there is nothing to manage
             if self.pos_id and self._last_price > self._target:
                 self.try_exiting_trade()
 
+            Latency.end()
+
         except Exception as e:
             logging.error(f"Run Error {self._tradingsymbol}: {e}")
             print_exc()
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Tests for the concurrent builder stages in src/core/build.py
+Run with: pytest tests/unit/test_build.py -v
+"""
+
+import time
+from unittest.mock import Mock, patch
+
+from src.core.build import stuff_atm, stuff_tradingsymbols
+
+
+def slow_ltp(exchange, token):
+    time.sleep(0.1)
+    return 24500.0
+
+
+def test_stuff_atm_fetches_underlyings_concurrently():
+    rest = Mock()
+    rest.ltp = Mock(side_effect=slow_ltp)
+    data = {k: {"exchange": "NSE", "token": str(i)} for i, k in enumerate("ABCDE")}
+
+    with patch("src.core.build.find_atm_fm_ltp", return_value=24400):
+        begin = time.monotonic()
+        out = stuff_atm(data, {"rest": rest})
+        elapsed = time.monotonic() - begin
+
+    assert rest.ltp.call_count == 5
+    assert all(v["atm"] == 24400 for v in out.values())
+    assert elapsed < 0.4
+
+
+def test_stuff_tradingsymbols_keeps_order():
+    def by_moneyness(ce_or_pe, param, quote):
+        time.sleep(0.05 if ce_or_pe == "CE" else 0)
+        return {"symbol": f"{param['base']}{ce_or_pe}", "ltp": 10.0, "token": "1"}
+
+    data = {
+        base: {"base": base, "method": {"moneyness": 1}} for base in ("NIFTY", "SENSEX")
+    }
+    meta = {"quote": Mock(), "rest": Mock(), "rm": Mock()}
+
+    with patch(
+        "src.core.build.find_tradingsymbols_by_moneyness", side_effect=by_moneyness
+    ):
+        lst = stuff_tradingsymbols(data, meta)
+
+    assert [p["tradingsymbol"] for p in lst] == [
+        "NIFTYCE",
+        "NIFTYPE",
+        "SENSEXCE",
+        "SENSEXPE",
+    ]
+    assert lst[0]["option_type"] == "CE"
@@ -3,94 +3,187 @@ Tests for CandleManager
 """
 import pytest
 import pendulum as pdlm
-from src.providers.candle_manager import CandleManager
+import numpy as np
+from src.providers.candle_manager import CLOSE, OPEN, START, CandleManager, CandleRing
+
+# 09:15:00 IST on a trading day, in epoch seconds
+BASE = pdlm.datetime(2025, 9, 18, 9, 15, tz="Asia/Kolkata").int_timestamp
 
 
 class TestCandleManager:
-    
+
     def test_first_tick_creates_current(self):
         """First tick should create current candle."""
         cm = CandleManager()
-        cm.add_tick(100.0)
-        
-        assert cm._current is not None
-        assert cm._current["open"] == 100.0
-        assert cm._current["close"] == 100.0
-    
+        cm.add_tick(100.0, ts=BASE)
+
+        candle = cm.get_candles()[-1]
+        assert candle["open"] == 100.0
+        assert candle["close"] == 100.0
+        assert candle["minute"] == BASE
+
     def test_tick_updates_ohlc(self):
         """Subsequent ticks update current candle OHLC."""
         cm = CandleManager()
-        cm.add_tick(100.0)
-        cm.add_tick(105.0)
-        cm.add_tick(98.0)
-        
-        assert cm._current["open"] == 100.0
-        assert cm._current["high"] == 105.0
-        assert cm._current["low"] == 98.0
-        assert cm._current["close"] == 98.0
-    
+        cm.add_tick(100.0, ts=BASE)
+        cm.add_tick(105.0, ts=BASE + 10)
+        cm.add_tick(98.0, ts=BASE + 20)
+
+        candle = cm.get_candles()[-1]
+        assert candle["open"] == 100.0
+        assert candle["high"] == 105.0
+        assert candle["low"] == 98.0
+        assert candle["close"] == 98.0
+
     def test_new_minute_closes_current(self):
-        """New minute should close current and move to completed."""
+        """A tick stamped in the next minute opens a new candle."""
         cm = CandleManager()
-        
-        # Set first minute
-        cm._current = {"open": 100, "high": 100, "low": 100, "close": 100, 
-                      "minute": pdlm.now("Asia/Kolkata").start_of("minute")}
-        
-        # Change to next minute
-        cm._current["minute"] = cm._current["minute"].add(minutes=1)
-        cm.add_tick(101.0)
-        
-        assert len(cm._completed) == 1
-        assert cm._current is not None
-    
+        cm.add_tick(100.0, ts=BASE + 59)
+        cm.add_tick(101.0, ts=BASE + 60)
+
+        candles = cm.get_candles()
+        assert len(candles) == 2
+        assert candles[0]["close"] == 100.0
+        assert candles[1]["open"] == 101.0
+        assert candles[1]["minute"] == BASE + 60
+
+    def test_bars_follow_exchange_time_not_arrival(self):
+        """Ticks arriving together but stamped apart land in their own bars."""
+        cm = CandleManager(clock=lambda: BASE + 1000)
+        cm.add_tick(100.0, ts=BASE + 5)
+        cm.add_tick(101.0, ts=BASE + 65)
+        cm.add_tick(102.0)  # no exchange time, falls back to the clock
+
+        assert [c["minute"] for c in cm.get_candles()] == [BASE, BASE + 60, BASE + 960]
+
+    def test_late_tick_moves_forming_bar(self):
+        cm = CandleManager()
+        cm.add_tick(100.0, ts=BASE + 60)
+        cm.add_tick(90.0, ts=BASE + 30)
+
+        assert len(cm) == 1
+        assert cm.get_candles()[-1]["low"] == 90.0
+
+    def test_timeframe_minutes_is_honoured(self):
+        cm = CandleManager(timeframe_minutes=5)
+        for i in range(10):
+            cm.add_tick(100.0 + i, ts=BASE + i * 60)
+
+        candles = cm.get_candles()
+        assert len(candles) == 2
+        assert candles[0] == {
+            "open": 100.0, "high": 104.0, "low": 100.0, "close": 104.0, "minute": BASE
+        }
+
+    def test_several_timeframes_from_one_stream(self):
+        cm = CandleManager(timeframe_minutes=1, timeframes=(3, 5, 15))
+        for i in range(15):
+            cm.add_tick(100.0 + i, ts=BASE + i * 60)
+
+        assert len(cm.get_candles(1)) == 11  # bounded by capacity
+        assert len(cm.get_candles(3)) == 5
+        assert len(cm.get_candles(5)) == 3
+        assert cm.get_candles(15) == [
+            {"open": 100.0, "high": 114.0, "low": 100.0, "close": 114.0, "minute": BASE}
+        ]
+
+    def test_transform_uses_bar_start_times(self):
+        cm = CandleManager()
+        cm.add_tick(100.0, ts=BASE)
+        cm.add_tick(101.0, ts=BASE + 120)
+
+        df = cm.transform()
+        assert list(df.columns) == ["dt", "open", "high", "low", "close"]
+        assert [t.strftime("%H:%M") for t in df["dt"]] == ["09:15", "09:17"]
+
     def test_get_candles_returns_list(self):
         """get_candles() should return list of dicts."""
         cm = CandleManager()
         cm.add_tick(100.0)
         cm.add_tick(101.0)
-        
+
         candles = cm.get_candles()
-        
+
         assert isinstance(candles, list)
         assert len(candles) > 0
         assert "open" in candles[0]
         assert "high" in candles[0]
         assert "low" in candles[0]
         assert "close" in candles[0]
-    
+
     def test_len_returns_candle_count(self):
         """len() should return candle count."""
         cm = CandleManager()
         cm.add_tick(100.0)
-        
+
         assert len(cm) == 1
-    
+
     def test_two_candle_pattern_access(self):
         """Can access -1, -2, -3 indices like ram.py does."""
         cm = CandleManager()
-        
-        # Add ticks for 3 different minutes
-        base = pdlm.now("Asia/Kolkata").start_of("minute")
-        
-        # Minute 0
-        cm._current = {"open": 100, "high": 105, "low": 98, "close": 103, "minute": base}
-        cm._completed.append(cm._current)
-        
-        # Minute 1
-        cm._current = {"open": 103, "high": 108, "low": 101, "close": 105, "minute": base.add(minutes=1)}
-        cm._completed.append(cm._current)
-        
-        # Current (minute 2)
-        cm._current = {"open": 105, "high": 110, "low": 103, "close": 107, "minute": base.add(minutes=2)}
-        
+        for minute, (o, h, low, c) in enumerate(
+            [(100, 105, 98, 103), (103, 108, 101, 105), (105, 110, 103, 107)]
+        ):
+            ts = BASE + minute * 60
+            for price in (o, h, low, c):
+                cm.add_tick(price, ts=ts)
+
         candles = cm.get_candles()
-        
+
         # Direct access like ram.py now uses
         assert candles[-1]["close"] == 107
         assert candles[-2]["close"] == 105
         assert candles[-3]["close"] == 103
+        assert candles[-2]["high"] == 108
+
+
+class TestCandleRing:
+
+    def _ring(self, bars, capacity=4):
+        ring = CandleRing(60, capacity)
+        for i in range(bars):
+            ring.update(BASE + i * 60, 100.0 + i)
+        return ring
+
+    def test_last_is_a_view_across_the_wrap(self):
+        ring = self._ring(7)  # slots wrapped, newest bar is in slot 2
+
+        bars = ring.last(3)
+
+        assert np.shares_memory(bars, ring._buf)
+        assert bars[:, CLOSE].tolist() == [104.0, 105.0, 106.0]
+        assert ring.last(10).shape[0] == 4
+
+    def test_view_sees_later_ticks(self):
+        ring = self._ring(5)
+        bars = ring.last(2)
+
+        ring.update(BASE + 4 * 60 + 30, 90.0)
+
+        assert bars[-1, CLOSE] == 90.0
+        assert ring[-1][START] == BASE + 4 * 60
+
+    def test_indexing_and_iteration(self):
+        ring = self._ring(6)
+
+        assert ring[-1][OPEN] == 105.0
+        assert ring[0][OPEN] == 102.0
+        assert [bar[OPEN] for bar in ring] == [102.0, 103.0, 104.0, 105.0]
+        with pytest.raises(IndexError):
+            ring[-5]
+
+    def test_total_keeps_counting_when_full(self):
+        ring = self._ring(6)
+
+        assert len(ring) == 4
+        assert ring.total == 6
+
+    def test_empty_ring(self):
+        ring = CandleRing(60)
+
+        assert ring.last(3).shape == (0, 5)
+        assert list(ring) == []
 
 
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,85 @@
+"""
+Tests for the shared clock
+Run with: pytest tests/unit/test_clock.py -v
+"""
+
+from unittest.mock import Mock
+
+import pendulum as pdlm
+import pytest
+
+from src.core.engine import Engine
+from src.providers.candle_manager import CandleManager
+from src.providers.clock import Clock, SimClock
+from src.providers.time_manager import SimpleBucket, TimeManager
+
+NINE = pdlm.datetime(2025, 9, 18, 9, 0, tz="Asia/Kolkata").int_timestamp
+
+
+@pytest.fixture
+def sim():
+    clock = SimClock(NINE)
+    Clock.use(clock)
+    yield clock
+    Clock.use()
+
+
+class TestClock:
+    def test_frozen_now_is_built_once(self, sim):
+        Clock.freeze()
+        sim.advance(5)
+
+        assert Clock.time() == NINE
+        assert Clock.now() is Clock.now()
+        assert Clock.live() == NINE + 5
+
+        Clock.thaw()
+        assert Clock.time() == NINE + 5
+
+    @pytest.mark.parametrize(
+        "at, past",
+        [("9:00", True), ("9:01", False), ({"hour": 8, "minute": 59}, True)],
+    )
+    def test_is_past(self, sim, at, past):
+        assert Clock.is_past(at) is past
+
+    def test_sleep_advances_simulated_time(self, sim):
+        Clock.sleep(2.5)
+        assert Clock.time() == NINE + 2.5
+
+
+class TestSimulatedTime:
+    def test_time_manager_and_candles_follow_the_clock(self, sim):
+        tm = TimeManager({"minutes": 1})
+        cm = CandleManager()
+
+        cm.add_tick(100.0)
+        sim.advance(61)
+        cm.add_tick(101.0)
+
+        assert tm.current_index == 0
+        assert [c["minute"] for c in cm.get_candles()] == [NINE, NINE + 60]
+
+    def test_bucket_opens_when_time_is_fast_forwarded(self, sim):
+        bucket = SimpleBucket({"minutes": 1})
+        bucket.set_bucket()
+        assert not bucket.is_bucket()
+
+        sim.advance(61)
+        assert bucket.is_bucket()
+
+    def test_engine_tick_shares_one_now(self, sim):
+        seen = []
+
+        def run(positions, quotes):
+            seen.append(Clock.time())
+            sim.advance(1)  # a slow strategy does not move the tick time
+
+        strategies = [Mock(_tradingsymbol=s, _removable=False, run=run) for s in "AB"]
+        engine = Engine(start="9:00", stop="15:30")
+        engine.add_strategy(strategies)
+
+        engine.tick(Mock(), Mock(), Mock())
+
+        assert seen == [NINE, NINE]
+        assert Clock.time() == NINE + 2
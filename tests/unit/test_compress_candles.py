@@ -1,6 +1,6 @@
 import pandas as pd
 
-from src.sdk.helper import compress_candles
+from src.sdk.helper import compress_candles, compress_many
 
 
 def test_compress_candles_daily_ohlc(monkeypatch):
@@ -54,3 +54,109 @@ def test_compress_candles_daily_ohlc(monkeypatch):
     }
 
     assert result == expected
+
+
+def test_compress_candles_skips_blank_values(monkeypatch):
+    monkeypatch.setattr(
+        pd.Timestamp, "now", lambda tz=None: pd.Timestamp("2025-09-19 10:00:00", tz=tz)
+    )
+    data_now = [
+        {
+            "time": "18-09-2025 09:15:00",
+            "into": "",
+            "inth": "105",
+            "intl": "99",
+            "intc": "104",
+            "v": "1000",
+            "oi": "50",
+        },
+        {
+            "time": "18-09-2025 09:16:00",
+            "into": "101",
+            "inth": "110",
+            "intl": "98",
+            "intc": "108",
+            "v": "2000",
+            "oi": "55",
+        },
+        {
+            "time": "18-09-2025 15:29:00",
+            "into": "108",
+            "inth": "109",
+            "intl": "107",
+            "intc": "",
+            "v": "",
+            "oi": "",
+        },
+    ]
+
+    result = compress_candles(data_now, tz="Asia/Kolkata")
+
+    # the blank close of the last minute must not drop the day
+    assert result == {
+        "into": 101.0,
+        "inth": 110.0,
+        "intl": 98.0,
+        "intc": 108.0,
+        "v": 3000.0,
+        "oi": 55.0,
+        "date": "2025-09-18",
+    }
+
+
+def minute_bars(day, count, start_price=100.0):
+    """count one minute candles from 09:15 on day, newest first like the broker"""
+    start = pd.Timestamp(f"{day} 09:15:00")
+    rows = []
+    for i in range(count):
+        price = start_price + i
+        rows.append(
+            {
+                "time": (start + pd.Timedelta(minutes=i)).strftime("%d-%m-%Y %H:%M:%S"),
+                "into": str(price),
+                "inth": str(price + 2),
+                "intl": str(price - 1),
+                "intc": str(price + 1),
+                "v": "10",
+            }
+        )
+    return rows[::-1]
+
+
+def test_compress_candles_intraday_timeframes():
+    data = minute_bars("2025-09-18", 30)
+
+    bars = compress_candles(
+        data, return_last_only=False, exclude_today=False, timeframe="15m"
+    )
+
+    assert [b["time"] for b in bars] == ["18-09-2025 09:15:00", "18-09-2025 09:30:00"]
+    assert bars[0] == {
+        "into": 100.0,
+        "inth": 116.0,
+        "intl": 99.0,
+        "intc": 115.0,
+        "v": 150.0,
+        "date": "2025-09-18",
+        "time": "18-09-2025 09:15:00",
+    }
+    five = compress_candles(data, return_last_only=False, exclude_today=False, timeframe="5m")
+    assert len(five) == 6
+
+
+def test_compress_many_matches_one_by_one():
+    data = {
+        "NIFTY": minute_bars("2025-09-17", 20) + minute_bars("2025-09-18", 20, 200),
+        "BANKNIFTY": minute_bars("2025-09-18", 10, 500),
+        "EMPTY": [],
+    }
+
+    result = compress_many(data, timeframe="1D")
+
+    for symbol in ("NIFTY", "BANKNIFTY"):
+        expected = compress_candles(
+            data[symbol], return_last_only=False, exclude_today=False
+        )
+        assert result[symbol] == expected
+    assert [b["date"] for b in result["NIFTY"]] == ["2025-09-17", "2025-09-18"]
+    assert result["EMPTY"] == []
@@ -335,6 +335,110 @@ class TestEngineIntegration:
         assert mock_rest.positions.call_count == 1
 
 
+class TestEngineThreadPool:
+    """Threaded execution mode with per strategy deadlines"""
+
+    def _strategy(self, run, deadline=None):
+        strgy = Mock()
+        strgy.run = Mock(side_effect=run)
+        strgy._removable = False
+        strgy.deadline = deadline
+        return strgy
+
+    def _tick(self, engine):
+        mock_rest = Mock()
+        mock_rest.positions = Mock(return_value=[])
+        mock_quote = Mock()
+        mock_quote.get_quotes = Mock(return_value={})
+        with patch("src.core.engine.generate_table"):
+            engine.tick(mock_rest, mock_quote, Mock())
+
+    def test_slow_strategy_does_not_stall_others(self):
+        """A strategy blocked on order placement should not delay the rest"""
+        from src.core.engine import Engine
+
+        release = threading.Event()
+        fast_done = threading.Event()
+        slow = self._strategy(lambda *a: release.wait(2))
+        fast = self._strategy(lambda *a: fast_done.set())
+
+        engine = Engine(start={}, stop={}, workers=2, deadline=0.05)
+        engine.add_strategy([slow, fast])
+
+        begin = time.monotonic()
+        self._tick(engine)
+        elapsed = time.monotonic() - begin
+        release.set()
+
+        assert fast_done.is_set()
+        assert elapsed < 1.0
+        assert engine.stats[slow].overruns == 1
+        assert engine.stats[fast].overruns == 0
+        engine.shutdown()
+
+    def test_busy_strategy_is_skipped_next_tick(self):
+        """A strategy still running is not queued behind itself"""
+        from src.core.engine import Engine
+
+        release = threading.Event()
+        slow = self._strategy(lambda *a: release.wait(2), deadline=0.02)
+
+        engine = Engine(start={}, stop={}, workers=2)
+        engine.add_strategy([slow])
+
+        self._tick(engine)
+        self._tick(engine)
+        release.set()
+
+        assert slow.run.call_count == 1
+        assert engine.stats[slow].skipped == 1
+        engine.shutdown()
+
+    def test_removable_strategy_kept_until_run_returns(self):
+        """A strategy marked removable mid run stays until its thread finishes"""
+        from src.core.engine import Engine
+
+        release = threading.Event()
+
+        def run(*args):
+            slow._removable = True
+            release.wait(2)
+
+        slow = self._strategy(run, deadline=0.02)
+
+        engine = Engine(start={}, stop={}, workers=1)
+        engine.add_strategy([slow])
+
+        self._tick(engine)
+        assert slow in engine.strategies
+
+        release.set()
+        engine._pending[slow].result(timeout=1)
+        self._tick(engine)
+        assert slow not in engine.strategies
+        assert slow.run.call_count == 1
+        engine.shutdown()
+
+    def test_removed_strategy_releases_its_subscription(self):
+        """Dropping a removable strategy hands its symbol back to QuoteApi"""
+        from src.core.engine import Engine
+
+        strgy = self._strategy(lambda *a: None)
+        strgy._removable = True
+        strgy._tradingsymbol = "NIFTY_CE"
+        mock_quote = Mock()
+        mock_quote.get_quotes = Mock(return_value={})
+
+        engine = Engine(start={}, stop={})
+        engine.add_strategy([strgy])
+        with patch("src.core.engine.generate_table"):
+            engine.tick(Mock(), mock_quote, Mock())
+
+        assert engine.strategies == []
+        mock_quote.release.assert_called_once_with("NIFTY_CE")
+        mock_quote.prune.assert_called_once()
+
+
 if __name__ == "__main__":
     import pytest
 
@@ -0,0 +1,113 @@
+"""
+Tests for the in memory intraday candle cache behind RestApi.history
+Run with: pytest tests/unit/test_intraday.py -v
+"""
+
+import threading
+from unittest.mock import Mock
+
+import pendulum as pdlm
+
+from src.sdk.helper import RestApi
+from src.sdk.intraday import IntradayHistory, normalize, parse_times
+
+
+def bar(minute, low):
+    t = pdlm.today("Asia/Kolkata").replace(hour=9, minute=minute)
+    return {"time": t.format("DD-MM-YYYY HH:mm:ss"), "intl": str(low), "inth": "200"}
+
+
+def at(minute):
+    return pdlm.today("Asia/Kolkata").replace(hour=9, minute=minute)
+
+
+class TestParse:
+    def test_parse_times_matches_pendulum(self):
+        epochs = parse_times(["18-08-2025 09:30:00", "18-08-2025 23:29:00"])
+        expected = [
+            pdlm.datetime(2025, 8, 18, 9, 30, tz="Asia/Kolkata").int_timestamp,
+            pdlm.datetime(2025, 8, 18, 23, 29, tz="Asia/Kolkata").int_timestamp,
+        ]
+        assert epochs.tolist() == expected
+
+    def test_normalize_sorts_a_full_mcx_day(self):
+        start = pdlm.datetime(2025, 8, 18, 9, 0, tz="Asia/Kolkata")
+        data = [
+            {"time": start.add(minutes=m).format("DD-MM-YYYY HH:mm:ss"), "intc": str(m)}
+            for m in reversed(range(900))
+        ]
+        data.append({"stat": "Ok"})  # rows without time are ignored
+
+        epochs, rows = normalize(data)
+
+        assert len(rows) == 900
+        assert (epochs[1:] - epochs[:-1] == 60).all()
+        assert rows[0]["intc"] == "0"
+        assert epochs[0] == start.int_timestamp
+
+
+class TestIntradayHistory:
+    def test_concurrent_callers_share_one_download(self):
+        cache = IntradayHistory(ttl=60)
+        fetch = Mock(return_value=[bar(16, 95), bar(15, 90)])
+
+        threads = [
+            threading.Thread(target=cache.get, args=("NFO", "1", at(15), fetch))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fetch.call_count == 1
+
+    def test_only_newer_bars_are_downloaded(self):
+        cache = IntradayHistory(ttl=0)
+        fetch = Mock(return_value=[bar(16, 95), bar(15, 90)])
+        assert cache.get("NFO", "1", 0, fetch)["intl"] == "95"
+
+        # the partial 09:16 bar comes back final along with 09:17
+        fetch.return_value = [bar(17, 80), bar(16, 85)]
+        assert cache.get("NFO", "1", 0, fetch)["intl"] == "80"
+
+        fm = fetch.call_args.args[0]
+        assert fm == at(16).timestamp()
+        assert cache.get("NFO", "1", 1, fetch)["intl"] == "85"
+        assert cache.get("NFO", "1", -1, fetch)["intl"] == "90"
+        assert cache.get("NFO", "1", -4, fetch) is None
+
+    def test_final_bar_is_served_from_memory(self):
+        cache = IntradayHistory(ttl=0)
+        fetch = Mock(return_value=[bar(16, 95), bar(15, 90)])
+
+        assert cache.get("NFO", "1", at(15), fetch)["intl"] == "90"
+        assert cache.get("NFO", "1", at(15), fetch)["intl"] == "90"
+        assert fetch.call_count == 1
+
+    def test_bar_not_formed_yet(self):
+        cache = IntradayHistory(ttl=0)
+        fetch = Mock(return_value=[bar(15, 90)])
+
+        assert cache.get("NFO", "1", at(20), fetch) is None
+        assert fetch.call_count == 1
+
+
+class TestRestHistory:
+    def test_history_reads_key_of_cached_candle(self):
+        api = Mock()
+        api.historical = Mock(return_value=[bar(16, 95), bar(15, 90)])
+        rest = RestApi(api)
+        rest._intraday = IntradayHistory()
+
+        assert rest.history("NFO", 1, at(15), "intl") == 90.0
+        assert rest.history("NFO", 1, at(15), "inth") == 200.0
+        assert api.historical.call_count == 1
+
+    def test_non_list_response(self):
+        api = Mock()
+        api.historical = Mock(return_value=None)
+        rest = RestApi(api)
+        rest._intraday = IntradayHistory()
+
+        assert rest.history("NFO", 1, -1, "intl") is None
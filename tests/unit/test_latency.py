@@ -0,0 +1,71 @@
+"""
+Tests for tick to decision latency histograms
+Run with: pytest tests/unit/test_latency.py -v
+"""
+
+import pytest
+
+from src.providers.latency import Histogram, Latency
+
+
+@pytest.fixture(autouse=True)
+def clean_latency():
+    Latency.reset()
+    yield
+    Latency.reset()
+
+
+class TestHistogram:
+    def test_percentiles_within_a_bucket(self):
+        hist = Histogram()
+        for ns in [1_000_000] * 99 + [50_000_000]:
+            hist.record(ns)
+
+        summary = hist.summary()
+        assert summary["count"] == 100
+        assert 1.0 <= summary["p50"] <= 1.2
+        assert summary["max"] == 50.0
+        assert summary["p99"] <= summary["max"]
+
+    def test_empty_histogram(self):
+        assert Histogram().summary() == {"count": 0, "p50": 0, "p99": 0, "max": 0}
+
+
+class TestLatency:
+    def test_stages_recorded_per_strategy_and_symbol(self):
+        Latency.received("NFO|1")
+        Latency.begin("ram", "NIFTYCE", "NFO|1")
+        Latency.mark("decision")
+        Latency.mark("order")
+        Latency.end()
+
+        summary = Latency.summary()
+        assert set(summary["strategy"]["ram"]) == {"run", "decision", "order", "done"}
+        assert set(summary["symbol"]["NIFTYCE"]) == {"run", "decision", "order", "done"}
+
+    def test_mark_without_trace_is_ignored(self):
+        Latency.mark("decision")
+        assert Latency.summary() == {"strategy": {}, "symbol": {}}
+
+    def test_same_quote_is_traced_once(self):
+        """polling reruns a strategy against an unchanged quote"""
+        Latency.received("NFO|1")
+        for _ in range(3):
+            Latency.begin("ram", "NIFTYCE", "NFO|1")
+            Latency.end()
+
+        assert Latency.summary()["strategy"]["ram"]["run"]["count"] == 1
+
+        Latency.received("NFO|1")
+        Latency.begin("ram", "NIFTYCE", "NFO|1")
+        Latency.end()
+        assert Latency.summary()["strategy"]["ram"]["run"]["count"] == 2
+
+    def test_dump_writes_json(self, tmp_path):
+        Latency.received("NFO|1")
+        Latency.begin("ram", "NIFTYCE", "NFO|1")
+        Latency.end()
+
+        out = tmp_path / "latency.json"
+        Latency.dump(str(out))
+        assert '"NIFTYCE"' in out.read_text()
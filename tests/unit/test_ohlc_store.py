@@ -0,0 +1,134 @@
+"""
+Tests for the on disk daily/intraday OHLC store
+Run with: pytest tests/unit/test_ohlc_store.py -v
+"""
+
+from unittest.mock import Mock
+
+import pendulum as pdlm
+
+from src.providers.clock import Clock, SimClock
+from src.sdk.helper import RestApi
+from src.sdk.ohlc_store import OhlcStore
+
+
+def candle(day, hhmm, o, h, low, c, v="10"):
+    t = day.replace(hour=int(hhmm[:2]), minute=int(hhmm[2:]))
+    return {
+        "time": t.format("DD-MM-YYYY HH:mm:ss"),
+        "into": o,
+        "inth": h,
+        "intl": low,
+        "intc": c,
+        "v": v,
+    }
+
+
+TODAY = pdlm.today("Asia/Kolkata")
+PREV = TODAY.subtract(days=1)
+OLDER = TODAY.subtract(days=2)
+
+
+def broker_candles():
+    # newest first as the broker sends them
+    return [
+        candle(TODAY, "0915", "200", "210", "190", "205"),
+        candle(PREV, "1529", "104", "110", "98", "108"),
+        candle(PREV, "0915", "100", "105", "99", "104"),
+        candle(OLDER, "0915", "50", "60", "40", "55"),
+    ]
+
+
+class TestOhlcStore:
+    def test_sessions_before_today_are_stored(self, tmp_path):
+        store = OhlcStore(root=str(tmp_path))
+
+        stored = store.put_intraday("NSE", "26000", broker_candles())
+
+        assert stored == [OLDER.to_date_string(), PREV.to_date_string()]
+        session = store.get("NSE", "26000", PREV.to_date_string())
+        assert len(session["intraday"]) == 2
+        assert session["daily"] == {
+            "into": 100.0,
+            "inth": 110.0,
+            "intl": 98.0,
+            "intc": 108.0,
+            "date": PREV.to_date_string(),
+            "v": 20.0,
+        }
+
+    def test_sync_downloads_once_a_day(self, tmp_path):
+        store = OhlcStore(root=str(tmp_path))
+        fetch = Mock(return_value=broker_candles())
+
+        assert store.cached("NSE", "26000") is None
+        first = store.sync("NSE", "26000", fetch)
+        again = store.sync("NSE", "26000", fetch)
+
+        assert fetch.call_count == 1
+        assert first == again
+        assert first["intc"] == 108.0
+
+        # a new process reads the same bar from disk without a download
+        fresh = OhlcStore(root=str(tmp_path))
+        assert fresh.cached("NSE", "26000") == first
+
+    def test_sync_starts_after_newest_stored_session(self, tmp_path):
+        store = OhlcStore(root=str(tmp_path))
+        store.put_intraday("NSE", "26000", broker_candles()[-1:])
+        fetch = Mock(return_value=broker_candles()[:3])
+
+        store.sync("NSE", "26000", fetch)
+
+        fm = fetch.call_args.args[0]
+        assert fm == OLDER.add(days=1).timestamp()
+
+    def test_today_comes_from_the_clock(self, tmp_path):
+        store = OhlcStore(root=str(tmp_path))
+        # on a replayed day the previous session is OLDER, PREV is today
+        Clock.use(SimClock(PREV.add(hours=10).timestamp()))
+        try:
+            stored = store.put_intraday("NSE", "26000", broker_candles())
+            assert stored == [OLDER.to_date_string()]
+            assert store.latest_daily("NSE", "26000")["intc"] == 55.0
+        finally:
+            Clock.use()
+
+    def test_broker_daily_is_served_today_only(self, tmp_path):
+        store = OhlcStore(root=str(tmp_path))
+        bar = {"inth": "110", "intl": "98", "intc": "108"}
+
+        store.put_daily("NSE", "26000", bar)
+
+        assert OhlcStore(root=str(tmp_path)).cached("NSE", "26000") == bar
+        Clock.use(SimClock(TODAY.add(days=1, hours=10).timestamp()))
+        try:
+            assert OhlcStore(root=str(tmp_path)).cached("NSE", "26000") is None
+        finally:
+            Clock.use()
+
+
+class TestRestYesterday:
+    def test_yesterday_goes_through_the_store(self, tmp_path):
+        api = Mock()
+        api.historical = Mock(return_value=broker_candles())
+        rest = RestApi(api)
+        rest._ohlc = OhlcStore(root=str(tmp_path))
+
+        assert rest.stored_ohlc("NSE", 26000) is None
+        assert rest.yesterday("NSE", 26000)["inth"] == 110.0
+        assert rest.stored_ohlc("NSE", 26000)["inth"] == 110.0
+        assert api.historical.call_count == 1
+
+    def test_daily_bar_is_stored_for_the_grid(self, tmp_path):
+        api = Mock()
+        api.broker.get_daily_price_series = Mock(
+            return_value=['{"inth": "110", "intl": "98", "intc": "108"}']
+        )
+        rest = RestApi(api)
+        rest._ohlc = OhlcStore(root=str(tmp_path))
+
+        assert rest.daily("NSE", "NIFTY", token=26000)["intc"] == "108"
+        # a restart finds it on disk before asking the broker again
+        rest._ohlc = OhlcStore(root=str(tmp_path))
+        assert rest.stored_ohlc("NSE", 26000)["intc"] == "108"
@@ -5,9 +5,18 @@ Run with: pytest tests/unit/test_ram.py -v
 
 from unittest.mock import Mock, patch, MagicMock
 import pandas as pd
+from src.providers.candle_manager import CandleManager
 from src.strategies.ram import Ram
 
 
+def feed(ram, candles):
+    """replays each candle as open, high, low, close ticks one minute apart"""
+    ram._candle = CandleManager()
+    for minute, c in enumerate(candles):
+        for price in (c["open"], c["high"], c["low"], c["close"]):
+            ram._candle.add_tick(price, ts=minute * 60)
+
+
 class TestRamOnSignal:
     """Tests for _on_signal method"""
 
@@ -19,7 +28,7 @@ class TestRamOnSignal:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -61,7 +70,7 @@ class TestRamWaitForBreakout:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -80,7 +89,7 @@ class TestRamWaitForBreakout:
         ram._armed_idx = 0
 
         mock_candle = [{"open": 105.0, "high": 110.0, "low": 90.0, "close": 108.0}]
-        ram._candle.get_candles = Mock(return_value=mock_candle)
+        feed(ram, mock_candle)
 
         ram.wait_for_breakout()
 
@@ -95,7 +104,7 @@ class TestRamWaitForBreakout:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -115,7 +124,7 @@ class TestRamWaitForBreakout:
 
         # Candle close below stop - should NOT trigger
         mock_candle = [{"open": 105.0, "high": 110.0, "low": 90.0, "close": 95.0}]
-        ram._candle.get_candles = Mock(return_value=mock_candle)
+        feed(ram, mock_candle)
 
         initial_pos_id = ram.pos_id
         ram.wait_for_breakout()
@@ -131,7 +140,7 @@ class TestRamWaitForBreakout:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -157,7 +166,7 @@ class TestRamWaitForBreakout:
             {"open": 104.0, "high": 108.0, "low": 103.0, "close": 108.0},  # -2 GREEN
             {"open": 108.0, "high": 110.0, "low": 105.0, "close": 110.0},  # -1 current
         ]
-        ram._candle.get_candles = Mock(return_value=mock_candle)
+        feed(ram, mock_candle)
 
         ram.wait_for_breakout()
 
@@ -171,7 +180,7 @@ class TestRamWaitForBreakout:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -192,7 +201,7 @@ class TestRamWaitForBreakout:
         ram.prev_trade_at = 100.0
 
         mock_candle = [{"open": 105.0, "high": 110.0, "low": 90.0, "close": 108.0}]
-        ram._candle.get_candles = Mock(return_value=mock_candle)
+        feed(ram, mock_candle)
 
         ram.wait_for_breakout()
 
@@ -204,7 +213,7 @@ class TestRamWaitForBreakout:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -223,7 +232,7 @@ class TestRamWaitForBreakout:
         ram._armed_idx = 1
 
         mock_candle = [{"open": 105.0, "high": 110.0, "low": 90.0, "close": 108.0}]
-        ram._candle.get_candles = Mock(return_value=mock_candle)
+        feed(ram, mock_candle)
 
         ram.wait_for_breakout()
 
@@ -241,8 +250,8 @@ class TestRamTryExitingTrade:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=True):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=True):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -273,8 +282,8 @@ class TestRamTryExitingTrade:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=True):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=True):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -305,8 +314,8 @@ class TestRamTryExitingTrade:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=False):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=False):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -341,7 +350,7 @@ class TestRamRun:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -370,7 +379,7 @@ class TestRamRun:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -400,8 +409,8 @@ class TestRamRun:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=False):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=False):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -433,8 +442,8 @@ class TestRamRun:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=True):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=True):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -466,8 +475,8 @@ class TestRamRun:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=False):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=False):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -501,8 +510,8 @@ class TestRamRun:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
-            with patch("src.strategies.ram.is_time_past", return_value=False):
+        with patch("src.providers.clock.Clock.sleep"):
+            with patch("src.providers.clock.Clock.is_past", return_value=False):
                 ram = Ram(
                     tradingsymbol="NIFTY05MAY26C23700",
                     strategy="ram",
@@ -538,7 +547,7 @@ class TestRamExceptionHandlers:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -566,7 +575,7 @@ class TestRamExceptionHandlers:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
@@ -594,7 +603,7 @@ class TestRamExceptionHandlers:
         mock_rest = Mock()
         mock_rest.history.return_value = 100.0
 
-        with patch("src.strategies.ram.timer"):
+        with patch("src.providers.clock.Clock.sleep"):
             ram = Ram(
                 tradingsymbol="NIFTY05MAY26C23700",
                 strategy="ram",
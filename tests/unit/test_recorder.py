@@ -0,0 +1,122 @@
+"""
+Tests for the tick recorder and its reader
+Run with: pytest tests/unit/test_recorder.py -v
+"""
+
+import time
+from unittest.mock import Mock, patch
+
+import pendulum as pdlm
+
+from src.sdk.recorder import TickReader, TickRecorder, _load as recorder_load
+from src.sdk.wserver import Wserver
+
+T0 = pdlm.datetime(2025, 9, 18, 9, 15, tz="Asia/Kolkata").timestamp()
+
+
+def recorder(root):
+    # a long interval keeps the background thread out of the way
+    return TickRecorder(str(root), interval=3600)
+
+
+class TestTickRecorder:
+    def test_round_trip_sorted_on_exchange_time(self, tmp_path):
+        rec = recorder(tmp_path)
+        with patch("src.sdk.recorder.time", return_value=T0):
+            rec.record("NFO|1", T0 + 2, 101.5, 10)
+            rec.record("NFO|2", T0 + 1, 55.25, 0)
+            assert rec.flush() == 2
+            rec.record("NFO|1", T0 + 3, 102.0, 12)
+            rec.close()
+
+        reader = TickReader(str(tmp_path))
+        assert reader.days() == ["2025-09-18"]
+        assert len(list(reader.segments("2025-09-18"))) == 2
+
+        cols = reader.read("2025-09-18")
+        assert cols["key"].tolist() == ["NFO|2", "NFO|1", "NFO|1"]
+        assert cols["ltp"].tolist() == [55.25, 101.5, 102.0]
+        assert cols["volume"].tolist() == [0, 10, 12]
+
+    def test_ticks_for_replay(self, tmp_path):
+        rec = recorder(tmp_path)
+        with patch("src.sdk.recorder.time", return_value=T0):
+            rec.record("NFO|1", T0, 101.5, 10)
+            rec.record("NFO|2", T0 + 1, 55.25, 0)
+            rec.close()
+
+        ticks = list(TickReader(str(tmp_path)).ticks("2025-09-18", {"NFO|1": "NIFTYC"}))
+        assert ticks == [(T0, "NIFTYC", 101.5)]
+
+    def test_segments_split_on_local_day(self, tmp_path):
+        rec = recorder(tmp_path)
+        # 23:59:59 and 00:00:01 IST fall on two days
+        midnight = pdlm.datetime(2025, 9, 19, tz="Asia/Kolkata").timestamp()
+        for recv in (midnight - 1, midnight + 1):
+            with patch("src.sdk.recorder.time", return_value=recv):
+                rec.record("MCX|9", recv, 300.0, 1)
+        rec.close()
+
+        assert TickReader(str(tmp_path)).days() == ["2025-09-18", "2025-09-19"]
+
+    def test_background_flush_waits_for_a_full_batch(self, tmp_path):
+        with patch("src.sdk.recorder._POLL", 0.01):
+            rec = TickRecorder(str(tmp_path), interval=3600, max_rows=3)
+            for i in range(2):
+                rec.record("NFO|1", T0 + i, 100.0, 1)
+            time.sleep(0.05)
+            assert TickReader(str(tmp_path)).days() == []
+
+            rec.record("NFO|1", T0 + 2, 100.0, 1)
+            for _ in range(100):
+                if TickReader(str(tmp_path)).days():
+                    break
+                time.sleep(0.01)
+            rec.close()
+
+        reader = TickReader(str(tmp_path))
+        (day,) = reader.days()
+        assert len(list(reader.segments(day))) == 1
+
+    def test_nothing_recorded_writes_nothing(self, tmp_path):
+        rec = recorder(tmp_path)
+        rec.close()
+        assert TickReader(str(tmp_path)).days() == []
+
+
+class TestTickReader:
+    def test_stream_merges_overlapping_segments_lazily(self, tmp_path):
+        rec = recorder(tmp_path)
+        with patch("src.sdk.recorder.time", return_value=T0):
+            # a late tick lands in the second segment
+            for ts in (0, 2, 4):
+                rec.record("NFO|1", T0 + ts, ts, 1)
+            rec.flush()
+            for ts in (3, 5):
+                rec.record("NFO|1", T0 + ts, ts, 1)
+            rec.flush()
+            rec.record("NFO|1", T0 + 60, 60, 1)
+            rec.close()
+
+        reader = TickReader(str(tmp_path))
+        with patch("src.sdk.recorder._load", wraps=recorder_load) as load:
+            stream = reader.stream("2025-09-18")
+            first = [next(stream) for _ in range(3)]
+            # the segment starting at T0 + 60 is not open yet
+            assert load.call_count == 2
+            rest = list(stream)
+
+        assert [row[2] for row in first + rest] == [0, 2, 3, 4, 5, 60]
+        assert load.call_count == 3
+
+
+class TestWserverRecording:
+    def test_quotes_are_recorded_with_carried_volume(self):
+        rec = Mock()
+        ws = Wserver(Mock(), ["NFO|1"], recorder=rec)
+
+        ws.event_handler_quote_update({"e": "NFO", "tk": "1", "lp": "100", "ft": T0, "v": "5"})
+        ws.event_handler_quote_update({"e": "NFO", "tk": "1", "lp": "101", "ft": T0 + 1})
+
+        args = [c.args for c in rec.record.call_args_list]
+        assert args == [("NFO|1", T0, 100.0, 5.0), ("NFO|1", T0 + 1, 101.0, 5.0)]
@@ -0,0 +1,118 @@
+"""
+Tests for the event replay backtester
+Run with: pytest tests/unit/test_replay.py -v
+"""
+
+import pendulum as pdlm
+
+import pytest
+
+from src.core.replay import (
+    ReplayError,
+    SimBroker,
+    candle_ticks,
+    replay_candles,
+    trade_list,
+)
+from src.providers.clock import Clock, SimClock
+
+T0 = pdlm.datetime(2025, 9, 18, 9, 15, tz="Asia/Kolkata")
+
+# 09:15 sets the stop at 100, 09:16 breaks out, 09:18 red and 09:19
+# green arm the two candle entry at 09:20, 09:21 runs past the target
+BARS = [
+    (100, 102, 100, 101),
+    (105, 106, 99, 104),
+    (104, 108, 103, 107),
+    (107, 107, 101, 102),
+    (102, 106, 101, 105),
+    (105, 112, 104, 110),
+    (110, 160, 109, 158),
+]
+
+
+def broker_candles(bars=BARS):
+    return [
+        {
+            "time": T0.add(minutes=i).format("DD-MM-YYYY HH:mm:ss"),
+            "into": str(o),
+            "inth": str(h),
+            "intl": str(low),
+            "intc": str(c),
+        }
+        for i, (o, h, low, c) in enumerate(bars)
+    ][::-1]
+
+
+def params(**kwargs):
+    return dict(
+        tradingsymbol="NIFTY18SEP25C25000",
+        strategy="ram",
+        stop_time={"hour": 15, "minute": 20},
+        option_exchange="NFO",
+        option_token="1",
+        quantity=65,
+        **kwargs,
+    )
+
+
+class TestCandleTicks:
+    def test_four_ticks_per_bar_in_order(self):
+        ticks = list(candle_ticks("X", broker_candles(BARS[:2])))
+
+        assert [t[2] for t in ticks] == [100, 100, 102, 101, 105, 106, 99, 104]
+        assert ticks[0][0] == T0.int_timestamp
+        assert ticks[-1][0] == T0.int_timestamp + 119
+
+
+class TestSimBroker:
+    def test_historical_serves_only_closed_bars(self):
+        broker = SimBroker()
+        broker.add_candles("NFO", 1, broker_candles())
+        Clock.use(SimClock(T0.add(minutes=2, seconds=30).timestamp()))
+        try:
+            bars = broker.historical("NFO", "1", 0, T0.add(hours=1).timestamp())
+        finally:
+            Clock.use()
+
+        assert [b["intc"] for b in bars] == ["104", "101"]
+
+
+class TestReplay:
+    def test_real_ram_trades_on_simulated_time(self):
+        fills, replay = replay_candles(params(), broker_candles())
+
+        assert replay.strategies[0]._stop == 100.0
+        assert trade_list(fills) == [
+            ("09:16:59", "NIFTY18SEP25C25000", "BUY", 65, 106.0),
+            ("09:20:00", "NIFTY18SEP25C25000", "BUY", 65, 107.0),
+            ("09:21:40", "NIFTY18SEP25C25000", "SELL", 130, 158.0),
+        ]
+
+    def test_same_input_same_trades(self):
+        first, _ = replay_candles(params(), broker_candles())
+        second, _ = replay_candles(params(), broker_candles())
+
+        assert first == second
+
+    def test_clock_is_restored(self):
+        replay_candles(params(), broker_candles())
+
+        assert abs(Clock.time() - pdlm.now().timestamp()) < 5
+
+    def test_no_trades_before_a_late_low_candle_is_known(self):
+        # the strategy is built only once the 09:25 bar has closed
+        late = {"hour": 9, "minute": 24, "second": 59}
+        bars = BARS + [(158, 160, 150, 155)] * 3 + [(100, 101, 99, 100), (100, 104, 98, 103)]
+        fills, replay = replay_candles(params(low_candle_time=late), broker_candles(bars))
+
+        assert replay.strategies[0]._stop == 99.0
+        assert fills
+        assert all(f["time"] >= T0.add(minutes=11).timestamp() for f in fills)
+
+    def test_missing_low_candle_fails_instead_of_waiting(self):
+        late = {"hour": 10, "minute": 0, "second": 0}
+
+        with pytest.raises(ReplayError):
+            replay_candles(params(low_candle_time=late), broker_candles())
+        assert abs(Clock.time() - pdlm.now().timestamp()) < 5
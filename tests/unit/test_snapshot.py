@@ -0,0 +1,122 @@
+"""
+Tests for MarketSnapshot and its use in Engine.tick
+Run with: pytest tests/unit/test_snapshot.py -v
+"""
+
+from unittest.mock import Mock, patch
+
+from src.core.engine import Engine
+from src.core.snapshot import MarketSnapshot
+
+
+def make_rest_and_quote():
+    mock_rest = Mock()
+    mock_rest.positions = Mock(return_value=[{"symbol": "TEST", "quantity": 65}])
+    mock_rest.orders = Mock(return_value=[{"order_id": "1"}])
+
+    mock_quote = Mock()
+    mock_quote.get_quotes = Mock(return_value={"TEST": 340.0})
+    return mock_rest, mock_quote
+
+
+class TestMarketSnapshot:
+    def test_positions_and_quotes_are_read_once(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+
+        snap = MarketSnapshot(mock_rest, mock_quote)
+
+        assert snap.positions == [{"symbol": "TEST", "quantity": 65}]
+        assert snap.quotes == {"TEST": 340.0}
+        assert snap.broker_calls == 1
+        mock_rest.orders.assert_not_called()
+
+    def test_orders_are_lazy_and_cached(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+
+        snap = MarketSnapshot(mock_rest, mock_quote)
+        _ = snap.orders
+        _ = snap.orders
+
+        assert mock_rest.orders.call_count == 1
+        assert snap.broker_calls == 2
+
+    def test_broker_error_falls_back_to_empty_book(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+        mock_rest.positions.side_effect = Exception("rate limited")
+
+        snap = MarketSnapshot(mock_rest, mock_quote)
+
+        assert snap.positions == []
+        assert snap.broker_calls == 1
+
+
+class TestEngineSnapshot:
+    def test_broker_calls_do_not_grow_with_strategies(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+
+        strategies = []
+        for _ in range(10):
+            strgy = Mock()
+            strgy._removable = False
+            strategies.append(strgy)
+
+        engine = Engine(start={"hour": 9, "minute": 15}, stop={"hour": 15, "minute": 30})
+        engine.add_strategy(strategies)
+        with patch("src.core.engine.generate_table"):
+            engine.tick(mock_rest, mock_quote, Mock())
+
+        assert engine.snapshot.broker_calls == 1
+        assert mock_rest.positions.call_count == 1
+        # every strategy sees the very same book
+        books = {id(s.run.call_args[0][0]) for s in strategies}
+        assert len(books) == 1
+
+    def test_only_strategies_with_changed_symbols_run(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+
+        ce, pe = Mock(), Mock()
+        ce._removable = pe._removable = False
+        ce._tradingsymbol, pe._tradingsymbol = "CE", "PE"
+
+        engine = Engine(start={}, stop={})
+        engine.add_strategy([ce, pe])
+        with patch("src.core.engine.generate_table"):
+            engine.tick(mock_rest, mock_quote, Mock(), changed={"PE"})
+            engine.tick(mock_rest, mock_quote, Mock(), changed=set())
+
+        ce.run.assert_not_called()
+        assert pe.run.call_count == 1
+        # a quiet market costs no broker calls
+        assert mock_rest.positions.call_count == 1
+
+    def test_quiet_tick_still_removes_and_renders(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+        strgy = Mock()
+        strgy._removable = True
+        strgy._tradingsymbol = "CE"
+        live = Mock()
+
+        engine = Engine(start={}, stop={})
+        engine.add_strategy([strgy])
+        with patch("src.core.engine.generate_table"):
+            engine.tick(mock_rest, mock_quote, live, changed=set())
+
+        strgy.run.assert_not_called()
+        live.update.assert_called_once()
+        assert engine.strategies == []
+        mock_quote.release.assert_called_once_with("CE")
+
+    def test_position_book_reused_within_refresh(self):
+        mock_rest, mock_quote = make_rest_and_quote()
+        strgy = Mock()
+        strgy._removable = False
+
+        engine = Engine(start={}, stop={}, refresh=60)
+        engine.add_strategy([strgy])
+        with patch("src.core.engine.generate_table"):
+            engine.tick(mock_rest, mock_quote, Mock())
+            engine.tick(mock_rest, mock_quote, Mock())
+
+        assert mock_rest.positions.call_count == 1
+        assert mock_quote.get_quotes.call_count == 2
+        assert engine.snapshot.broker_calls == 0
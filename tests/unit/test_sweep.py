@@ -0,0 +1,85 @@
+"""
+Tests for the parallel backtest sweep
+Run with: pytest tests/unit/test_sweep.py -v
+"""
+
+import pendulum as pdlm
+import pytest
+
+from src.core.sweep import make_jobs, run_job, summarize, sweep, trading_dates
+from src.sdk.ohlc_store import OhlcStore
+
+from tests.unit.test_replay import BARS
+
+INSTRUMENT = ("NFO", "NIFTY18SEP25C25000", "1")
+DATES = ["2025-09-17", "2025-09-18"]
+
+
+def session(date, bars):
+    t0 = pdlm.parse(date, tz="Asia/Kolkata").at(9, 15)
+    return [
+        {
+            "time": t0.add(minutes=i).format("DD-MM-YYYY HH:mm:ss"),
+            "into": str(o),
+            "inth": str(h),
+            "intl": str(low),
+            "intc": str(c),
+        }
+        for i, (o, h, low, c) in enumerate(bars)
+    ]
+
+
+@pytest.fixture
+def root(tmp_path):
+    store = OhlcStore(str(tmp_path))
+    candles = session(DATES[0], BARS) + session(DATES[1], BARS[:4])
+    store.put_intraday("NFO", "1", candles, today="2025-09-19")
+    return str(tmp_path)
+
+
+class TestSweep:
+    def test_jobs_cover_the_grid(self):
+        jobs = make_jobs([INSTRUMENT], DATES, targets=("30%", "50%"))
+        assert len(jobs) == 4
+        assert {(j["date"], j["target"]) for j in jobs} == {
+            (d, t) for d in DATES for t in ("30%", "50%")
+        }
+
+    def test_run_job_reports_pnl(self, root):
+        row = run_job(make_jobs([INSTRUMENT], DATES[:1])[0], root)
+
+        # two entries of 1 at 106 and 107, both sold at 158
+        assert (row["entries"], row["exits"], row["open_qty"]) == (2, 1, 0)
+        assert row["pnl"] == 103.0
+
+    def test_late_low_candle(self, root):
+        late = {"hour": 9, "minute": 18, "second": 59}
+        rows = [
+            run_job(job, root)
+            for job in make_jobs([INSTRUMENT], DATES, low_candle_times=(late,))
+        ]
+
+        # the second session ends at 09:18, there is no bar to wait for
+        assert rows[1]["error"].startswith("no bar from")
+        # built after 09:19 closes, the 09:16 breakout is never seen
+        assert rows[0]["entries"] == 1
+
+    def test_missing_session_is_reported(self, root):
+        row = run_job(make_jobs([INSTRUMENT], ["2025-09-16"])[0], root)
+        assert row["error"] == "no candles"
+
+    def test_pool_matches_inline_run(self, root):
+        jobs = make_jobs([INSTRUMENT], DATES, targets=("30%", "50%"))
+
+        pooled = sweep(jobs, root=root, workers=2)
+        inline = sweep(jobs, root=root, workers=0)
+
+        assert pooled.equals(inline)
+        table = summarize(pooled)
+        assert sorted(table["target"]) == ["30%", "50%"]
+        assert list(table["days"]) == [2, 2]
+        assert table["pnl"].is_monotonic_decreasing
+
+
+def test_trading_dates_skip_weekends():
+    assert trading_dates("2025-09-19", "2025-09-22") == ["2025-09-19", "2025-09-22"]
@@ -0,0 +1,193 @@
+"""
+Tests for the indexed, process wide SymbolMaster and OptionSymbol lookups
+Run with: pytest tests/unit/test_symbol.py -v
+"""
+
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.config.interface import OptionData
+from src.sdk.symbol import OptionSymbol, SymbolMaster, load_columnar, save_columnar
+
+
+def scrip_master():
+    rows = []
+    token = 1000
+    for expiry in ("28-APR-2099", "05-MAY-2099"):
+        for strike in range(24000, 25050, 50):
+            for option_type, letter in (("CE", "C"), ("PE", "P")):
+                token += 1
+                rows.append(
+                    {
+                        "Exchange": "NFO",
+                        "Token": token,
+                        "LotSize": 65,
+                        "Symbol": "NIFTY",
+                        "TradingSymbol": f"NIFTY{expiry[:2]}{expiry[3:6]}{letter}{strike}",
+                        "Expiry": expiry,
+                        "OptionType": option_type,
+                        "StrikePrice": strike,
+                    }
+                )
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def option_symbol():
+    master = SymbolMaster(scrip_master())
+    data = OptionData(
+        exchange="NFO", base="NIFTY", symbol="NIFTY", diff=50, depth=3,
+        expiry="28-APR-2099",
+    )
+    with (
+        patch("src.sdk.symbol.get_exchange_token_map_flattrade"),
+        patch.object(SymbolMaster, "get", return_value=master),
+    ):
+        yield OptionSymbol(data)
+
+
+class TestSymbolMaster:
+    def test_loaded_once_per_file(self, tmp_path):
+        csvfile = tmp_path / "NFO_symbols.csv"
+        scrip_master().to_csv(csvfile, index=False)
+        SymbolMaster._masters.pop(str(csvfile), None)
+
+        with patch("src.sdk.symbol.pd.read_csv", wraps=pd.read_csv) as read_csv:
+            first = SymbolMaster.get(str(csvfile))
+            second = SymbolMaster.get(str(csvfile))
+
+        assert first is second
+        assert read_csv.call_count == 1
+
+    def test_columnar_cache_skips_csv_parsing(self, tmp_path):
+        csvfile = tmp_path / "NFO_symbols.csv"
+        scrip_master().to_csv(csvfile, index=False)
+        SymbolMaster._masters.pop(str(csvfile), None)
+        SymbolMaster.get(str(csvfile))
+        SymbolMaster._masters.pop(str(csvfile), None)
+
+        with patch("src.sdk.symbol.pd.read_csv") as read_csv:
+            master = SymbolMaster.get(str(csvfile))
+
+        read_csv.assert_not_called()
+        assert master.expiries["NIFTY"] == {"28-APR-2099", "05-MAY-2099"}
+
+    def test_columnar_round_trip(self, tmp_path):
+        csvfile = tmp_path / "NFO_symbols.csv"
+        df = scrip_master()
+        df.to_csv(csvfile, index=False)
+        save_columnar(df, str(csvfile))
+
+        loaded = load_columnar(str(csvfile))
+        assert isinstance(loaded["Symbol"].dtype, pd.CategoricalDtype)
+        assert loaded.astype(object).equals(df.astype(object))
+
+    def test_stale_columnar_cache_is_ignored(self, tmp_path):
+        csvfile = tmp_path / "NFO_symbols.csv"
+        df = scrip_master()
+        df.to_csv(csvfile, index=False)
+        save_columnar(df, str(csvfile))
+        # a fresh download lands after the cache was written
+        os.utime(csvfile, (2**31, 2**31))
+
+        assert load_columnar(str(csvfile)) is None
+
+    def test_contract_lookup_ignores_strike_type(self):
+        master = SymbolMaster(scrip_master())
+        row = master.contract("NIFTY", "28-APR-2099", "CE", 24500.0)
+        assert row["TradingSymbol"] == "NIFTY28APRC24500"
+
+
+class TestOptionSymbol:
+    def test_find_expiry_picks_nearest(self, option_symbol):
+        assert option_symbol._find_expiry() == "28-APR-2099"
+
+    def test_get_tokens_covers_depth(self, option_symbol):
+        tokens = option_symbol.get_tokens(24500)
+        # strikes 24400..24600 in both CE and PE
+        assert len(tokens) == 10
+        assert "NIFTY28APRC24600" in tokens.values()
+        assert all(key.startswith("NFO|") for key in tokens)
+
+    def test_find_option_type(self, option_symbol):
+        assert option_symbol.find_option_type("NIFTY28APRP24100") == "PE"
+        assert option_symbol.find_option_type("UNKNOWN") is None
+
+    def test_find_option_by_distance(self, option_symbol):
+        row = option_symbol.find_option_by_distance(atm=24500, distance=2, c_or_p="PE")
+        assert row["TradingSymbol"] == "NIFTY28APRP24400"
+        assert "Token" in row
+
+    def test_find_closest_premium(self, option_symbol):
+        quotes = {"NIFTY28APRC24500": "120", "NIFTY28APRC24550": "95", "NIFTY28APRP24500": "100"}
+        assert option_symbol.find_closest_premium(quotes, 100, "CE") == "NIFTY28APRC24550"
+
+    def test_later_scan_ignores_earlier_quotes(self, option_symbol):
+        """the cached chain must not remember prices from a previous scan"""
+        first = {"NIFTY28APRC24100": "100"}
+        assert option_symbol.find_closest_premium(first, 100, "CE") == "NIFTY28APRC24100"
+
+        second = {"NIFTY28APRC24550": "180", "NIFTY28APRC24600": "140"}
+        assert option_symbol.find_closest_premium(second, 100, "CE") == "NIFTY28APRC24600"
+        assert option_symbol.find_premium_band(second, 90, 150, "CE") == ["NIFTY28APRC24600"]
+
+    def test_find_premium_band(self, option_symbol):
+        quotes = {"NIFTY28APRP24400": "60", "NIFTY28APRP24450": "75", "NIFTY28APRP24500": "100"}
+        assert option_symbol.find_premium_band(quotes, 50, 80, "PE") == [
+            "NIFTY28APRP24400",
+            "NIFTY28APRP24450",
+        ]
+
+
+class TestOptionChain:
+    def test_chain_is_sorted_and_aligned(self):
+        chain = SymbolMaster(scrip_master()).chain("NIFTY", "28-APR-2099")
+
+        assert len(chain) == 21
+        assert list(chain.strikes[:2]) == [24000.0, 24050.0]
+        idx = chain.index_of(24500)
+        assert chain.tradingsymbols["CE"][idx] == "NIFTY28APRC24500"
+        assert chain.tradingsymbols["PE"][idx] == "NIFTY28APRP24500"
+
+    def test_chain_is_built_once(self):
+        master = SymbolMaster(scrip_master())
+        assert master.chain("NIFTY", "28-APR-2099") is master.chain("NIFTY", "28-APR-2099")
+
+    def test_atm_and_distance(self):
+        chain = SymbolMaster(scrip_master()).chain("NIFTY", "28-APR-2099")
+
+        assert chain.strikes[chain.atm_index(24524)] == 24500
+        assert chain.strikes[chain.atm_index(24526)] == 24550
+        assert chain.strikes[chain.atm_index(1)] == 24000
+        assert chain.by_distance(24500, 2, "CE")["TradingSymbol"] == "NIFTY28APRC24600"
+        assert chain.by_distance(24500, 2, "PE")["TradingSymbol"] == "NIFTY28APRP24400"
+        assert chain.by_distance(24000, 1, "PE") is None
+
+    def test_closest_premium_ignores_missing_quotes(self):
+        chain = SymbolMaster(scrip_master()).chain("NIFTY", "28-APR-2099")
+        assert chain.closest_premium(100, "PE") is None
+
+        chain.update_quotes({"NIFTY28APRP24400": "80", "NIFTY28APRP24450": "101.5"})
+        assert chain.closest_premium(100, "PE") == "NIFTY28APRP24450"
+
+    def test_update_quotes_patches_only_given_contracts(self):
+        chain = SymbolMaster(scrip_master()).chain("NIFTY", "28-APR-2099")
+        chain.update_quotes({"NIFTY28APRC24500": 120, "OTHER": 1})
+        chain.update_quotes({"NIFTY28APRC24550": 95})
+
+        idx = chain.index_of(24500)
+        assert chain.ltp["CE"][idx] == 120
+        assert chain.ltp["CE"][idx + 1] == 95
+        assert chain.closest_premium(100, "CE") == "NIFTY28APRC24550"
+
+    def test_premium_band(self):
+        chain = SymbolMaster(scrip_master()).chain("NIFTY", "28-APR-2099")
+        chain.update_quotes(
+            {"NIFTY28APRC24500": 120, "NIFTY28APRC24550": 95, "NIFTY28APRC24600": 70}
+        )
+
+        assert chain.premium_band(90, 120, "CE") == ["NIFTY28APRC24500", "NIFTY28APRC24550"]
+        assert chain.premium_band(1, 5, "CE") == []
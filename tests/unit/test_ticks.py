@@ -0,0 +1,74 @@
+"""
+Tests for the per token tick ring buffers
+Run with: pytest tests/unit/test_ticks.py -v
+"""
+
+from unittest.mock import patch
+
+from src.sdk.ticks import ASK, BID, LTP, TS, VOLUME, TickRing, TickStore
+
+
+class TestTickRing:
+    def test_last_returns_oldest_first(self):
+        ring = TickRing(capacity=4)
+        for i in range(3):
+            ring.append([i, 100 + i, 0, 0, 0])
+
+        rows = ring.last(2)
+        assert rows[:, LTP].tolist() == [101, 102]
+        assert len(ring) == 3
+
+    def test_ring_overwrites_oldest(self):
+        ring = TickRing(capacity=3)
+        for i in range(5):
+            ring.append([i, 100 + i, 0, 0, 0])
+
+        assert len(ring) == 3
+        assert ring.last()[:, TS].tolist() == [2, 3, 4]
+        assert ring.latest()[LTP] == 104
+
+    def test_since_uses_exchange_timestamp(self):
+        ring = TickRing(capacity=8)
+        for ts in (60, 90, 120, 150):
+            ring.append([ts, ts, 0, 0, 0])
+
+        assert ring.since(100)[:, TS].tolist() == [120, 150]
+
+    def test_empty_ring(self):
+        ring = TickRing(capacity=2)
+        assert ring.latest() is None
+        assert len(ring.last()) == 0
+
+
+class TestTickStore:
+    def test_missing_fields_are_carried_forward(self):
+        store = TickStore(capacity=4)
+        store.add(
+            "NFO|1",
+            {"e": "NFO", "tk": "1", "ft": "1700000000", "lp": "10.5",
+             "v": "100", "bp1": "10.4", "sp1": "10.6"},
+        )
+        store.add("NFO|1", {"e": "NFO", "tk": "1", "ft": "1700000001", "sp1": "10.7"})
+
+        row = store.get("NFO|1").latest()
+        assert row[TS] == 1700000001
+        assert row[LTP] == 10.5
+        assert row[VOLUME] == 100
+        assert row[BID] == 10.4
+        assert row[ASK] == 10.7
+        assert len(store.get("NFO|1")) == 2
+
+    def test_missing_exchange_time_is_receive_time(self):
+        store = TickStore()
+        store.add("NFO|1", {"e": "NFO", "tk": "1", "ft": "1700000000", "lp": "10"})
+        with patch("src.sdk.ticks.time", return_value=1700000090.5):
+            store.add("NFO|1", {"e": "NFO", "tk": "1", "lp": "11"})
+
+        row = store.get("NFO|1").latest()
+        assert row[TS] == 1700000090.5
+        assert row[LTP] == 11
+
+    def test_message_without_fields_is_ignored(self):
+        store = TickStore()
+        store.add("NFO|1", {"e": "NFO", "tk": "1"})
+        assert store.get("NFO|1") is None
@@ -3,7 +3,10 @@
 # Assuming your concrete class is named Breakout
 # and is located in src/providors/breakout.py
 
-from src.providers.time_manager import SimpleBucket
+import pendulum as pdlm
+import pytest
+
+from src.providers.time_manager import CandleCalendar, SimpleBucket, TimeManager
 
 
 def test_simple_bucket():
@@ -13,3 +16,66 @@ def test_simple_bucket():
 
     flag = b.is_bucket()
     assert not flag
+
+
+DAY = pdlm.date(2025, 9, 18)
+OPEN = pdlm.datetime(2025, 9, 18, 9, 0, tz="Asia/Kolkata").int_timestamp
+
+
+def scan_index(closes, now):
+    """the linear walk current_index used to do"""
+    idx = -1
+    for i, close in enumerate(closes):
+        if now >= close:
+            idx = i
+        else:
+            break
+    return idx
+
+
+class TestCandleCalendar:
+    def test_calendar_is_shared(self):
+        one = CandleCalendar.get(DAY, {"minutes": 1})
+        assert CandleCalendar.get(DAY, {"seconds": 60}) is one
+        assert CandleCalendar.get(DAY, {"minutes": 5}) is not one
+        assert len(one) == 895
+
+    def test_tail_interval_ends_at_market_close(self):
+        calendar = CandleCalendar.get(DAY, {"minutes": 7})
+        assert calendar.closes[-1] == calendar.close
+        assert calendar.closes[-1] - calendar.closes[-2] < 7 * 60
+
+    @pytest.mark.parametrize("rest_time", [{"minutes": 1}, {"minutes": 7}])
+    def test_index_matches_linear_scan(self, rest_time):
+        calendar = CandleCalendar.get(DAY, rest_time)
+        for now in range(calendar.open - 120, calendar.close + 120, 17):
+            assert calendar.index(now) == scan_index(calendar.closes, now)
+
+
+class TestTimeManager:
+    def test_current_index_follows_injected_clock(self):
+        now = [OPEN + 30]
+        tm = TimeManager({"minutes": 1}, clock=lambda: now[0])
+        assert tm.current_index == -1
+
+        now[0] = OPEN + 60
+        assert tm.current_index == 0
+        now[0] = OPEN + 150.5
+        assert tm.current_index == 1
+
+    def test_can_trade_after_candle_of_last_trade_closes(self):
+        now = [OPEN + 90]
+        tm = TimeManager({"minutes": 1}, clock=lambda: now[0])
+        assert tm.can_trade
+
+        tm.set_last_trade_time(pdlm.from_timestamp(OPEN + 70, tz="Asia/Kolkata"))
+        assert not tm.can_trade
+        now[0] = OPEN + 120
+        assert not tm.can_trade
+        now[0] = OPEN + 121
+        assert tm.can_trade
+
+    def test_no_trade_when_last_trade_outside_session(self):
+        tm = TimeManager({"minutes": 1}, clock=lambda: OPEN + 600)
+        tm.set_last_trade_time(OPEN - 60)
+        assert not tm.can_trade
@@ -0,0 +1,345 @@
+"""
+Tests for the websocket quote plumbing: QuoteStore, TickDispatch and
+the incremental QuoteApi.get_quotes built on top of them.
+Run with: pytest tests/unit/test_wserver.py -v
+"""
+
+import threading
+from unittest.mock import Mock
+
+from src.sdk.helper import QuoteApi
+from src.sdk.wserver import QuoteStore, TickDispatch, Wserver
+
+
+def _wserver():
+    ws = Wserver(Mock(), [])
+    ws.ltp = {}
+    ws.quotes = QuoteStore(ws.ltp)
+    ws.socket_opened = True
+    return ws
+
+
+def _quote(key, lp):
+    exchange, token = key.split("|")
+    return {"e": exchange, "tk": token, "lp": lp}
+
+
+class TestQuoteStore:
+    def test_update_bumps_version(self):
+        store = QuoteStore({})
+        store.update("NFO|1", "100.5")
+        store.update("NFO|2", "50")
+
+        assert store.version == 2
+        assert store.ltp == {"NFO|1": "100.5", "NFO|2": "50"}
+
+    def test_changes_since_returns_only_newer_keys(self):
+        store = QuoteStore({})
+        for token in range(200):
+            store.update(f"NFO|{token}", "1")
+        version, _ = store.changes_since(0)
+
+        store.update("NFO|3", "2")
+        store.update("NFO|7", "3")
+        store.update("NFO|3", "4")
+
+        new_version, changed = store.changes_since(version)
+        assert changed == {"NFO|3": "4", "NFO|7": "3"}
+        assert new_version == version + 3
+
+    def test_no_changes_since_current_version(self):
+        store = QuoteStore({})
+        store.update("NFO|1", "1")
+
+        version, changed = store.changes_since(store.version)
+        assert changed == {}
+        assert version == 1
+
+
+class TestTickDispatch:
+    def test_wait_times_out_empty(self):
+        assert TickDispatch().wait(0.01) == set()
+
+    def test_wait_wakes_on_push(self):
+        dispatch = TickDispatch()
+        threading.Timer(0.01, dispatch.push, args=("NFO|1",)).start()
+
+        assert dispatch.wait(2) == {"NFO|1"}
+        assert dispatch.wait(0.01) == set()
+
+
+class TestIncrementalQuotes:
+    def _quote_api(self):
+        ws = _wserver()
+        api = QuoteApi(ws)
+        api.subscribed = {}
+        api._symbols_by_key = {}
+        return api, ws
+
+    def test_get_quotes_applies_only_changes(self):
+        api, ws = self._quote_api()
+        ws.subscribe(["NFO|1"])
+        ws.quotes.update("NFO|1", "100")
+        api.symbol_info("NFO", "CE", token="1")
+        api.symbol_info("NFO", "PE", token="2")
+
+        assert api.get_quotes() == {"CE": "100", "PE": None}
+
+        ws.quotes.update("NFO|2", "55")
+        ws.quotes.update("NFO|9", "1")  # not subscribed
+
+        assert api.get_quotes() == {"CE": "100", "PE": "55"}
+        assert api._version == ws.quotes.version
+
+    def test_tick_time_is_the_exchange_time(self):
+        api, ws = self._quote_api()
+        ws.subscribe(["NFO|1"])
+        ws.event_handler_quote_update({"e": "NFO", "tk": "1", "lp": "10", "ft": "1758167100"})
+        api._add_subscription("CE", "NFO|1", "1", 10.0)
+
+        assert api.tick_time("CE") == 1758167100
+        assert api.tick_time("UNKNOWN") is None
+
+    def test_subscribe_till_ltp_wakes_on_first_quote(self):
+        api, ws = self._quote_api()
+
+        def first_quotes(tokens, feed_type):
+            for key in tokens:
+                quote = _quote(key, "42.5")
+                threading.Timer(0.01, ws.event_handler_quote_update, args=(quote,)).start()
+
+        ws.api.broker.subscribe.side_effect = first_quotes
+
+        assert api._subscribe_till_ltp("NFO|5", max_retries=1) == 42.5
+        ws.api.broker.subscribe.assert_called_once()
+
+    def test_subscribe_till_ltp_gives_up_with_zero(self):
+        api, ws = self._quote_api()
+
+        assert api._subscribe_till_ltp("NFO|5", max_retries=2) == 0.0
+        assert ws.api.broker.subscribe.call_count == 2
+
+    def test_copy_can_be_iterated_while_subscribing(self):
+        """builder jobs scan quotes while other jobs add subscriptions"""
+        ws = _wserver()
+        api = QuoteApi(ws)
+        api.subscribed = {}
+        api._symbols_by_key = {}
+        done = threading.Event()
+
+        def subscribe():
+            for token in range(20000):
+                api._add_subscription(f"S{token}", f"NFO|{token}", str(token), 0.0)
+            done.set()
+
+        adder = threading.Thread(target=subscribe)
+        adder.start()
+        while not done.is_set():
+            for _ in api.get_quotes(copy=True).items():
+                pass
+        adder.join()
+
+        assert len(api.get_quotes(copy=True)) == 20000
+
+
+class TestSubscribeMany:
+    def test_one_frame_and_futures_resolve_on_first_quote(self):
+        ws = _wserver()
+        keys = [f"NFO|{token}" for token in range(30)]
+
+        futures = ws.subscribe_many(keys)
+
+        ws.api.broker.subscribe.assert_called_once()
+        assert ws.api.broker.subscribe.call_args.args[0] == keys
+        assert not any(f.done() for f in futures.values())
+
+        ws.event_handler_quote_update(_quote("NFO|3", "12.5"))
+        assert futures["NFO|3"].result(timeout=0) == "12.5"
+        assert not futures["NFO|4"].done()
+        assert "NFO|3" not in ws._waiting
+
+    def test_known_keys_resolve_without_subscribing(self):
+        ws = _wserver()
+        ws.subscribe(["NFO|1"])
+        ws.quotes.update("NFO|1", "10")
+        ws.api.broker.subscribe.reset_mock()
+
+        futures = ws.subscribe_many(["NFO|1"])
+
+        assert futures["NFO|1"].result(timeout=0) == "10"
+        ws.api.broker.subscribe.assert_not_called()
+
+    def test_late_quote_after_unsubscribe_does_not_block_resubscribe(self):
+        ws = _wserver()
+        ws.subscribe(["NFO|1"])
+        ws.unsubscribe(["NFO|1"])
+        ws.quotes.discard("NFO|1")
+        # a quote already in flight when the unsubscribe went out
+        ws.event_handler_quote_update(_quote("NFO|1", "10"))
+        assert "NFO|1" not in ws.ltp
+        ws.api.broker.subscribe.reset_mock()
+
+        futures = ws.subscribe_many(["NFO|1"])
+
+        ws.api.broker.subscribe.assert_called_once()
+        assert not futures["NFO|1"].done()
+
+    def test_quote_api_registers_all_symbols(self):
+        ws = _wserver()
+        api = QuoteApi(ws)
+        api.subscribed = {}
+        api._symbols_by_key = {}
+
+        def first_quotes(tokens, feed_type):
+            for key in tokens:
+                ws.event_handler_quote_update(_quote(key, "5"))
+
+        ws.api.broker.subscribe.side_effect = first_quotes
+        info = api.subscribe_many({"NFO|1": "CE1", "NFO|2": "PE1"}, timeout=1)
+
+        assert ws.api.broker.subscribe.call_count == 1
+        assert info["CE1"] == {"symbol": "CE1", "key": "NFO|1", "token": "1", "ltp": 5.0}
+        assert api._symbols_by_key == {"NFO|1": "CE1", "NFO|2": "PE1"}
+        assert api.get_quotes() == {"CE1": "5", "PE1": "5"}
+
+    def test_quote_api_times_out_with_zero_ltp(self):
+        ws = _wserver()
+        api = QuoteApi(ws)
+        api.subscribed = {}
+        api._symbols_by_key = {}
+
+        info = api.subscribe_many({"NFO|1": "CE1"}, timeout=0.01)
+
+        assert info["CE1"]["ltp"] == 0.0
+
+
+class TestSubscriptionLifecycle:
+    """Reference counted subscriptions, idle symbols are unsubscribed"""
+
+    def _api(self, symbols_by_key):
+        ws = _wserver()
+        api = QuoteApi(ws)
+        api.subscribed = {}
+        api._symbols_by_key = {}
+        api._refs = {}
+        for key in symbols_by_key:
+            ws.quotes.update(key, "1")
+        api.subscribe_many(symbols_by_key, timeout=0)
+        return api, ws
+
+    def test_prune_keeps_only_held_symbols(self):
+        window = {f"NFO|{token}": f"S{token}" for token in range(30)}
+        api, ws = self._api(window)
+        api.acquire("S7")
+
+        assert api.subscription_counts() == {"live": 1, "idle": 29}
+
+        pruned = api.prune()
+
+        assert len(pruned) == 29
+        ws.api.broker.unsubscribe.assert_called_once()
+        assert len(ws.api.broker.unsubscribe.call_args.args[0]) == 29
+        assert list(api.subscribed) == ["S7"]
+        assert api._symbols_by_key == {"NFO|7": "S7"}
+        assert list(ws.ltp) == ["NFO|7"]
+        assert api.subscription_counts() == {"live": 1, "idle": 0}
+
+    def test_symbol_stays_till_last_holder_releases(self):
+        api, ws = self._api({"NFO|1": "CE"})
+        api.acquire("CE")
+        api.acquire("CE")
+
+        api.release("CE")
+        assert api.prune() == []
+
+        api.release("CE")
+        assert api.prune() == ["CE"]
+        assert api.get_quotes() == {}
+
+    def test_nothing_idle_sends_no_frame(self):
+        api, ws = self._api({"NFO|1": "CE"})
+        api.acquire("CE")
+
+        api.prune()
+
+        ws.api.broker.unsubscribe.assert_not_called()
+
+
+class TestReconnect:
+    """Reconnect supervisor, subscription replay and stale quotes"""
+
+    def test_reopen_replays_subscriptions_and_records_gap(self):
+        ws = _wserver()
+        ws._reconnect = Mock()
+        ws.subscribe(["NFO|1", "NFO|2"])
+        ws.unsubscribe(["NFO|2"])
+
+        ws.close_callback()
+        ws.close_callback()  # repeated close is one outage
+        assert ws.api.broker.subscribe.call_count == 1
+        ws.api.broker.subscribe.reset_mock()
+        ws.open_callback()
+
+        assert ws.api.broker.subscribe.call_args.args[0] == ["NFO|1"]
+        assert ws.gaps.disconnects == 1
+        assert ws.gaps.reconnects == 1
+        assert ws.gaps.max_gap_secs >= ws.gaps.last_gap_secs > 0
+
+    def test_supervisor_restarts_with_backoff_till_open(self):
+        ws = _wserver()
+        ws.max_backoff = 0.02
+
+        def start():
+            if ws._start.call_count == 3:
+                ws._opened.set()
+
+        ws._start = Mock(side_effect=start)
+        ws._reconnect(initial=0.01)
+
+        assert ws._start.call_count == 3
+        # every retry tears down the previous attempt first
+        assert ws.api.broker.close_websocket.call_count == 3
+
+    def test_quotes_stale_while_down_and_till_next_tick(self):
+        ws = _wserver()
+        ws.quotes.update("NFO|1", "10")
+        assert ws.stale_keys() == set()
+
+        ws._reconnect = Mock()
+        ws.close_callback()
+        assert ws.is_stale("NFO|1")
+
+        ws.open_callback()
+        assert ws.is_stale("NFO|1")
+
+        assert ws.stale_keys() == {"NFO|1"}
+
+        ws.quotes.update("NFO|1", "11")
+        assert not ws.is_stale("NFO|1")
+        assert ws.stale_keys() == set()
+
+    def test_stale_after_age(self):
+        ws = _wserver()
+        ws.stale_after = 5
+        ws.quotes.update("NFO|1", "10")
+        ws.quotes.update("NFO|2", "20")
+        ws.quotes._updated_at["NFO|1"] -= 6
+
+        assert ws.is_stale("NFO|1")
+        assert ws.stale_keys() == {"NFO|1"}
+
+    def test_get_quotes_hides_stale_symbols(self):
+        ws = _wserver()
+        api = QuoteApi(ws)
+        api.subscribed = {}
+        api._symbols_by_key = {}
+        ws.quotes.update("NFO|2", "20")
+        ws.quotes.update("NFO|1", "10")
+        api.subscribe_many({"NFO|1": "CE", "NFO|2": "PE"}, timeout=0)
+        ws.quotes._updated_at["NFO|2"] -= 6
+        ws.stale_after = 5
+
+        assert api.get_quotes() == {"CE": "10"}
+
+        ws.socket_opened = False
+        assert api.get_quotes() == {}